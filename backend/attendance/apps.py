@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AttendanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attendance'
+
+    def ready(self):
+        from hrms import warmup
+
+        # The root URLconf imports the attendance views and the health check
+        warmup.warm_up(
+            'attendance',
+            warmup.connect_mongo,
+            warmup.load_api_settings,
+            warmup.import_modules('attendance.urls', settings.ROOT_URLCONF),
+        )
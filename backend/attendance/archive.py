@@ -0,0 +1,298 @@
+"""Archival of old attendance records.
+
+``manage.py archive_attendance`` moves records older than a horizon
+(``ATTENDANCE_ARCHIVE_MONTHS``, counted in whole months) out of the hot
+``attendance`` collection into ``attendance_archive``. Each archive document
+is a bucket of one employee's records within one month:
+
+``{_id, employee_id, month, first_date, last_date, count, present, absent,
+streak: {lead, tail, longest, has_absent}, records: <gzipped NDJSON>}``
+
+The counters and rollups are left as they are, so the dashboard and reports
+keep counting archived days. The employee history endpoint adds the bucket
+totals and streak summaries to what it reads from the hot collection. The
+records themselves are read back, decompressed, by the export endpoint with
+``include_archive=true``.
+
+A bucket's ``_id`` is ``'<employee_id>:<YYYY-MM>'``. Each batch merges its
+records into the existing bucket of their employee and month, keyed by date,
+so a month split across batches, an interrupted run (buckets are written
+before the hot records are deleted) or a rerun with another ``--batch-size``
+all end with one bucket per employee and month and no repeated days. Buckets
+written before the ids were deterministic are folded in the same way.
+
+Archived days are read-only. ``archive_before`` records its cutoff in
+``data_migrations`` before it moves anything, and the attendance write
+serializers reject dates before ``archived_before()``, so a write cannot put
+a day back in the hot collection that is already counted in a bucket. Workers
+cache that cutoff for ``ATTENDANCE_ARCHIVE_CUTOFF_TTL`` seconds, so a run
+that moves it forward waits that long before moving records.
+"""
+import gzip
+import json
+import time
+from collections import defaultdict
+from datetime import date, datetime
+
+from django.conf import settings
+from pymongo import ReplaceOne
+from bson import Binary
+
+from hrms.cache import TTLCache
+from hrms.db import get_attendance_archive_collection, get_attendance_collection, get_migrations_collection
+from . import dates
+
+ARCHIVE_MONTHS = getattr(settings, 'ATTENDANCE_ARCHIVE_MONTHS', 12)
+BATCH_SIZE = getattr(settings, 'ATTENDANCE_ARCHIVE_BATCH_SIZE', 5000)
+CUTOFF_TTL = getattr(settings, 'ATTENDANCE_ARCHIVE_CUTOFF_TTL', 60)
+SUMMARY_PROJECTION = {'records': 0}
+
+# data_migrations document holding the cutoff of the archived range
+CUTOFF_MARKER = 'attendance_archive'
+cutoff_cache = TTLCache(maxsize=1, ttl=CUTOFF_TTL)
+
+
+def horizon(months=None, today=None):
+    """First day ('YYYY-MM-DD') of the oldest month kept in the hot collection.
+
+    ``months`` defaults to ``ATTENDANCE_ARCHIVE_MONTHS``.
+    """
+    if months is None:
+        months = getattr(settings, 'ATTENDANCE_ARCHIVE_MONTHS', ARCHIVE_MONTHS)
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1).isoformat()
+
+
+def archived_before():
+    """Date ('YYYY-MM-DD') before which attendance is archived, or None if it never was"""
+    entry = cutoff_cache.get(CUTOFF_MARKER)
+    if entry is None:
+        marker = get_migrations_collection().find_one({'_id': CUTOFF_MARKER}, {'cutoff': 1})
+        # Cached as a tuple so "never archived" is cached too
+        entry = ((marker or {}).get('cutoff'),)
+        cutoff_cache.set(CUTOFF_MARKER, entry)
+    return entry[0]
+
+
+def _record_cutoff(cutoff):
+    """Record that attendance before ``cutoff`` is archived; True if that moved it forward"""
+    # $max: a rerun with an earlier cutoff leaves the later days archived
+    before = get_migrations_collection().find_one_and_update(
+        {'_id': CUTOFF_MARKER},
+        {'$max': {'cutoff': cutoff}, '$set': {'updated_at': datetime.utcnow()}},
+        upsert=True
+    )
+    cutoff_cache.delete(CUTOFF_MARKER)
+    return before is None or before.get('cutoff', '') < cutoff
+
+
+def streak_summary(statuses):
+    """Present-streak summary of chronologically ordered statuses.
+
+    ``lead`` and ``tail`` are the Present runs before the first and after the
+    last Absent; summaries of consecutive periods combine with
+    ``combine_streaks``.
+    """
+    lead = tail = longest = 0
+    has_absent = False
+    for status in statuses:
+        if status == 'Present':
+            tail += 1
+            longest = max(longest, tail)
+            if not has_absent:
+                lead += 1
+        elif status == 'Absent':
+            has_absent = True
+            tail = 0
+    return {'lead': lead, 'tail': tail, 'longest': longest, 'has_absent': has_absent}
+
+
+def combine_streaks(earlier, later):
+    """Streak summary of two consecutive periods"""
+    return {
+        'lead': earlier['lead'] if earlier['has_absent'] else earlier['lead'] + later['lead'],
+        'tail': later['tail'] if later['has_absent'] else earlier['tail'] + later['tail'],
+        'longest': max(earlier['longest'], later['longest'], earlier['tail'] + later['lead']),
+        'has_absent': earlier['has_absent'] or later['has_absent'],
+    }
+
+
+def bucket_id(employee_id, month):
+    return f'{employee_id}:{month}'
+
+
+def _row(record):
+    return {
+        'id': str(record['_id']),
+        'date': dates.iso(record['date']),
+        'status': record['status'],
+        'created_at': record['created_at'].isoformat() if record.get('created_at') else None,
+    }
+
+
+def _bucket(employee_id, month, rows):
+    """Archive document for one employee's rows (sorted by date) in one month"""
+    payload = ''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in rows).encode()
+    statuses = [row['status'] for row in rows]
+    return {
+        '_id': bucket_id(employee_id, month),
+        'employee_id': employee_id,
+        'month': month,
+        'first_date': rows[0]['date'],
+        'last_date': rows[-1]['date'],
+        'count': len(rows),
+        'present': statuses.count('Present'),
+        'absent': statuses.count('Absent'),
+        'streak': streak_summary(statuses),
+        'records': Binary(gzip.compress(payload)),
+    }
+
+
+def _merge(records, archive):
+    """Buckets for a batch of hot records, merged with the archived ones.
+
+    Returns (buckets, superseded): the buckets to write, and the ids of
+    legacy buckets folded into them. A hot record replaces an archived row
+    for the same date.
+    """
+    groups = defaultdict(dict)
+    for record in records:
+        row = _row(record)
+        groups[(record['employee_id'], row['date'][:7])][row['date']] = row
+
+    existing = archive.find({
+        'employee_id': {'$in': list({employee_id for employee_id, _ in groups})},
+        'month': {'$in': list({month for _, month in groups})},
+    })
+    archived = defaultdict(list)
+    for bucket in existing:
+        key = (bucket['employee_id'], bucket['month'])
+        if key in groups:
+            archived[key].append(bucket)
+
+    buckets = []
+    superseded = []
+    for (employee_id, month), rows in groups.items():
+        merged = {}
+        for bucket in archived[(employee_id, month)]:
+            merged.update((row['date'], row) for row in decompress(bucket))
+            if bucket['_id'] != bucket_id(employee_id, month):
+                superseded.append(bucket['_id'])
+        merged.update(rows)
+        buckets.append(_bucket(employee_id, month, [merged[day] for day in sorted(merged)]))
+    return buckets, superseded
+
+
+def archive_before(cutoff, batch_size=BATCH_SIZE, dry_run=False):
+    """Move attendance dated before `cutoff` ('YYYY-MM-DD') into the archive.
+
+    Returns (records, buckets) moved and written, or the records that would
+    be moved when dry_run is set. A bucket updated by several batches is
+    counted once per batch.
+    """
+    collection = get_attendance_collection()
+    archive = get_attendance_archive_collection()
+    query = {'date': {'$lt': dates.to_storage(cutoff)}}
+    if dry_run:
+        return collection.count_documents(query), 0
+
+    if _record_cutoff(cutoff):
+        # Until their cached cutoff expires, workers may still accept those days
+        time.sleep(CUTOFF_TTL)
+
+    moved = written = 0
+    while True:
+        # Walks the (employee_id, date) index; each pass starts over because
+        # the previous batch is gone from the hot collection
+        batch = list(collection.find(query).sort([('employee_id', 1), ('date', 1)]).limit(batch_size))
+        if not batch:
+            return moved, written
+        buckets, superseded = _merge(batch, archive)
+        archive.bulk_write([ReplaceOne({'_id': b['_id']}, b, upsert=True) for b in buckets], ordered=False)
+        if superseded:
+            archive.delete_many({'_id': {'$in': superseded}})
+        collection.delete_many({'_id': {'$in': [record['_id'] for record in batch]}})
+        moved += len(batch)
+        written += len(buckets)
+
+
+def decompress(bucket):
+    """Records of an archive bucket as dicts with id, date, status, created_at"""
+    return [json.loads(line) for line in gzip.decompress(bucket['records']).splitlines()]
+
+
+def bucket_query(employee_id=None, date_from=None, date_to=None):
+    """Archive query for buckets overlapping an optional employee and date range"""
+    query = {}
+    if employee_id:
+        query['employee_id'] = employee_id
+    if date_from:
+        query['last_date'] = {'$gte': date_from}
+    if date_to:
+        query['first_date'] = {'$lte': date_to}
+    return query
+
+
+def iter_records(employee_id=None, date_from=None, date_to=None):
+    """Yield archived records ({'employee_id', 'date', 'status', ...}) in the range"""
+    cursor = get_attendance_archive_collection(secondary=True).find(
+        bucket_query(employee_id, date_from, date_to)
+    ).sort([('first_date', 1), ('_id', 1)])
+    for bucket in cursor:
+        for record in decompress(bucket):
+            if (date_from and record['date'] < date_from) or (date_to and record['date'] > date_to):
+                continue
+            record['employee_id'] = bucket['employee_id']
+            yield record
+
+
+def _period(bucket, date_from, date_to):
+    """Totals and streak summary of a bucket within [date_from, date_to]"""
+    inside = (not date_from or bucket['first_date'] >= date_from) and \
+        (not date_to or bucket['last_date'] <= date_to)
+    if inside:
+        return {key: bucket[key] for key in ('month', 'count', 'present', 'absent', 'streak')}
+    statuses = [
+        record['status'] for record in decompress(bucket)
+        if (not date_from or record['date'] >= date_from) and (not date_to or record['date'] <= date_to)
+    ]
+    return {
+        'month': bucket['month'],
+        'count': len(statuses),
+        'present': statuses.count('Present'),
+        'absent': statuses.count('Absent'),
+        'streak': streak_summary(statuses),
+    }
+
+
+def _summary_query(employee_id, date_from, date_to):
+    # Records are only needed for buckets cut by the range
+    projection = None if date_from or date_to else SUMMARY_PROJECTION
+    return bucket_query(employee_id, date_from, date_to), projection
+
+
+def summaries(employee_id, date_from=None, date_to=None):
+    """Per-bucket totals and streak summaries for an employee, oldest first"""
+    query, projection = _summary_query(employee_id, date_from, date_to)
+    cursor = get_attendance_archive_collection().find(query, projection).sort('first_date', 1)
+    return [_period(bucket, date_from, date_to) for bucket in cursor]
+
+
+async def asummaries(employee_id, date_from=None, date_to=None):
+    """Async counterpart of summaries"""
+    from hrms.async_db import get_attendance_archive_collection as get_async_archive_collection
+
+    query, projection = _summary_query(employee_id, date_from, date_to)
+    cursor = get_async_archive_collection().find(query, projection).sort('first_date', 1)
+    return [_period(bucket, date_from, date_to) for bucket in await cursor.to_list(length=None)]
+
+
+def remove_employee(employee_id, department):
+    """Delete a purged employee's archive, taking its records out of the counters"""
+    from . import counters
+
+    archive = get_attendance_archive_collection()
+    for bucket in archive.find({'employee_id': employee_id}):
+        counters.subtract_records(decompress(bucket), department)
+        archive.delete_one({'_id': bucket['_id']})
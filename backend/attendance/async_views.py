@@ -0,0 +1,133 @@
+"""Async (Motor) versions of the attendance read endpoints, used under ASGI"""
+import asyncio
+
+from hrms import async_db
+from hrms.async_api import AsyncAPIView, delegate, error_response, json_response
+from hrms.cache import aget_employee, aget_employees
+from hrms.pagination import InvalidQueryParam, apaginate, page_meta
+from hrms.versions import ATTENDANCE, EMPLOYEES, conditional
+from . import archive, counters, rollups
+from .views import (
+    ATTENDANCE_LIST_SORT, DELETED_EMPLOYEES, AttendanceListCreateView,
+    attendance_list_query, enrich_records, employee_history_params, employee_history_pipeline,
+    employee_history_payload, dashboard_cache, dashboard_cache_key, dashboard_payload, today_key,
+    report_params, report_payload
+)
+
+
+class AsyncAttendanceListCreateView(AsyncAPIView):
+    """Async view for listing and creating attendance records"""
+
+    @conditional(ATTENDANCE, EMPLOYEES)
+    async def get(self, request):
+        """List attendance records, newest date first, one keyset page at a time"""
+        try:
+            query, limit = attendance_list_query(request.GET)
+        except InvalidQueryParam as e:
+            return error_response(str(e))
+
+        attendance_records, next_cursor = await apaginate(
+            async_db.get_attendance_collection(secondary=True), query, ATTENDANCE_LIST_SORT, 'date', limit
+        )
+
+        # Fetch only the employees referenced on this page
+        employees = await aget_employees(
+            (r.get('employee_id') for r in attendance_records), versions=request.collection_versions
+        )
+
+        return json_response({
+            'success': True,
+            'message': 'Attendance records retrieved successfully',
+            'data': enrich_records(attendance_records, employees),
+            'pagination': page_meta(limit, next_cursor)
+        })
+
+    post = delegate(AttendanceListCreateView)
+
+
+class AsyncEmployeeAttendanceView(AsyncAPIView):
+    """Async view for getting attendance records for a specific employee"""
+
+    @conditional(ATTENDANCE, EMPLOYEES)
+    async def get(self, request, employee_id):
+        """Get attendance history for an employee"""
+        try:
+            employee = await aget_employee(employee_id, versions=request.collection_versions)
+        except Exception:
+            return error_response('Invalid employee ID format')
+
+        if not employee:
+            return error_response('Employee not found', status=404)
+
+        try:
+            date_from, date_to, limit = employee_history_params(request.GET)
+        except InvalidQueryParam as e:
+            return error_response(str(e))
+
+        pipeline = employee_history_pipeline(employee_id, date_from, date_to, limit)
+        facets, archived = await asyncio.gather(
+            async_db.get_attendance_collection().aggregate(pipeline).to_list(length=1),
+            archive.asummaries(employee_id, date_from, date_to),
+        )
+
+        return json_response({
+            'success': True,
+            'message': 'Employee attendance retrieved successfully',
+            'data': employee_history_payload(employee, facets[0], date_from, date_to, limit, archived)
+        })
+
+
+class AsyncAttendanceReportView(AsyncAPIView):
+    """Async monthly attendance report served from the rollup collections"""
+
+    @conditional(ATTENDANCE, EMPLOYEES)
+    async def get(self, request):
+        """Department x month matrix, or employee x month for one department"""
+        try:
+            by, from_month, to_month, department = report_params(request.GET)
+        except InvalidQueryParam as e:
+            return error_response(str(e))
+
+        if by == 'department':
+            rows = await rollups.adepartment_matrix(from_month, to_month, department)
+        else:
+            rows = await rollups.aemployee_matrix(from_month, to_month, department)
+
+        return json_response(report_payload(by, from_month, to_month, department, rows))
+
+
+async def acompute_dashboard(today):
+    """Async counterpart of compute_dashboard; the independent reads run concurrently"""
+    stats_cursor = async_db.get_employee_counters_collection(secondary=True).find(
+        counters.EMPLOYEE_STATS_FILTER, counters.EMPLOYEE_STATS_PROJECTION
+    ).sort('present_days', -1)
+
+    employees_collection = async_db.get_employees_collection(secondary=True)
+    total_employees, deleted_employees, daily_doc, stats_docs = await asyncio.gather(
+        employees_collection.estimated_document_count(),
+        employees_collection.count_documents(DELETED_EMPLOYEES),
+        async_db.get_daily_counters_collection(secondary=True).find_one({'_id': today}),
+        stats_cursor.to_list(length=None),
+    )
+    total_employees -= deleted_employees
+    today_present, today_absent = counters.daily_counts_from_doc(daily_doc)
+    employee_stats = [counters.employee_stat_from_doc(doc) for doc in stats_docs]
+    return dashboard_payload(total_employees, today, today_present, today_absent, employee_stats)
+
+
+class AsyncDashboardView(AsyncAPIView):
+    """Async dashboard API"""
+
+    @conditional(EMPLOYEES, ATTENDANCE, extra=today_key)
+    async def get(self, request):
+        """Get dashboard statistics"""
+        today = today_key()
+        data = await dashboard_cache.aget_or_compute(
+            dashboard_cache_key(request, today), lambda: acompute_dashboard(today)
+        )
+
+        return json_response({
+            'success': True,
+            'message': 'Dashboard data retrieved successfully',
+            'data': data
+        })
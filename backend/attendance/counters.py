@@ -0,0 +1,294 @@
+"""Incrementally maintained attendance counters for the dashboard.
+
+Three small collections are kept in step with the attendance write paths:
+
+* ``attendance_daily_counters``: one document per date, ``{_id: 'YYYY-MM-DD',
+  present, absent}``.
+* ``attendance_employee_counters``: one document per employee,
+  ``{_id: employee_id, present_days, absent_days, employee_name,
+  employee_code}``.
+* ``attendance_department_counters``: one document per department and date,
+  ``{_id: '<department>:YYYY-MM-DD', department, date, present, absent}``.
+
+Writes use ``$inc`` with ``upsert`` so concurrent requests never lose updates.
+``rebuild_counters`` recomputes all three from the raw data and is
+exposed as ``manage.py rebuild_counters`` for repair.
+"""
+from collections import defaultdict
+
+from pymongo import UpdateOne
+
+from hrms.db import (
+    get_employees_collection,
+    get_attendance_collection,
+    get_daily_counters_collection,
+    get_employee_counters_collection,
+    get_department_counters_collection,
+    get_attendance_archive_collection,
+)
+from . import archive, dates
+
+
+STATUS_FIELDS = {'Present': 'present', 'Absent': 'absent'}
+
+
+def _department_day_id(department, date):
+    return f'{department}:{date}'
+
+
+def _department_updates(deltas, upsert):
+    return [
+        UpdateOne(
+            {'_id': _department_day_id(department, day)},
+            {'$inc': dict(inc), '$set': {'department': department, 'date': day}},
+            upsert=upsert
+        )
+        for (department, day), inc in deltas.items()
+    ]
+
+
+def apply_changes(changes):
+    """Apply a batch of attendance writes to the counters in two bulk writes.
+
+    ``changes`` is an iterable of ``(employee, date, old_status, new_status)``
+    tuples; ``old_status`` is None for a newly inserted record.
+    """
+    daily = defaultdict(lambda: defaultdict(int))
+    per_department = defaultdict(lambda: defaultdict(int))
+    per_employee = {}
+    for employee, date, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        employee_id = str(employee['_id'])
+        department_day = (employee.get('department', 'Unknown'), date)
+        entry = per_employee.setdefault(employee_id, {'employee': employee, 'inc': defaultdict(int)})
+        if old_status:
+            daily[date][STATUS_FIELDS[old_status]] -= 1
+            per_department[department_day][STATUS_FIELDS[old_status]] -= 1
+            entry['inc'][f'{STATUS_FIELDS[old_status]}_days'] -= 1
+        daily[date][STATUS_FIELDS[new_status]] += 1
+        per_department[department_day][STATUS_FIELDS[new_status]] += 1
+        entry['inc'][f'{STATUS_FIELDS[new_status]}_days'] += 1
+
+    if not daily:
+        return
+
+    get_daily_counters_collection().bulk_write(
+        [UpdateOne({'_id': day}, {'$inc': dict(inc)}, upsert=True) for day, inc in daily.items()],
+        ordered=False
+    )
+    get_department_counters_collection().bulk_write(_department_updates(per_department, True), ordered=False)
+    get_employee_counters_collection().bulk_write(
+        [
+            UpdateOne(
+                {'_id': employee_id},
+                {
+                    '$inc': dict(entry['inc']),
+                    '$set': {
+                        'employee_name': entry['employee'].get('full_name', 'Unknown'),
+                        'employee_code': entry['employee'].get('employee_id', 'Unknown'),
+                    }
+                },
+                upsert=True
+            )
+            for employee_id, entry in per_employee.items()
+        ],
+        ordered=False
+    )
+
+
+def remove_employee(employee_id):
+    """Drop a deleted employee from the per-employee counters"""
+    get_employee_counters_collection().delete_one({'_id': str(employee_id)})
+
+
+def subtract_records(records, department=None):
+    """Subtract deleted attendance records from the daily counters.
+
+    ``records`` is an iterable of ``{'date', 'status'}`` documents read before
+    the attendance rows were deleted. When the records all belong to one
+    employee, pass its ``department`` to update the department counters too.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for record in records:
+        field = STATUS_FIELDS.get(record.get('status'))
+        if field:
+            deltas[dates.iso(record['date'])][field] -= 1
+
+    if deltas:
+        get_daily_counters_collection().bulk_write(
+            [UpdateOne({'_id': day}, {'$inc': dict(inc)}) for day, inc in deltas.items()],
+            ordered=False
+        )
+        if department is not None:
+            get_department_counters_collection().bulk_write(
+                _department_updates({(department, day): inc for day, inc in deltas.items()}, False),
+                ordered=False
+            )
+
+
+EMPLOYEE_STATS_FILTER = {'present_days': {'$gt': 0}}
+EMPLOYEE_STATS_PROJECTION = {'present_days': 1, 'employee_name': 1, 'employee_code': 1}
+
+
+def daily_counts_from_doc(doc):
+    """(present, absent) from a daily counter document, or zeros"""
+    doc = doc or {}
+    return doc.get('present', 0), doc.get('absent', 0)
+
+
+def employee_stat_from_doc(doc):
+    """Dashboard employee_stats entry from an employee counter document"""
+    return {
+        'employee_id': doc['_id'],
+        'present_days': doc['present_days'],
+        'employee_name': doc.get('employee_name', 'Unknown'),
+        'employee_code': doc.get('employee_code', 'Unknown'),
+    }
+
+
+def get_daily_counts(date):
+    """Return (present, absent) for a date"""
+    return daily_counts_from_doc(get_daily_counters_collection(secondary=True).find_one({'_id': date}))
+
+
+DEPARTMENT_COUNTS_PROJECTION = {'department': 1, 'present': 1, 'absent': 1}
+
+
+def get_department_counts(date):
+    """Return {department: (present, absent)} for a date"""
+    cursor = get_department_counters_collection(secondary=True).find({'date': date}, DEPARTMENT_COUNTS_PROJECTION)
+    return {doc['department']: daily_counts_from_doc(doc) for doc in cursor}
+
+
+async def aget_department_counts(date):
+    """Async counterpart of get_department_counts"""
+    from hrms.async_db import get_department_counters_collection as get_async_collection
+
+    cursor = get_async_collection(secondary=True).find({'date': date}, DEPARTMENT_COUNTS_PROJECTION)
+    return {doc['department']: daily_counts_from_doc(doc) async for doc in cursor}
+
+
+def get_employee_stats():
+    """Return per-employee present counts, highest first"""
+    cursor = get_employee_counters_collection(secondary=True).find(
+        EMPLOYEE_STATS_FILTER, EMPLOYEE_STATS_PROJECTION
+    ).sort('present_days', -1)
+    return [employee_stat_from_doc(doc) for doc in cursor]
+
+
+def deleted_employee_ids():
+    """Ids (as strings) of the soft-deleted employees whose purge has not finished"""
+    cursor = get_employees_collection().find({'deleted_at': {'$exists': True}}, {'_id': 1})
+    return [str(emp['_id']) for emp in cursor]
+
+
+def _add_archived(daily, per_employee, per_department, employees, deleted):
+    """Add the records moved to attendance_archive to rebuilt counter documents"""
+    daily = {doc['_id']: doc for doc in daily}
+    per_employee = {doc['_id']: doc for doc in per_employee}
+    per_department = {doc['_id']: doc for doc in per_department}
+
+    for bucket in get_attendance_archive_collection().find():
+        employee_id = bucket['employee_id']
+        employee = employees.get(employee_id, {})
+        department = employee.get('department', 'Unknown')
+        if employee_id not in deleted:
+            entry = per_employee.setdefault(employee_id, {
+                '_id': employee_id,
+                'present_days': 0,
+                'absent_days': 0,
+                'employee_name': employee.get('full_name', 'Unknown'),
+                'employee_code': employee.get('employee_id', 'Unknown'),
+            })
+            entry['present_days'] += bucket['present']
+            entry['absent_days'] += bucket['absent']
+        for record in archive.decompress(bucket):
+            field = STATUS_FIELDS.get(record['status'])
+            if not field:
+                continue
+            day = record['date']
+            daily.setdefault(day, {'_id': day, 'present': 0, 'absent': 0})[field] += 1
+            department_day = _department_day_id(department, day)
+            per_department.setdefault(department_day, {
+                '_id': department_day, 'department': department, 'date': day, 'present': 0, 'absent': 0
+            })[field] += 1
+
+    return list(daily.values()), list(per_employee.values()), list(per_department.values())
+
+
+def rebuild_counters():
+    """Recompute every counter from the employees, attendance and archive collections.
+
+    Soft-deleted employees get no per-employee counter, as after
+    ``remove_employee``. Their records still count towards the daily and
+    department counters until the purge job deletes them, because the purge
+    subtracts each record it deletes from those counters.
+
+    Returns (days, employees, department_days): the number of counter
+    documents written.
+    """
+    attendance_collection = get_attendance_collection()
+    daily_collection = get_daily_counters_collection()
+    employee_collection = get_employee_counters_collection()
+    department_collection = get_department_counters_collection()
+
+    daily = list(attendance_collection.aggregate([
+        {'$group': {
+            '_id': dates.day_expression(),
+            'present': {'$sum': {'$cond': [{'$eq': ['$status', 'Present']}, 1, 0]}},
+            'absent': {'$sum': {'$cond': [{'$eq': ['$status', 'Absent']}, 1, 0]}},
+        }}
+    ], allowDiskUse=True))
+
+    deleted = deleted_employee_ids()
+    per_employee = list(attendance_collection.aggregate([
+        {'$match': {'employee_id': {'$nin': deleted}}},
+        {'$group': {
+            '_id': '$employee_id',
+            'present_days': {'$sum': {'$cond': [{'$eq': ['$status', 'Present']}, 1, 0]}},
+            'absent_days': {'$sum': {'$cond': [{'$eq': ['$status', 'Absent']}, 1, 0]}},
+        }}
+    ], allowDiskUse=True))
+
+    employees = {
+        str(emp['_id']): emp
+        for emp in get_employees_collection().find({}, {'full_name': 1, 'employee_id': 1, 'department': 1})
+    }
+    for doc in per_employee:
+        employee = employees.get(doc['_id'], {})
+        doc['employee_name'] = employee.get('full_name', 'Unknown')
+        doc['employee_code'] = employee.get('employee_id', 'Unknown')
+
+    # Attendance does not carry the department, so count one department's
+    # employees at a time through the (employee_id, date) index
+    members = defaultdict(list)
+    for employee_id, employee in employees.items():
+        members[employee.get('department', 'Unknown')].append(employee_id)
+    per_department = []
+    for department, employee_ids in members.items():
+        for doc in attendance_collection.aggregate([
+            {'$match': {'employee_id': {'$in': employee_ids}}},
+            {'$group': {
+                '_id': dates.day_expression(),
+                'present': {'$sum': {'$cond': [{'$eq': ['$status', 'Present']}, 1, 0]}},
+                'absent': {'$sum': {'$cond': [{'$eq': ['$status', 'Absent']}, 1, 0]}},
+            }}
+        ], allowDiskUse=True):
+            per_department.append(dict(
+                doc, _id=_department_day_id(department, doc['_id']), department=department, date=doc['_id']
+            ))
+
+    daily, per_employee, per_department = _add_archived(daily, per_employee, per_department, employees, set(deleted))
+
+    daily_collection.delete_many({})
+    if daily:
+        daily_collection.insert_many(daily, ordered=False)
+    employee_collection.delete_many({})
+    if per_employee:
+        employee_collection.insert_many(per_employee, ordered=False)
+    department_collection.delete_many({})
+    if per_department:
+        department_collection.insert_many(per_department, ordered=False)
+
+    return len(daily), len(per_employee), len(per_department)
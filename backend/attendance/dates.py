@@ -0,0 +1,88 @@
+"""Storage format of attendance dates.
+
+Attendance ``date`` values were historically stored as ``'YYYY-MM-DD'``
+strings. With ``ATTENDANCE_DATE_STORAGE = 'date'`` they are stored as native
+BSON dates (UTC midnight), which lets range scans, ``$dateTrunc``/
+``$dateToString`` grouping and TTL or archival policies work on the real
+type. ``manage.py migrate_attendance_dates`` converts existing records.
+
+Everything outside the attendance collection keeps using ISO strings: API
+payloads, counter and rollup keys, and the ``changes`` tuples passed to
+``counters.apply_changes``. The helpers here convert at the boundary, and the
+query builders produce range predicates that the ``(employee_id, date)`` and
+``(date, ...)`` indexes answer with a single bounded scan.
+"""
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+
+STRING = 'string'
+DATE = 'date'
+STORAGE = getattr(settings, 'ATTENDANCE_DATE_STORAGE', STRING)
+
+
+def native(storage=None):
+    return (storage or STORAGE) == DATE
+
+
+def to_storage(day, storage=None):
+    """Storage value for a date or 'YYYY-MM-DD' string"""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    if native(storage):
+        return datetime(day.year, day.month, day.day)
+    return day.isoformat()
+
+
+def iso(value):
+    """'YYYY-MM-DD' for a stored value of either type"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+def range_predicate(date_from=None, date_to=None):
+    """Inclusive {'$gte', '$lte'} predicate on `date`, or None if unbounded.
+
+    Native dates compare with an exclusive upper bound at the next midnight,
+    so a stored value with a time part is still counted on its day.
+    """
+    predicate = {}
+    if date_from:
+        predicate['$gte'] = to_storage(date_from)
+    if date_to:
+        if native():
+            predicate['$lt'] = to_storage(date.fromisoformat(iso(date_to)) + timedelta(days=1))
+        else:
+            predicate['$lte'] = to_storage(date_to)
+    return predicate or None
+
+
+def month_bounds(month):
+    """(first day, last day) ISO strings of a 'YYYY-MM' month"""
+    year, number = map(int, month.split('-'))
+    first = date(year, number, 1)
+    following = date(year + number // 12, number % 12 + 1, 1)
+    return first.isoformat(), (following - timedelta(days=1)).isoformat()
+
+
+def quarter_bounds(year, quarter):
+    """(first day, last day) ISO strings of a calendar quarter (1-4)"""
+    first_month = 3 * (quarter - 1) + 1
+    first, _ = month_bounds(f'{year:04d}-{first_month:02d}')
+    _, last = month_bounds(f'{year:04d}-{first_month + 2:02d}')
+    return first, last
+
+
+def day_expression(field='$date'):
+    """Aggregation expression yielding 'YYYY-MM-DD' for the stored field"""
+    if native():
+        return {'$dateToString': {'format': '%Y-%m-%d', 'date': field}}
+    return field
+
+
+def month_expression(field='$date'):
+    """Aggregation expression yielding 'YYYY-MM' for the stored field"""
+    if native():
+        return {'$dateToString': {'format': '%Y-%m', 'date': field}}
+    return {'$substrCP': [field, 0, 7]}
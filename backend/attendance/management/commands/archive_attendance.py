@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from attendance import archive
+from hrms.versions import ATTENDANCE, bump_version
+
+
+class Command(BaseCommand):
+    help = 'Move attendance older than the archive horizon into compressed monthly buckets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=archive.ARCHIVE_MONTHS,
+            help='Whole months to keep in the hot collection besides the current one'
+        )
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE)
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Only report how many records would be archived'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive.horizon(options['months'])
+        moved, buckets = archive.archive_before(cutoff, options['batch_size'], options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'{moved} records dated before {cutoff} would be archived')
+            return
+        if moved:
+            # History responses include the archive, so invalidate their ETags
+            bump_version(ATTENDANCE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {moved} records dated before {cutoff} into {buckets} buckets'
+        ))
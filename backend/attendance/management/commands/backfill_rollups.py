@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from attendance.rollups import rebuild_rollups
+from hrms.versions import ATTENDANCE, bump_version
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly attendance rollups from the attendance collection'
+
+    def handle(self, *args, **options):
+        employee_months, department_months = rebuild_rollups()
+        # Reports are served from the rollups, so invalidate their ETags
+        bump_version(ATTENDANCE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {employee_months} employee-month and {department_months} department-month rollups'
+        ))
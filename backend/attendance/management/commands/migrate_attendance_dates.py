@@ -0,0 +1,96 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from attendance import dates
+from hrms.db import get_attendance_collection, get_migrations_collection
+from hrms.versions import ATTENDANCE, bump_version
+
+SOURCE_TYPES = {dates.DATE: 'string', dates.STRING: 'date'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Convert attendance dates between ISO strings and native BSON dates in batches. '
+        'Progress is checkpointed, so an interrupted run resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--to', choices=[dates.DATE, dates.STRING], default=dates.DATE,
+                            help='Target storage (match ATTENDANCE_DATE_STORAGE)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between batches to limit load')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore the saved checkpoint and scan from the beginning')
+
+    def handle(self, *args, **options):
+        target = options['to']
+        collection = get_attendance_collection()
+        checkpoints = get_migrations_collection()
+        checkpoint_id = f'attendance_dates_to_{target}'
+
+        checkpoint = None if options['restart'] else checkpoints.find_one({'_id': checkpoint_id})
+        last_id = checkpoint.get('last_id') if checkpoint else None
+        converted = merged = 0
+        if last_id is not None:
+            converted, merged = checkpoint.get('converted', 0), checkpoint.get('merged', 0)
+            self.stdout.write(f'Resuming after _id {last_id} ({converted} converted so far)')
+
+        while True:
+            # Walk the _id index so each batch resumes where the last one ended
+            query = {'date': {'$type': SOURCE_TYPES[target]}}
+            if last_id is not None:
+                query['_id'] = {'$gt': last_id}
+            batch = list(collection.find(query, {'date': 1}).sort('_id', 1).limit(options['batch_size']))
+            if not batch:
+                break
+
+            operations = [
+                UpdateOne(
+                    {'_id': doc['_id'], 'date': doc['date']},
+                    {'$set': {'date': dates.to_storage(dates.iso(doc['date']), target)}}
+                )
+                for doc in batch
+            ]
+            try:
+                converted += collection.bulk_write(operations, ordered=False).modified_count
+            except BulkWriteError as e:
+                converted += e.details.get('nModified', 0)
+                # A record in the target type already exists for that employee
+                # and day (written after the storage switch); it wins
+                duplicates = [
+                    DeleteOne({'_id': batch[error['index']]['_id']})
+                    for error in e.details.get('writeErrors', []) if error.get('code') == 11000
+                ]
+                if len(duplicates) != len(e.details.get('writeErrors', [])):
+                    raise
+                merged += collection.bulk_write(duplicates, ordered=False).deleted_count
+
+            last_id = batch[-1]['_id']
+            checkpoints.update_one(
+                {'_id': checkpoint_id},
+                {'$set': {'last_id': last_id, 'converted': converted, 'merged': merged,
+                          'updated_at': datetime.utcnow()},
+                 '$unset': {'finished_at': ''}},
+                upsert=True
+            )
+            self.stdout.write(f'Converted {converted} records')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        checkpoints.update_one(
+            {'_id': checkpoint_id},
+            {'$set': {'finished_at': datetime.utcnow()}, '$unset': {'last_id': ''}},
+            upsert=True
+        )
+        bump_version(ATTENDANCE)
+        self.stdout.write(self.style.SUCCESS(f'Converted {converted} attendance dates to {target}'))
+        if merged:
+            self.stdout.write(self.style.WARNING(
+                f'Removed {merged} records duplicated by writes made during the migration; '
+                'run rebuild_counters and backfill_rollups'
+            ))
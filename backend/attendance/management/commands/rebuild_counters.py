@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from attendance.counters import rebuild_counters
+from hrms.versions import ATTENDANCE, bump_version
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard attendance counters from the raw collections'
+
+    def handle(self, *args, **options):
+        days, employees, department_days = rebuild_counters()
+        # The dashboard is served from the counters, so invalidate its ETag
+        bump_version(ATTENDANCE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt counters for {days} days, {employees} employees '
+            f'and {department_days} department days'
+        ))
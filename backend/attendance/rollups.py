@@ -0,0 +1,297 @@
+"""Monthly attendance rollups for reporting.
+
+* ``attendance_monthly_rollups``: one document per employee and month,
+  ``{_id: '<employee_id>:<YYYY-MM>', employee_id, month, department,
+  employee_name, employee_code, present, absent}``.
+* ``attendance_department_rollups``: one document per department and month,
+  ``{_id: '<department>:<YYYY-MM>', department, month, present, absent}``.
+
+Like the dashboard counters they are kept in step by the attendance write
+paths with ``$inc`` upserts, and ``rebuild_rollups`` (``manage.py
+backfill_rollups``) recomputes them from the raw attendance collection.
+"""
+from collections import defaultdict
+
+from pymongo import UpdateOne
+
+from hrms.db import (
+    get_employees_collection,
+    get_attendance_collection,
+    get_attendance_archive_collection,
+    get_monthly_rollups_collection,
+    get_department_rollups_collection,
+)
+from . import dates
+from .counters import STATUS_FIELDS, deleted_employee_ids
+
+
+WRITE_BATCH_SIZE = 1000
+
+
+def month_of(date):
+    """'YYYY-MM' for a 'YYYY-MM-DD' date"""
+    return date[:7]
+
+
+def _department_id(department, month):
+    return f'{department}:{month}'
+
+
+def _employee_month_id(employee_id, month):
+    return f'{employee_id}:{month}'
+
+
+def apply_changes(changes):
+    """Apply a batch of attendance writes to the rollups.
+
+    ``changes`` has the same shape as ``counters.apply_changes``:
+    ``(employee, date, old_status, new_status)`` tuples.
+    """
+    per_employee = {}
+    per_department = defaultdict(lambda: defaultdict(int))
+    for employee, date, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        month = month_of(date)
+        employee_id = str(employee['_id'])
+        department = employee.get('department', 'Unknown')
+        key = (employee_id, month)
+        entry = per_employee.setdefault(key, {'employee': employee, 'inc': defaultdict(int)})
+        if old_status:
+            entry['inc'][STATUS_FIELDS[old_status]] -= 1
+            per_department[(department, month)][STATUS_FIELDS[old_status]] -= 1
+        entry['inc'][STATUS_FIELDS[new_status]] += 1
+        per_department[(department, month)][STATUS_FIELDS[new_status]] += 1
+
+    if not per_employee:
+        return
+
+    get_monthly_rollups_collection().bulk_write(
+        [
+            UpdateOne(
+                {'_id': _employee_month_id(employee_id, month)},
+                {
+                    '$inc': dict(entry['inc']),
+                    '$set': {
+                        'employee_id': employee_id,
+                        'month': month,
+                        'department': entry['employee'].get('department', 'Unknown'),
+                        'employee_name': entry['employee'].get('full_name', 'Unknown'),
+                        'employee_code': entry['employee'].get('employee_id', 'Unknown'),
+                    }
+                },
+                upsert=True
+            )
+            for (employee_id, month), entry in per_employee.items()
+        ],
+        ordered=False
+    )
+    get_department_rollups_collection().bulk_write(
+        [
+            UpdateOne(
+                {'_id': _department_id(department, month)},
+                {'$inc': dict(inc), '$set': {'department': department, 'month': month}},
+                upsert=True
+            )
+            for (department, month), inc in per_department.items()
+        ],
+        ordered=False
+    )
+
+
+def remove_employee(employee_id):
+    """Take a deleted employee's months out of the department rollups"""
+    monthly_collection = get_monthly_rollups_collection()
+    months = list(monthly_collection.find({'employee_id': str(employee_id)}))
+    operations = [
+        UpdateOne(
+            {'_id': _department_id(doc['department'], doc['month'])},
+            {'$inc': {'present': -doc.get('present', 0), 'absent': -doc.get('absent', 0)}}
+        )
+        for doc in months
+    ]
+    if operations:
+        get_department_rollups_collection().bulk_write(operations, ordered=False)
+    monthly_collection.delete_many({'employee_id': str(employee_id)})
+
+
+def _counts(doc):
+    # $inc upserts only create the status fields they touched
+    return {'present': doc.get('present', 0), 'absent': doc.get('absent', 0)}
+
+
+def _department_matrix_query(from_month, to_month, department):
+    query = {'month': {'$gte': from_month, '$lte': to_month}}
+    if department:
+        query['department'] = department
+    return query
+
+
+def _department_rows(docs):
+    rows = defaultdict(dict)
+    for doc in docs:
+        rows[doc['department']][doc['month']] = _counts(doc)
+    return [
+        _matrix_row({'department': name}, months)
+        for name, months in sorted(rows.items())
+    ]
+
+
+def _employee_matrix_query(from_month, to_month, department):
+    return {'department': department, 'month': {'$gte': from_month, '$lte': to_month}}
+
+
+def _employee_rows(docs):
+    rows = {}
+    for doc in docs:
+        row = rows.setdefault(doc['employee_id'], {
+            'employee': {
+                'employee_id': doc['employee_id'],
+                'employee_name': doc.get('employee_name', 'Unknown'),
+                'employee_code': doc.get('employee_code', 'Unknown'),
+            },
+            'months': {}
+        })
+        row['months'][doc['month']] = _counts(doc)
+    return [
+        _matrix_row(row['employee'], row['months'])
+        for row in sorted(rows.values(), key=lambda r: r['employee']['employee_name'])
+    ]
+
+
+def department_matrix(from_month, to_month, department=None):
+    """Department x month present/absent matrix from the department rollups"""
+    query = _department_matrix_query(from_month, to_month, department)
+    return _department_rows(get_department_rollups_collection(secondary=True).find(query))
+
+
+def employee_matrix(from_month, to_month, department):
+    """Employee x month present/absent matrix for one department"""
+    query = _employee_matrix_query(from_month, to_month, department)
+    return _employee_rows(get_monthly_rollups_collection(secondary=True).find(query))
+
+
+async def adepartment_matrix(from_month, to_month, department=None):
+    """Async counterpart of department_matrix"""
+    from hrms.async_db import get_department_rollups_collection as get_async_collection
+
+    query = _department_matrix_query(from_month, to_month, department)
+    return _department_rows(await get_async_collection(secondary=True).find(query).to_list(length=None))
+
+
+async def aemployee_matrix(from_month, to_month, department):
+    """Async counterpart of employee_matrix"""
+    from hrms.async_db import get_monthly_rollups_collection as get_async_collection
+
+    query = _employee_matrix_query(from_month, to_month, department)
+    return _employee_rows(await get_async_collection(secondary=True).find(query).to_list(length=None))
+
+
+def _matrix_row(label, months):
+    return dict(
+        label,
+        months=months,
+        present=sum(m['present'] for m in months.values()),
+        absent=sum(m['absent'] for m in months.values()),
+    )
+
+
+def rebuild_rollups():
+    """Recompute both rollup collections from the attendance and archive collections.
+
+    Soft-deleted employees are left out, as after ``remove_employee``.
+
+    Returns (employee_months, department_months): documents written.
+    """
+    employees = {
+        str(emp['_id']): emp
+        for emp in get_employees_collection().find({}, {'full_name': 1, 'employee_id': 1, 'department': 1})
+    }
+    not_deleted = {'employee_id': {'$nin': deleted_employee_ids()}}
+    monthly_collection = get_monthly_rollups_collection()
+    department_collection = get_department_rollups_collection()
+    monthly_collection.delete_many({})
+    department_collection.delete_many({})
+
+    cursor = get_attendance_collection().aggregate([
+        {'$match': not_deleted},
+        {'$group': {
+            '_id': {'employee_id': '$employee_id', 'month': dates.month_expression()},
+            'present': {'$sum': {'$cond': [{'$eq': ['$status', 'Present']}, 1, 0]}},
+            'absent': {'$sum': {'$cond': [{'$eq': ['$status', 'Absent']}, 1, 0]}},
+        }}
+    ], allowDiskUse=True)
+
+    departments = defaultdict(lambda: {'present': 0, 'absent': 0})
+    batch = []
+    written = 0
+    for doc in cursor:
+        employee_id = doc['_id']['employee_id']
+        month = doc['_id']['month']
+        employee = employees.get(employee_id, {})
+        department = employee.get('department', 'Unknown')
+        batch.append({
+            '_id': _employee_month_id(employee_id, month),
+            'employee_id': employee_id,
+            'month': month,
+            'department': department,
+            'employee_name': employee.get('full_name', 'Unknown'),
+            'employee_code': employee.get('employee_id', 'Unknown'),
+            'present': doc['present'],
+            'absent': doc['absent'],
+        })
+        departments[(department, month)]['present'] += doc['present']
+        departments[(department, month)]['absent'] += doc['absent']
+        if len(batch) >= WRITE_BATCH_SIZE:
+            monthly_collection.insert_many(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        monthly_collection.insert_many(batch, ordered=False)
+        written += len(batch)
+
+    # Archived months still count towards the reports
+    archived = get_attendance_archive_collection().aggregate([
+        {'$match': not_deleted},
+        {'$group': {
+            '_id': {'employee_id': '$employee_id', 'month': '$month'},
+            'present': {'$sum': '$present'},
+            'absent': {'$sum': '$absent'},
+        }}
+    ], allowDiskUse=True)
+    operations = []
+    for doc in archived:
+        employee_id = doc['_id']['employee_id']
+        month = doc['_id']['month']
+        employee = employees.get(employee_id, {})
+        department = employee.get('department', 'Unknown')
+        operations.append(UpdateOne(
+            {'_id': _employee_month_id(employee_id, month)},
+            {
+                '$inc': {'present': doc['present'], 'absent': doc['absent']},
+                '$set': {
+                    'employee_id': employee_id,
+                    'month': month,
+                    'department': department,
+                    'employee_name': employee.get('full_name', 'Unknown'),
+                    'employee_code': employee.get('employee_id', 'Unknown'),
+                }
+            },
+            upsert=True
+        ))
+        departments[(department, month)]['present'] += doc['present']
+        departments[(department, month)]['absent'] += doc['absent']
+        if len(operations) >= WRITE_BATCH_SIZE:
+            written += monthly_collection.bulk_write(operations, ordered=False).upserted_count
+            operations = []
+    if operations:
+        written += monthly_collection.bulk_write(operations, ordered=False).upserted_count
+
+    department_docs = [
+        dict(totals, _id=_department_id(department, month), department=department, month=month)
+        for (department, month), totals in departments.items()
+    ]
+    if department_docs:
+        department_collection.insert_many(department_docs, ordered=False)
+
+    return written, len(department_docs)
@@ -1,6 +1,8 @@
 from datetime import datetime, date
 from rest_framework import serializers
 
+from . import archive
+
 
 class AttendanceSerializer(serializers.Serializer):
     """Serializer for Attendance model"""
@@ -27,6 +29,11 @@ class AttendanceSerializer(serializers.Serializer):
         return value
 
 
+class AttendanceBulkOptionsSerializer(serializers.Serializer):
+    """Options of a bulk attendance request; accepts "false"/"0" as well as JSON booleans"""
+    upsert = serializers.BooleanField(default=False)
+
+
 class AttendanceCreateSerializer(serializers.Serializer):
     """Serializer for creating attendance"""
     employee_id = serializers.CharField()
@@ -34,7 +41,10 @@ class AttendanceCreateSerializer(serializers.Serializer):
     status = serializers.ChoiceField(choices=['Present', 'Absent'])
 
     def validate_date(self, value):
-        """Validate date is not in future"""
+        """Validate date is not in future and not already archived"""
         if value > date.today():
             raise serializers.ValidationError('Cannot mark attendance for future dates')
+        cutoff = archive.archived_before()
+        if cutoff and value.isoformat() < cutoff:
+            raise serializers.ValidationError(f'Attendance before {cutoff} is archived and cannot be changed')
         return value
@@ -1,3 +1,808 @@
-from django.test import TestCase
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from unittest import mock
 
-# Create your tests here.
+from bson import ObjectId
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, override_settings
+
+from employees import purge
+from hrms import db, warmup
+from hrms.cache import get_employee, invalidate_employee
+from hrms.response_cache import SingleFlightCache
+from hrms.testing import MongoTestCase, RealMongoTestCase, mongomock
+from . import archive, counters, dates, rollups, views
+
+CONCURRENT_REQUESTS = 20
+
+
+def seed_employees(db, count, department='Engineering'):
+    """Insert `count` employees and return their ids as strings"""
+    result = db.employees.insert_many([
+        {
+            'employee_id': f'EMP{n:04d}',
+            'full_name': f'Employee {n}',
+            'email': f'employee{n}@example.com',
+            'department': department,
+            'created_at': datetime(2024, 1, 1),
+            'updated_at': datetime(2024, 1, 1),
+        }
+        for n in range(count)
+    ])
+    return [str(object_id) for object_id in result.inserted_ids]
+
+
+class DateStorageTests(SimpleTestCase):
+    """Conversions and range predicates for both attendance date storages"""
+
+    def native(self):
+        return mock.patch.object(dates, 'STORAGE', dates.DATE)
+
+    def test_to_storage(self):
+        self.assertEqual(dates.to_storage('2024-03-01', dates.STRING), '2024-03-01')
+        self.assertEqual(dates.to_storage(date(2024, 3, 1), dates.STRING), '2024-03-01')
+        self.assertEqual(dates.to_storage('2024-03-01', dates.DATE), datetime(2024, 3, 1))
+        self.assertEqual(dates.to_storage(date(2024, 3, 1), dates.DATE), datetime(2024, 3, 1))
+        for storage in (dates.STRING, dates.DATE):
+            self.assertEqual(dates.iso(dates.to_storage('2024-02-29', storage)), '2024-02-29')
+
+    def test_string_range_is_inclusive(self):
+        self.assertEqual(dates.range_predicate('2024-03-01', '2024-03-31'),
+                         {'$gte': '2024-03-01', '$lte': '2024-03-31'})
+        self.assertEqual(dates.range_predicate(date_to='2024-03-31'), {'$lte': '2024-03-31'})
+        self.assertIsNone(dates.range_predicate())
+
+    def test_native_range_ends_before_the_next_midnight(self):
+        with self.native():
+            self.assertEqual(dates.range_predicate('2024-03-01', '2024-03-31'),
+                             {'$gte': datetime(2024, 3, 1), '$lt': datetime(2024, 4, 1)})
+            self.assertEqual(dates.range_predicate(date_to='2024-12-31'), {'$lt': datetime(2025, 1, 1)})
+            self.assertEqual(dates.range_predicate(date_from='2024-03-01'), {'$gte': datetime(2024, 3, 1)})
+            self.assertIsNone(dates.range_predicate())
+
+    def test_month_and_quarter_bounds(self):
+        self.assertEqual(dates.month_bounds('2024-02'), ('2024-02-01', '2024-02-29'))
+        self.assertEqual(dates.month_bounds('2024-12'), ('2024-12-01', '2024-12-31'))
+        self.assertEqual(dates.quarter_bounds(2024, 4), ('2024-10-01', '2024-12-31'))
+
+
+class SingleFlightCacheTests(SimpleTestCase):
+    """Stampede protection of the dashboard response cache"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        response_cache = SingleFlightCache('test', ttl=5)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'total': 1}
+
+        with ThreadPoolExecutor(CONCURRENT_REQUESTS) as pool:
+            results = list(pool.map(
+                lambda _: response_cache.get_or_compute('2024-01-01', compute), range(CONCURRENT_REQUESTS)
+            ))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'total': 1}] * CONCURRENT_REQUESTS)
+        stats = response_cache.stats()
+        self.assertEqual(stats['computes'], 1)
+        self.assertEqual(stats['hits'] + stats['waits'], CONCURRENT_REQUESTS - 1)
+
+    def test_expired_entry_serves_stale_while_one_caller_recomputes(self):
+        response_cache = SingleFlightCache('test', ttl=0.05, stale_ttl=60)
+        response_cache.get_or_compute('2024-01-01', lambda: 'old')
+        time.sleep(0.1)
+
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 'new'
+
+        with ThreadPoolExecutor(CONCURRENT_REQUESTS) as pool:
+            futures = [
+                pool.submit(response_cache.get_or_compute, '2024-01-01', compute)
+                for _ in range(CONCURRENT_REQUESTS)
+            ]
+            # Everyone but the recomputing caller gets the stale value at once
+            time.sleep(0.2)
+            done = [f for f in futures if f.done()]
+            self.assertEqual(len(done), CONCURRENT_REQUESTS - 1)
+            self.assertTrue(all(f.result() == 'old' for f in done))
+            release.set()
+            results = [f.result(timeout=5) for f in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results.count('new'), 1)
+        self.assertEqual(response_cache.get_or_compute('2024-01-01', compute), 'new')
+
+    def test_new_key_after_write_is_recomputed(self):
+        response_cache = SingleFlightCache('test', ttl=5)
+        response_cache.get_or_compute('2024-01-01:attendance:1', lambda: 'before')
+        value = response_cache.get_or_compute('2024-01-01:attendance:2', lambda: 'after')
+        self.assertEqual(value, 'after')
+
+
+class DashboardCacheTests(SimpleTestCase):
+    """Concurrent dashboard requests hit MongoDB once"""
+
+    def setUp(self):
+        cache.clear()
+        versions = {'employees': {'version': 3}, 'attendance': {'version': 7}}
+        patcher = mock.patch('hrms.versions.get_versions', return_value=versions)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_requests_share_one_computation(self):
+        calls = []
+
+        def compute_dashboard(today):
+            calls.append(today)
+            time.sleep(0.2)
+            return views.dashboard_payload(10, today, 6, 2, [])
+
+        def fetch(_):
+            return Client().get('/api/attendance/dashboard/')
+
+        with mock.patch.object(views, 'compute_dashboard', compute_dashboard):
+            with ThreadPoolExecutor(CONCURRENT_REQUESTS) as pool:
+                responses = list(pool.map(fetch, range(CONCURRENT_REQUESTS)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({r.status_code for r in responses}, {200})
+        self.assertEqual({r.json()['data']['today']['not_marked'] for r in responses}, {2})
+
+
+class MetricsEndpointTests(SimpleTestCase):
+    """/metrics is gated and reports the cache statistics as counters"""
+
+    def test_hidden_without_token_outside_debug(self):
+        with self.settings(METRICS_TOKEN='', DEBUG=False):
+            self.assertEqual(Client().get('/metrics').status_code, 404)
+
+    def test_token_is_required_when_configured(self):
+        with self.settings(METRICS_TOKEN='s3cret', DEBUG=True):
+            self.assertEqual(Client().get('/metrics').status_code, 404)
+            self.assertEqual(Client().get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 404)
+            response = Client().get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_statistics_are_counters(self):
+        with self.settings(METRICS_TOKEN='', DEBUG=True):
+            body = Client().get('/metrics').content.decode()
+        for name in ('hrms_employee_cache_hits_total', 'hrms_employee_cache_misses_total',
+                     'hrms_dashboard_cache_hits_total', 'hrms_dashboard_cache_stale_hits_total'):
+            self.assertIn(f'# TYPE {name} counter\n', body)
+        self.assertIn('# TYPE hrms_employee_cache_size gauge\n', body)
+        self.assertNotIn('hrms_employee_cache_hits ', body)
+
+
+class LifespanTests(SimpleTestCase):
+    """The ASGI wrapper completes lifespan events and warms Motor at startup"""
+
+    def run_lifespan(self, connect):
+        messages = iter([{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        with mock.patch.object(warmup, 'ENABLED', True), mock.patch.object(warmup, '_done', set()), \
+                mock.patch.object(warmup, 'aconnect_mongo', connect):
+            asyncio.run(warmup.lifespan(None)({'type': 'lifespan'}, receive, send))
+        return sent
+
+    def test_startup_connects_motor_when_serving_async_views(self):
+        connect = mock.AsyncMock()
+        with self.settings(ASYNC_API=True):
+            sent = self.run_lifespan(connect)
+        connect.assert_awaited_once()
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+    def test_failed_warm_up_still_completes_startup(self):
+        connect = mock.AsyncMock(side_effect=OSError('no server'))
+        with self.settings(ASYNC_API=True), self.assertLogs('hrms.warmup', 'WARNING'):
+            sent = self.run_lifespan(connect)
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+    def test_http_scopes_go_to_the_application(self):
+        application = mock.AsyncMock()
+        scope = {'type': 'http'}
+        asyncio.run(warmup.lifespan(application)(scope, None, None))
+        application.assert_awaited_once_with(scope, None, None)
+
+
+class AttendanceListTests(MongoTestCase):
+    """GET /api/attendance/ pages by (date, _id) and joins employee fields"""
+
+    def setUp(self):
+        super().setUp()
+        self.employees = seed_employees(self.db, 3)
+        self.db.attendance.insert_many([
+            {'employee_id': employee, 'date': day, 'status': 'Present'}
+            for day in ('2024-03-01', '2024-03-02', '2024-03-03')
+            for employee in self.employees
+        ])
+
+    def walk(self, **params):
+        client = Client()
+        seen, after = [], None
+        while True:
+            response = client.get('/api/attendance/', dict(params, after=after) if after else params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            seen += body['data']
+            after = body['pagination']['next_cursor']
+            if not after:
+                return seen
+
+    def test_pages_split_same_day_records_by_id(self):
+        seen = self.walk(limit=2)
+        expected = [str(doc['_id']) for doc in self.db.attendance.find().sort([('date', -1), ('_id', -1)])]
+        self.assertEqual([record['id'] for record in seen], expected)
+
+    def test_records_carry_employee_name_and_code(self):
+        record = self.walk(limit=1, date='2024-03-01', employee_id=self.employees[0])[0]
+        self.assertEqual((record['employee_code'], record['employee_name']), ('EMP0000', 'Employee 0'))
+
+    def test_date_range_is_inclusive(self):
+        seen = self.walk(limit=4, date_from='2024-03-02', date_to='2024-03-03')
+        self.assertEqual({record['date'] for record in seen}, {'2024-03-02', '2024-03-03'})
+        self.assertEqual(len(seen), 6)
+
+    def test_records_of_deleted_employees_are_hidden(self):
+        self.db.employees.update_one({'_id': ObjectId(self.employees[0])}, {'$set': {'deleted_at': 1}})
+        seen = self.walk(limit=50)
+        self.assertNotIn(self.employees[0], {record['employee_id'] for record in seen})
+
+    def test_bad_date_is_a_400(self):
+        response = Client().get('/api/attendance/', {'date_from': '03/01/2024'})
+        self.assertEqual(response.status_code, 400)
+
+
+class NativeDateRangeTests(MongoTestCase):
+    """Range predicates select the same days from native BSON dates"""
+
+    def test_records_with_a_time_part_count_on_their_day(self):
+        with mock.patch.object(dates, 'STORAGE', dates.DATE):
+            self.db.attendance.insert_many([
+                {'employee_id': 'e', 'date': value, 'status': 'Present'}
+                for value in (datetime(2024, 2, 29), datetime(2024, 3, 1), datetime(2024, 3, 31, 15, 30),
+                              datetime(2024, 4, 1))
+            ])
+            found = self.db.attendance.find({'date': dates.range_predicate('2024-03-01', '2024-03-31')})
+            self.assertEqual(sorted(dates.iso(doc['date']) for doc in found), ['2024-03-01', '2024-03-31'])
+
+
+class DeletedEmployeeWriteTests(MongoTestCase):
+    """Writes are refused for an employee another worker soft-deleted"""
+
+    def setUp(self):
+        super().setUp()
+        self.employee = seed_employees(self.db, 1)[0]
+        # This worker cached the employee before it was deleted elsewhere
+        self.assertIsNotNone(get_employee(self.employee))
+        self.db.employees.update_one({'_id': ObjectId(self.employee)}, {'$set': {'deleted_at': datetime(2024, 1, 1)}})
+
+    def test_create_is_rejected(self):
+        response = Client().post('/api/attendance/', {
+            'employee_id': self.employee, 'date': '2024-03-01', 'status': 'Present'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.db.attendance.count_documents({}), 0)
+
+    def test_put_is_rejected_once_the_cache_entry_is_gone(self):
+        # PUT trusts this worker's cache; the purge job clears what it lets through
+        invalidate_employee(self.employee)
+        response = Client().put(
+            f'/api/attendance/employee/{self.employee}/2024-03-01/', {'status': 'Present'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.db.attendance.count_documents({}), 0)
+
+    def test_bulk_rows_are_rejected(self):
+        response = Client().post('/api/attendance/bulk/', {'records': [
+            {'employee_id': self.employee, 'date': '2024-03-01', 'status': 'Present'}
+        ]}, content_type='application/json')
+        self.assertEqual(response.json()['data']['results'][0]['status'], 'error')
+        self.assertEqual(self.db.attendance.count_documents({}), 0)
+
+
+class BulkAttendanceTests(MongoTestCase):
+    """Outcomes of POST /api/attendance/bulk/ and the counters they leave"""
+
+    def setUp(self):
+        super().setUp()
+        self.employees = seed_employees(self.db, 3)
+
+    def post(self, records, **options):
+        response = Client().post('/api/attendance/bulk/', dict(options, records=records),
+                                 content_type='application/json')
+        return response
+
+    def statuses(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [result['status'] for result in response.json()['data']['results']]
+
+    def record(self, n, day='2024-03-01', status='Present'):
+        return {'employee_id': self.employees[n], 'date': day, 'status': status}
+
+    def daily(self, day='2024-03-01'):
+        return counters.get_daily_counts(day)
+
+    def test_insert_mode_reports_created_duplicates_and_errors(self):
+        self.post([self.record(0)])
+        response = self.post([
+            self.record(0), self.record(1), self.record(1),
+            {'employee_id': '0' * 24, 'date': '2024-03-01', 'status': 'Present'},
+        ])
+        self.assertEqual(self.statuses(response), ['duplicate', 'created', 'duplicate', 'error'])
+        self.assertEqual(self.daily(), (2, 0))
+
+    def test_upsert_mode_creates_and_updates(self):
+        self.post([self.record(0), self.record(1)])
+        # The new record goes first: mongomock numbers upserted ops by their
+        # count rather than their position in the batch
+        response = self.post([self.record(2, status='Absent'), self.record(1, status='Absent')], upsert=True)
+        self.assertEqual(self.statuses(response), ['created', 'updated'])
+        results = response.json()['data']['results']
+        stored = {str(doc['_id']) for doc in self.db.attendance.find()}
+        self.assertTrue(all(result['id'] in stored for result in results))
+        self.assertEqual(self.daily(), (1, 2))
+        self.assertEqual(self.db.attendance.count_documents({}), 3)
+
+    def test_upsert_mode_reports_unchanged_records(self):
+        # Kept apart from upserts for the same mongomock numbering reason
+        created = self.post([self.record(0)]).json()['data']['results'][0]
+        response = self.post([self.record(0)], upsert=True)
+        self.assertEqual(self.statuses(response), ['unchanged'])
+        self.assertEqual(response.json()['data']['results'][0]['id'], created['id'])
+        self.assertEqual(self.daily(), (1, 0))
+
+    def test_upsert_string_false_does_not_overwrite(self):
+        self.post([self.record(0)])
+        response = self.post([self.record(0, status='Absent')], upsert='false')
+        self.assertEqual(self.statuses(response), ['duplicate'])
+        self.assertEqual(self.db.attendance.find_one()['status'], 'Present')
+
+    def test_upsert_string_true_overwrites(self):
+        self.post([self.record(0)])
+        response = self.post([self.record(0, status='Absent')], upsert='true')
+        self.assertEqual(self.statuses(response), ['updated'])
+        self.assertEqual(self.daily(), (0, 1))
+
+    def test_invalid_upsert_value_is_a_400(self):
+        response = self.post([self.record(0)], upsert='sometimes')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('upsert', response.json()['errors'])
+
+    def test_record_created_concurrently_is_classified_as_updated(self):
+        # Another request inserted the record the batch is about to upsert
+        other = self.post([self.record(0, status='Absent')])
+        self.assertEqual(self.statuses(other), ['created'])
+        response = self.post([self.record(0)], upsert=True)
+        self.assertEqual(self.statuses(response), ['updated'])
+        self.assertEqual(self.daily(), (1, 0))
+
+
+class IdempotentPutTests(MongoTestCase):
+    """PUT /api/attendance/employee/<id>/<day>/ retried with an Idempotency-Key"""
+
+    def setUp(self):
+        super().setUp()
+        self.employee = seed_employees(self.db, 1)[0]
+
+    def put(self, status='Present', key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key is not None else {}
+        return Client().put(f'/api/attendance/employee/{self.employee}/2024-03-01/', {'status': status},
+                            content_type='application/json', **headers)
+
+    def test_retried_create_is_replayed_as_201(self):
+        first = self.put(key='create-1')
+        retry = self.put(key='create-1')
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertFalse(first.has_header('Idempotent-Replayed'))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json()['data']['id'], first.json()['data']['id'])
+        self.assertEqual(self.db.attendance.count_documents({}), 1)
+        self.assertEqual(counters.get_daily_counts('2024-03-01'), (1, 0))
+
+    def test_retried_update_is_replayed_as_200(self):
+        self.put(key='create-1')
+        update = self.put('Absent', key='update-1')
+        retry = self.put('Absent', key='update-1')
+        self.assertEqual((update.status_code, retry.status_code), (200, 200))
+        self.assertFalse(update.has_header('Idempotent-Replayed'))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(counters.get_daily_counts('2024-03-01'), (0, 1))
+
+    def test_new_key_or_no_key_is_not_a_replay(self):
+        self.put(key='create-1')
+        for response in (self.put(key='other'), self.put(), self.put()):
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(counters.get_daily_counts('2024-03-01'), (1, 0))
+
+    def test_oversized_key_is_a_400(self):
+        response = self.put(key='k' * (views.IDEMPOTENCY_KEY_MAX_LENGTH + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.db.attendance.count_documents({}), 0)
+
+
+class MonthlyReportTests(MongoTestCase):
+    """GET /api/attendance/reports/monthly/ reads the rollups"""
+
+    def setUp(self):
+        super().setUp()
+        self.employees = seed_employees(self.db, 2)
+        Client().post('/api/attendance/bulk/', {'records': [
+            {'employee_id': self.employees[0], 'date': '2024-03-01', 'status': 'Present'},
+            {'employee_id': self.employees[1], 'date': '2024-03-01', 'status': 'Absent'},
+            {'employee_id': self.employees[0], 'date': '2024-04-01', 'status': 'Present'},
+        ]}, content_type='application/json')
+
+    def report(self, **params):
+        params = dict({'from_month': '2024-01', 'to_month': '2024-12'}, **params)
+        return Client().get('/api/attendance/reports/monthly/', params)
+
+    def test_department_matrix(self):
+        rows = self.report().json()['data']['rows']
+        self.assertEqual([(row['department'], row['present'], row['absent']) for row in rows],
+                         [('Engineering', 2, 1)])
+        self.assertEqual(rows[0]['months']['2024-03'], {'present': 1, 'absent': 1})
+
+    def test_employee_matrix(self):
+        rows = self.report(by='employee', department='Engineering').json()['data']['rows']
+        self.assertEqual([(row['employee_name'], row['present'], row['absent']) for row in rows],
+                         [('Employee 0', 2, 0), ('Employee 1', 0, 1)])
+
+    def test_invalid_params_are_a_400(self):
+        for params in ({'from_month': '2024-13'}, {'by': 'employee'}, {'by': 'team'}):
+            with self.assertRaises(views.InvalidQueryParam):
+                views.report_params(params)
+            self.assertEqual(self.report(**params).status_code, 400)
+
+
+@override_settings(EMPLOYEE_PURGE_IN_PROCESS=False)
+@mock.patch.object(purge, 'SETTLE_SECONDS', 0)
+class DeletedEmployeeRebuildTests(MongoTestCase):
+    """Rebuilding the counters and rollups does not bring back a deleted employee"""
+
+    def setUp(self):
+        super().setUp()
+        # mongomock has no $substrCP for the string storage's day expression
+        patcher = mock.patch.object(dates, 'STORAGE', dates.DATE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(archive, 'CUTOFF_TTL', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.kept, self.deleted = seed_employees(self.db, 2)
+        Client().post('/api/attendance/bulk/', {'records': [
+            {'employee_id': employee, 'date': day, 'status': 'Present'}
+            for employee in (self.kept, self.deleted)
+            for day in ('2024-03-01', '2024-05-01')
+        ]}, content_type='application/json')
+        # March goes to the archive so both sources are rebuilt from
+        archive.archive_before('2024-04-01')
+        self.assertEqual(Client().delete(f'/api/employees/{self.deleted}/').status_code, 202)
+
+    def employee_ids(self, collection):
+        return {doc.get('employee_id', doc['_id']) for doc in collection.find()}
+
+    def department_present(self):
+        return {doc['month']: doc['present'] for doc in self.db.attendance_department_rollups.find()}
+
+    def test_rebuild_leaves_deleted_employee_out(self):
+        counters.rebuild_counters()
+        rollups.rebuild_rollups()
+        self.assertEqual(self.employee_ids(self.db.attendance_employee_counters), {self.kept})
+        self.assertEqual(self.employee_ids(self.db.attendance_monthly_rollups), {self.kept})
+        self.assertEqual(self.department_present(), {'2024-03': 1, '2024-05': 1})
+        # Unpurged records stay in the daily counters; the purge subtracts them
+        self.assertEqual(counters.get_daily_counts('2024-05-01'), (2, 0))
+
+        purge.run_pending_jobs()
+        self.assertEqual(counters.get_daily_counts('2024-03-01'), (1, 0))
+        self.assertEqual(counters.get_daily_counts('2024-05-01'), (1, 0))
+        self.assertEqual(self.department_present(), {'2024-03': 1, '2024-05': 1})
+
+    def test_purge_removes_totals_added_back_after_the_delete(self):
+        employee = self.db.employees.find_one({'_id': ObjectId(self.deleted)})
+        changes = [(employee, '2024-06-01', None, 'Present')]
+        counters.apply_changes(changes)
+        rollups.apply_changes(changes)
+
+        purge.run_pending_jobs()
+        self.assertEqual(self.employee_ids(self.db.attendance_employee_counters), {self.kept})
+        self.assertEqual(self.employee_ids(self.db.attendance_monthly_rollups), {self.kept})
+        self.assertEqual(self.department_present().get('2024-06'), 0)
+
+
+class DataMigrationTests(MongoTestCase):
+    """apply_data_migrations backfills an existing database once"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(dates, 'STORAGE', dates.DATE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Written directly, as by a version that kept no counters or terms
+        employee_id = seed_employees(self.db, 1)[0]
+        self.db.attendance.insert_one({
+            'employee_id': employee_id, 'date': dates.to_storage('2024-03-01'), 'status': 'Present',
+        })
+
+    def migrate(self, *args):
+        call_command('apply_data_migrations', *args, stdout=io.StringIO())
+
+    def test_backfills_run_once(self):
+        self.migrate()
+        self.assertEqual(counters.get_daily_counts('2024-03-01'), (1, 0))
+        self.assertEqual(self.db.attendance_monthly_rollups.count_documents({}), 1)
+        self.assertIn('employee', self.db.employees.find_one()['search_terms'])
+        self.assertEqual(self.db.data_migrations.count_documents({'finished_at': {'$exists': True}}), 3)
+
+        self.db.attendance_daily_counters.delete_many({})
+        self.migrate()
+        self.assertEqual(self.db.attendance_daily_counters.count_documents({}), 0)
+        self.migrate('--rerun', 'counters')
+        self.assertEqual(counters.get_daily_counts('2024-03-01'), (1, 0))
+
+    def test_failed_backfill_is_retried(self):
+        with mock.patch('attendance.management.commands.backfill_rollups.rebuild_rollups',
+                        side_effect=RuntimeError('interrupted')):
+            with self.assertRaises(RuntimeError):
+                self.migrate()
+        self.assertEqual({doc['_id'] for doc in self.db.data_migrations.find()}, {'backfill_counters'})
+        self.migrate()
+        self.assertEqual(self.db.attendance_monthly_rollups.count_documents({}), 1)
+
+
+def hot_facet(statuses):
+    """The totals and streaks facets employee_history_pipeline returns for statuses"""
+    runs = {}
+    absents = 0
+    for status in statuses:
+        if status == 'Absent':
+            absents += 1
+        else:
+            runs[absents] = runs.get(absents, 0) + 1
+    streaks = []
+    if runs:
+        first, last = min(runs), max(runs)
+        streaks = [{'longest': max(runs.values()), 'first_run': first, 'first_length': runs[first],
+                    'last_run': last, 'last_length': runs[last]}]
+    totals = [{'total': len(statuses), 'present': len(statuses) - absents, 'absent': absents}] if statuses else []
+    return {'records': [], 'totals': totals, 'monthly': [], 'streaks': streaks}
+
+
+class EmployeeHistoryPipelineTests(RealMongoTestCase):
+    """employee_history_pipeline on a real mongod, checked against hot_facet"""
+
+    DAYS = ['2024-03-01', '2024-03-04', '2024-03-05', '2024-03-06', '2024-03-08',
+            '2024-03-11', '2024-03-12', '2024-04-01', '2024-04-02']
+    STATUSES = ['Present', 'Present', 'Absent', 'Present', 'Present',
+                'Present', 'Present', 'Absent', 'Present']
+
+    def setUp(self):
+        super().setUp()
+        self.employee_id = seed_employees(self.db, 1)[0]
+
+    def insert(self):
+        self.db.attendance.delete_many({})
+        self.db.attendance.insert_many([
+            {'employee_id': self.employee_id, 'date': dates.to_storage(day), 'status': status}
+            for day, status in zip(self.DAYS, self.STATUSES)
+        ])
+
+    def test_facets_match_the_reference_in_both_storages(self):
+        expected = hot_facet(self.STATUSES)
+        for storage in (dates.STRING, dates.DATE):
+            with self.subTest(storage=storage), mock.patch.object(dates, 'STORAGE', storage):
+                self.insert()
+                pipeline = views.employee_history_pipeline(self.employee_id, None, None, 3)
+                facet = next(self.db.attendance.aggregate(pipeline))
+
+                self.assertEqual(facet['streaks'], [dict(expected['streaks'][0], _id=None)])
+                self.assertEqual(facet['totals'], [dict(expected['totals'][0], _id=None)])
+                self.assertEqual(facet['monthly'], [
+                    {'_id': '2024-04', 'present': 1, 'absent': 1},
+                    {'_id': '2024-03', 'present': 6, 'absent': 1},
+                ])
+                self.assertEqual([dates.iso(r['date']) for r in facet['records']],
+                                 ['2024-04-02', '2024-04-01', '2024-03-12'])
+
+    def test_history_endpoint_reports_the_streaks(self):
+        self.insert()
+        stats = Client().get(f'/api/attendance/employee/{self.employee_id}/').json()['data']['stats']
+        self.assertEqual((stats['longest_present_streak'], stats['current_present_streak']), (4, 1))
+        self.assertEqual((stats['present_days'], stats['absent_days']), (7, 2))
+
+
+@mock.patch.object(archive, 'CUTOFF_TTL', 0)
+class ArchiveTests(MongoTestCase):
+    """Archive buckets are one per employee and month, whatever the batching"""
+
+    def insert(self, employee_id, days, status='Present'):
+        self.db.attendance.insert_many([
+            {'employee_id': employee_id, 'date': dates.to_storage(day), 'status': status,
+             'created_at': datetime(2024, 1, 1)}
+            for day in days
+        ])
+
+    def archived(self):
+        return {bucket['_id']: [row['date'] for row in archive.decompress(bucket)]
+                for bucket in self.db.attendance_archive.find()}
+
+    def test_rerun_with_another_batch_size_does_not_duplicate(self):
+        february = [f'2024-02-{day:02d}' for day in range(1, 11)]
+        self.insert('a', february)
+        self.insert('b', february[:3] + ['2024-03-01'])
+        archive.archive_before('2024-04-01', batch_size=3)
+        expected = {'a:2024-02': february, 'b:2024-02': february[:3], 'b:2024-03': ['2024-03-01']}
+        self.assertEqual(self.archived(), expected)
+
+        # A run interrupted after writing its buckets leaves the records hot
+        self.insert('a', february[:4])
+        archive.archive_before('2024-04-01', batch_size=7)
+        self.assertEqual(self.archived(), expected)
+        self.assertEqual(self.db.attendance_archive.find_one({'_id': 'a:2024-02'})['count'], 10)
+        self.assertEqual(self.db.attendance.count_documents({}), 0)
+
+    def test_legacy_buckets_are_folded_in(self):
+        self.insert('a', ['2024-02-01', '2024-02-02'])
+        archive.archive_before('2024-04-01')
+        legacy = self.db.attendance_archive.find_one_and_delete({'_id': 'a:2024-02'})
+        self.db.attendance_archive.insert_one(dict(legacy, _id=ObjectId()))
+
+        self.insert('a', ['2024-02-03'], status='Absent')
+        archive.archive_before('2024-04-01')
+        self.assertEqual(self.archived(), {'a:2024-02': ['2024-02-01', '2024-02-02', '2024-02-03']})
+        bucket = self.db.attendance_archive.find_one()
+        self.assertEqual((bucket['present'], bucket['absent']), (2, 1))
+
+    def test_streaks_combine_across_the_archive_boundary(self):
+        P, A = 'Present', 'Absent'
+        days = [f'2024-02-{day:02d}' for day in range(1, 15)] + [f'2024-03-{day:02d}' for day in range(1, 15)]
+        for statuses in (
+            [P] * 28,
+            [P, P, A] + [P] * 20 + [A, P, P, P, P],
+            [A] * 14 + [P] * 14,
+            [P] * 13 + [A, A] + [P] * 13,
+        ):
+            with self.subTest(statuses=statuses):
+                self.db.attendance.delete_many({})
+                self.db.attendance_archive.delete_many({})
+                # February and the first days of March go to the archive
+                archived, hot = statuses[:18], statuses[18:]
+                for day, status in zip(days, archived):
+                    self.insert('a', [day], status)
+                archive.archive_before('2024-03-05', batch_size=5)
+
+                stats = views.employee_history_payload(
+                    {'_id': 'a'}, hot_facet(hot), None, None, 100, archive.summaries('a')
+                )['stats']
+                expected = archive.streak_summary(statuses)
+                self.assertEqual(stats['longest_present_streak'], expected['longest'])
+                self.assertEqual(stats['current_present_streak'], expected['tail'])
+                self.assertEqual(stats['total_days'], len(statuses))
+
+    def test_streak_summaries_combine_at_any_split(self):
+        P, A = 'Present', 'Absent'
+        statuses = [P, P, A, P, P, P, A, A, P, P]
+        whole = archive.streak_summary(statuses)
+        for split in range(len(statuses) + 1):
+            combined = archive.combine_streaks(
+                archive.streak_summary(statuses[:split]), archive.streak_summary(statuses[split:])
+            )
+            self.assertEqual(combined, whole, split)
+
+
+@mock.patch.object(archive, 'CUTOFF_TTL', 0)
+class ArchivedDateWriteTests(MongoTestCase):
+    """Writes dated before the cutoff archive_before recorded are rejected"""
+
+    def setUp(self):
+        super().setUp()
+        self.employee = seed_employees(self.db, 1)[0]
+
+    def put(self, day):
+        return Client().put(f'/api/attendance/employee/{self.employee}/{day}/',
+                            {'status': 'Present'}, content_type='application/json')
+
+    def test_old_dates_are_writable_until_archived(self):
+        self.assertEqual(self.put('2020-03-31').status_code, 201)
+        self.assertIsNone(archive.archived_before())
+
+    def test_create_and_put_are_rejected(self):
+        archive.archive_before('2024-04-01')
+        response = Client().post('/api/attendance/', {
+            'employee_id': self.employee, 'date': '2024-03-31', 'status': 'Present'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date', response.json()['errors'])
+
+        self.assertEqual(self.put('2024-03-31').status_code, 400)
+        self.assertEqual(self.db.attendance.count_documents({}), 0)
+
+    def test_bulk_rows_are_rejected(self):
+        archive.archive_before('2024-04-01')
+        response = Client().post('/api/attendance/bulk/', {'records': [
+            {'employee_id': self.employee, 'date': '2024-03-31', 'status': 'Present'},
+            {'employee_id': self.employee, 'date': '2024-04-01', 'status': 'Present'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']['records']
+        self.assertIn('date', errors[0])
+        self.assertEqual(errors[1], {})
+        self.assertEqual(self.db.attendance.count_documents({}), 0)
+
+    def test_rerun_with_an_earlier_cutoff_keeps_the_later_one(self):
+        # e.g. archive_attendance --months with more months than the last run
+        call_command('archive_attendance', months=12, stdout=io.StringIO())
+        archive.archive_before('2024-04-01')
+        self.assertEqual(archive.archived_before(), archive.horizon(12))
+        self.assertEqual(self.put('2024-04-01').status_code, 400)
+
+    def test_moving_the_cutoff_waits_for_cached_copies_to_expire(self):
+        with mock.patch.object(archive, 'CUTOFF_TTL', 60), mock.patch.object(archive.time, 'sleep') as sleep:
+            archive.archive_before('2024-04-01')
+            archive.archive_before('2024-04-01')
+        sleep.assert_called_once_with(60)
+
+
+class RequiredIndexTests(MongoTestCase):
+    """A worker connecting to a bare database still gets the unique indexes"""
+
+    def setUp(self):
+        super().setUp()
+        self.mongo_client = mongomock.MongoClient()
+        patcher = mock.patch.object(db, 'MongoClient', lambda uri, **options: self.mongo_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Force get_db() to connect through the patched client
+        db._db = None
+
+    def test_unique_indexes_are_created_on_connect(self):
+        with self.settings(MONGODB_ENSURE_INDEXES_ON_CONNECT=False):
+            database = db.get_db()
+        keys = [info['key'] for info in database.attendance.index_information().values()]
+        self.assertIn([('employee_id', 1), ('date', 1)], keys)
+        self.assertNotIn([('date', -1), ('_id', -1)], keys)
+
+    def test_duplicate_attendance_is_rejected_and_counts_stay_right(self):
+        with self.settings(MONGODB_ENSURE_INDEXES_ON_CONNECT=False):
+            employee = seed_employees(db.get_db(), 3)[0]
+        record = {'employee_id': employee, 'date': date.today().isoformat(), 'status': 'Present'}
+        client = Client()
+        first = client.post('/api/attendance/', record, content_type='application/json')
+        second = client.post('/api/attendance/', record, content_type='application/json')
+        self.assertEqual((first.status_code, second.status_code), (201, 400))
+        today = client.get('/api/attendance/dashboard/').json()['data']['today']
+        self.assertEqual((today['present'], today['not_marked']), (1, 2))
+
+    def test_conflicting_index_fails_loudly(self):
+        self.mongo_client[settings.MONGODB_NAME].employees.create_index([('email', 1)])
+        with self.assertRaises(ImproperlyConfigured):
+            db.get_db()
+        # Still raised on the next call rather than skipped
+        with self.assertRaises(ImproperlyConfigured):
+            db.get_db()
@@ -1,8 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from .views import AttendanceListCreateView, EmployeeAttendanceView, DashboardView
+from . import views
+
+# The Motor-backed read views replace their sync counterparts under ASYNC_API;
+# imported only then, so motor is not needed otherwise
+if settings.ASYNC_API:
+    from . import async_views
+
+    AttendanceListCreateView = async_views.AsyncAttendanceListCreateView
+    EmployeeAttendanceView = async_views.AsyncEmployeeAttendanceView
+    AttendanceReportView = async_views.AsyncAttendanceReportView
+    DashboardView = async_views.AsyncDashboardView
+else:
+    AttendanceListCreateView = views.AttendanceListCreateView
+    EmployeeAttendanceView = views.EmployeeAttendanceView
+    AttendanceReportView = views.AttendanceReportView
+    DashboardView = views.DashboardView
 
 urlpatterns = [
     path('', AttendanceListCreateView.as_view(), name='attendance-list-create'),
+    path('bulk/', views.AttendanceBulkView.as_view(), name='attendance-bulk'),
+    path('export/', views.AttendanceExportView.as_view(), name='attendance-export'),
     path('employee/<str:employee_id>/', EmployeeAttendanceView.as_view(), name='employee-attendance'),
+    path('employee/<str:employee_id>/<str:day>/', views.AttendanceRecordView.as_view(), name='attendance-record'),
+    path('reports/monthly/', AttendanceReportView.as_view(), name='attendance-monthly-report'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
 ]
@@ -1,55 +1,134 @@
+import itertools
+import re
 from datetime import datetime, date
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from bson import ObjectId
-from pymongo.errors import DuplicateKeyError
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
+from hrms.cache import get_employee, get_employees
 from hrms.db import get_employees_collection, get_attendance_collection
-from .serializers import AttendanceSerializer, AttendanceCreateSerializer
+from hrms.pagination import InvalidQueryParam, parse_limit, keyset_filter, paginate, page_meta
+from hrms.response_cache import SingleFlightCache
+from hrms.versions import ATTENDANCE, EMPLOYEES, bump_version, conditional, versions_key
+from . import archive, counters, dates, export, rollups
+from .serializers import AttendanceSerializer, AttendanceBulkOptionsSerializer, AttendanceCreateSerializer
+
+
+ATTENDANCE_STATUSES = ('Present', 'Absent')
+# With two statuses, a record an update changed held the other one
+OTHER_STATUS = {'Present': 'Absent', 'Absent': 'Present'}
+ATTENDANCE_LIST_SORT = [('date', -1), ('_id', -1)]
+DELETED_EMPLOYEES = {'deleted_at': {'$exists': True}}
+BULK_MAX_RECORDS = getattr(settings, 'ATTENDANCE_BULK_MAX_RECORDS', 5000)
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Shared by the sync and async dashboard views; see hrms/response_cache.py
+dashboard_cache = SingleFlightCache(
+    'dashboard',
+    ttl=getattr(settings, 'DASHBOARD_CACHE_TTL', 5),
+    stale_ttl=getattr(settings, 'DASHBOARD_CACHE_STALE_TTL', 60),
+    lock_timeout=getattr(settings, 'DASHBOARD_CACHE_LOCK_TIMEOUT', 5),
+)
+
+
+def today_key():
+    """Today's date; part of the dashboard ETag since the payload depends on it"""
+    return date.today().isoformat()
+
+
+def _parse_date(value):
+    """Validate a YYYY-MM-DD query param and return it normalized"""
+    return date.fromisoformat(value).isoformat()
+
+
+def attendance_list_query(params):
+    """Parse list query params into (query, limit).
+
+    Raises InvalidQueryParam for a bad date, status, limit or cursor.
+    """
+    query = {}
+    try:
+        date_filter = params.get('date')
+        if date_filter:
+            query['date'] = dates.to_storage(_parse_date(date_filter))
+        else:
+            date_range = dates.range_predicate(
+                _parse_date(params['date_from']) if params.get('date_from') else None,
+                _parse_date(params['date_to']) if params.get('date_to') else None,
+            )
+            if date_range:
+                query['date'] = date_range
+    except ValueError:
+        raise InvalidQueryParam('Invalid date format. Use YYYY-MM-DD')
+
+    status_filter = params.get('status')
+    if status_filter:
+        if status_filter not in ATTENDANCE_STATUSES:
+            raise InvalidQueryParam('Status must be either Present or Absent')
+        query['status'] = status_filter
+
+    if params.get('employee_id'):
+        query['employee_id'] = params['employee_id']
+
+    limit = parse_limit(params.get('limit'))
+    after = params.get('after')
+    if after:
+        query = {'$and': [query, keyset_filter('date', after)]}
+    return query, limit
+
+
+def enrich_records(records, employees):
+    """Add employee name and code to attendance list records.
+
+    Records of soft-deleted employees, still waiting for the background
+    purge, are left out.
+    """
+    enriched = []
+    for record in records:
+        employee = employees.get(record.get('employee_id'))
+        if employee is None:
+            continue
+        record['date'] = dates.iso(record['date'])
+        record['employee_name'] = employee.get('full_name', 'Unknown')
+        record['employee_code'] = employee.get('employee_id', 'Unknown')
+        enriched.append(record)
+    return enriched
 
 
 class AttendanceListCreateView(APIView):
     """View for listing and creating attendance records"""
 
+    @conditional(ATTENDANCE, EMPLOYEES)
     def get(self, request):
-        """List all attendance records with optional date filter"""
-        collection = get_attendance_collection()
-        employees_collection = get_employees_collection()
+        """List attendance records, newest date first, one keyset page at a time"""
+        collection = get_attendance_collection(secondary=True)
 
-        # Build query
-        query = {}
-        date_filter = request.query_params.get('date')
-        if date_filter:
-            try:
-                query['date'] = date_filter
-            except ValueError:
-                return Response({
-                    'success': False,
-                    'message': 'Invalid date format. Use YYYY-MM-DD',
-                    'errors': {}
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-        attendance_records = list(collection.find(query).sort('date', -1))
-
-        # Get all employees for reference
-        employees = {str(emp['_id']): emp for emp in employees_collection.find()}
-
-        # Enrich attendance records with employee details
-        for record in attendance_records:
-            record['id'] = str(record.pop('_id'))
-            emp_id = record.get('employee_id')
-            if emp_id and emp_id in employees:
-                record['employee_name'] = employees[emp_id].get('full_name', 'Unknown')
-                record['employee_code'] = employees[emp_id].get('employee_id', 'Unknown')
-            else:
-                record['employee_name'] = 'Unknown'
-                record['employee_code'] = 'Unknown'
+        try:
+            query, limit = attendance_list_query(request.query_params)
+        except InvalidQueryParam as e:
+            return Response({
+                'success': False,
+                'message': str(e),
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        attendance_records, next_cursor = paginate(collection, query, ATTENDANCE_LIST_SORT, 'date', limit)
+
+        # Fetch only the employees referenced on this page
+        employees = get_employees(
+            (r.get('employee_id') for r in attendance_records), versions=request.collection_versions
+        )
 
         return Response({
             'success': True,
             'message': 'Attendance records retrieved successfully',
-            'data': attendance_records
+            'data': enrich_records(attendance_records, employees),
+            'pagination': page_meta(limit, next_cursor)
         })
 
     def post(self, request):
@@ -65,11 +144,10 @@ class AttendanceListCreateView(APIView):
 
         data = serializer.validated_data
         collection = get_attendance_collection()
-        employees_collection = get_employees_collection()
 
         # Verify employee exists
         try:
-            employee = employees_collection.find_one({'_id': ObjectId(data['employee_id'])})
+            employee = get_employee(data['employee_id'], fresh=True)
         except Exception:
             return Response({
                 'success': False,
@@ -86,17 +164,23 @@ class AttendanceListCreateView(APIView):
 
         # Prepare document
         now = datetime.utcnow()
+        day = data['date'].isoformat()
         document = {
             'employee_id': data['employee_id'],
-            'date': data['date'].isoformat(),
+            'date': dates.to_storage(day),
             'status': data['status'],
             'created_at': now
         }
 
         try:
             result = collection.insert_one(document)
+            changes = [(employee, day, None, document['status'])]
+            counters.apply_changes(changes)
+            rollups.apply_changes(changes)
+            bump_version(ATTENDANCE)
             document['id'] = str(result.inserted_id)
             document.pop('_id', None)
+            document['date'] = day
             document['employee_name'] = employee.get('full_name', 'Unknown')
             document['employee_code'] = employee.get('employee_id', 'Unknown')
 
@@ -114,17 +198,475 @@ class AttendanceListCreateView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
+class AttendanceBulkView(APIView):
+    """View for marking attendance for many employees in one request"""
+
+    def post(self, request):
+        """Mark a batch of attendance records.
+
+        Body: {"records": [{employee_id, date, status}, ...], "upsert": false}.
+        With upsert enabled existing records for the same employee and date are
+        corrected instead of being reported as duplicates.
+        """
+        records = request.data.get('records') if isinstance(request.data, dict) else None
+
+        if not isinstance(records, list) or not records:
+            return Response({
+                'success': False,
+                'message': 'records must be a non-empty list',
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(records) > BULK_MAX_RECORDS:
+            return Response({
+                'success': False,
+                'message': f'A batch may contain at most {BULK_MAX_RECORDS} records',
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        options = AttendanceBulkOptionsSerializer(data=request.data)
+        if not options.is_valid():
+            return Response({
+                'success': False,
+                'message': 'Validation failed',
+                'errors': options.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        upsert = options.validated_data['upsert']
+
+        serializer = AttendanceCreateSerializer(data=records, many=True)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'message': 'Validation failed',
+                'errors': {'records': serializer.errors}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        items = serializer.validated_data
+        collection = get_attendance_collection()
+
+        # Resolve every referenced employee with one query, bypassing the
+        # cache so an employee deleted by another worker is rejected
+        employees = get_employees((item['employee_id'] for item in items), fresh=True)
+
+        results = [None] * len(items)
+        pending = []
+        seen = set()
+        for index, item in enumerate(items):
+            key = (item['employee_id'], item['date'].isoformat())
+            if item['employee_id'] not in employees:
+                results[index] = {'status': 'error', 'message': 'Employee not found'}
+            elif key in seen:
+                results[index] = {'status': 'duplicate', 'message': 'Repeated in this batch'}
+            else:
+                seen.add(key)
+                pending.append((index, key, item['status']))
+
+        # Upserts only match a record whose status differs, so each write
+        # classifies itself atomically, with no read before it: an upserted
+        # _id means created, a match means updated from the other status,
+        # and a duplicate key error means the record already had this status
+        now = datetime.utcnow()
+        operations = []
+        op_items = []
+        for index, (employee_id, day), new_status in pending:
+            document = None
+            if upsert:
+                operations.append(UpdateOne(
+                    {'employee_id': employee_id, 'date': dates.to_storage(day), 'status': {'$ne': new_status}},
+                    {
+                        '$set': {'status': new_status, 'updated_at': now},
+                        '$setOnInsert': {'created_at': now}
+                    },
+                    upsert=True
+                ))
+            else:
+                # bulk_write sets _id on the document it inserts
+                document = {
+                    'employee_id': employee_id,
+                    'date': dates.to_storage(day),
+                    'status': new_status,
+                    'created_at': now
+                }
+                operations.append(InsertOne(document))
+            op_items.append((index, employee_id, day, new_status, document))
+
+        failed = {}
+        upserted_ids = {}
+        if operations:
+            try:
+                result = collection.bulk_write(operations, ordered=False)
+                upserted_ids = result.upserted_ids
+            except BulkWriteError as e:
+                upserted_ids = {u['index']: u['_id'] for u in e.details.get('upserted', [])}
+                failed = {err['index']: err for err in e.details.get('writeErrors', [])}
+
+        changes = []
+        existing = []
+        for op_index, (index, employee_id, day, new_status, document) in enumerate(op_items):
+            error = failed.get(op_index)
+            if error is not None:
+                if error.get('code') != 11000:
+                    results[index] = {'status': 'error', 'message': error.get('errmsg', 'Write failed')}
+                elif upsert:
+                    results[index] = {'status': 'unchanged'}
+                    existing.append((index, employee_id, day))
+                else:
+                    results[index] = {'status': 'duplicate',
+                                      'message': 'Attendance already exists for this date'}
+            elif not upsert:
+                results[index] = {'status': 'created', 'id': str(document['_id'])}
+                changes.append((employees[employee_id], day, None, new_status))
+            elif op_index in upserted_ids:
+                results[index] = {'status': 'created', 'id': str(upserted_ids[op_index])}
+                changes.append((employees[employee_id], day, None, new_status))
+            else:
+                results[index] = {'status': 'updated'}
+                existing.append((index, employee_id, day))
+                changes.append((employees[employee_id], day, OTHER_STATUS[new_status], new_status))
+
+        # Ids of the records that were already there, with one query
+        if existing:
+            cursor = collection.find(
+                {
+                    'employee_id': {'$in': list({employee_id for _, employee_id, _ in existing})},
+                    'date': {'$in': [dates.to_storage(day) for day in {day for _, _, day in existing}]}
+                },
+                {'employee_id': 1, 'date': 1}
+            )
+            ids = {(doc['employee_id'], dates.iso(doc['date'])): str(doc['_id']) for doc in cursor}
+            for index, employee_id, day in existing:
+                results[index]['id'] = ids.get((employee_id, day))
+
+        counters.apply_changes(changes)
+        rollups.apply_changes(changes)
+        if changes:
+            bump_version(ATTENDANCE)
+
+        for index, item in enumerate(items):
+            results[index]['index'] = index
+            results[index]['employee_id'] = item['employee_id']
+            results[index]['date'] = item['date'].isoformat()
+
+        summary = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+
+        return Response({
+            'success': True,
+            'message': 'Bulk attendance processed',
+            'data': {
+                'summary': summary,
+                'results': results
+            }
+        })
+
+
+def upsert_attendance(employee_id, day, new_status, idempotency_key=None):
+    """Set the status of the (employee_id, day) record in one round trip.
+
+    Returns (before, record_id): the record as it was before the write, None
+    if this call created it. The idempotency key is stored on the record so a
+    retried request can be recognised.
+    """
+    collection = get_attendance_collection()
+    now = datetime.utcnow()
+    # The _id is chosen here so a created record's id is known without a read
+    new_id = ObjectId()
+    query = {'employee_id': employee_id, 'date': dates.to_storage(day)}
+    update = {
+        '$set': {'status': new_status, 'updated_at': now, 'idempotency_key': idempotency_key},
+        '$setOnInsert': {'_id': new_id, 'created_at': now, 'created_by_key': idempotency_key},
+    }
+    try:
+        before = collection.find_one_and_update(query, update, upsert=True, return_document=ReturnDocument.BEFORE)
+    except DuplicateKeyError:
+        # A concurrent upsert inserted the record first; this one is now an update
+        before = collection.find_one_and_update(query, update, upsert=True, return_document=ReturnDocument.BEFORE)
+    return before, (before['_id'] if before else new_id)
+
+
+class AttendanceRecordView(APIView):
+    """View for setting one employee's attendance on one date"""
+
+    def put(self, request, employee_id, day):
+        """Create or correct the record; safe to retry with an Idempotency-Key"""
+        body = request.data if isinstance(request.data, dict) else {}
+        serializer = AttendanceCreateSerializer(data={
+            'employee_id': employee_id,
+            'date': day,
+            'status': body.get('status'),
+        })
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'message': 'Validation failed',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response({
+                'success': False,
+                'message': f'Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters',
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        if not ObjectId.is_valid(employee_id):
+            return Response({
+                'success': False,
+                'message': 'Invalid employee ID format',
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # The cached employee keeps the write to one round trip. A record
+        # accepted for an employee another worker deleted within the cache
+        # TTL is removed by that employee's purge job.
+        employee = get_employee(employee_id)
+        if not employee:
+            return Response({
+                'success': False,
+                'message': 'Employee not found',
+                'errors': {'employee_id': ['Employee does not exist']}
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        day = data['date'].isoformat()
+        before, record_id = upsert_attendance(employee_id, day, data['status'], idempotency_key)
+        old_status = before['status'] if before else None
+        if old_status != data['status']:
+            changes = [(employee, day, old_status, data['status'])]
+            counters.apply_changes(changes)
+            rollups.apply_changes(changes)
+            bump_version(ATTENDANCE)
+
+        # A retry of the request that created the record gets the same 201
+        replayed = before is not None and idempotency_key is not None \
+            and before.get('idempotency_key') == idempotency_key
+        created = before is None or (replayed and before.get('created_by_key') == idempotency_key)
+
+        response = Response({
+            'success': True,
+            'message': 'Attendance marked successfully' if created else 'Attendance updated successfully',
+            'data': {
+                'id': str(record_id),
+                'employee_id': employee_id,
+                'date': day,
+                'status': data['status'],
+                'employee_name': employee.get('full_name', 'Unknown'),
+                'employee_code': employee.get('employee_id', 'Unknown'),
+            }
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+        if replayed:
+            response['Idempotent-Replayed'] = 'true'
+        return response
+
+    patch = put
+
+
+class AttendanceExportView(APIView):
+    """View for streaming attendance out as CSV or NDJSON"""
+
+    def get(self, request):
+        """Stream attendance for a date range, optionally for one department or employee.
+
+        `include_archive=true` streams the archived records first.
+        """
+        params = request.query_params
+        # Not `format`: DRF reserves that query param for renderer selection
+        export_format = params.get('export_format', 'csv')
+        if export_format not in export.STREAMERS:
+            return Response({
+                'success': False,
+                'message': 'export_format must be csv or ndjson',
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            date_from = _parse_date(params['date_from']) if params.get('date_from') else None
+            date_to = _parse_date(params['date_to']) if params.get('date_to') else None
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'Invalid date format. Use YYYY-MM-DD',
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        query = export.build_export_query(
+            date_from, date_to, params.get('department'), params.get('employee_id')
+        )
+        rows = export.iter_export_rows(query)
+        if params.get('include_archive', '').lower() == 'true':
+            rows = itertools.chain(export.iter_archive_rows(query, date_from, date_to), rows)
+
+        content = export.STREAMERS[export_format](rows)
+        if settings.ASYNC_API:
+            content = export.aiter_chunks(content)
+
+        response = StreamingHttpResponse(content, content_type=export.CONTENT_TYPES[export_format])
+        filename = f"attendance_{date_from or 'start'}_{date_to or 'end'}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+def employee_history_params(params):
+    """Parse `from`/`to`/`limit` into (date_from, date_to, limit).
+
+    Raises InvalidQueryParam for a bad date or limit.
+    """
+    try:
+        date_from = _parse_date(params['from']) if params.get('from') else None
+        date_to = _parse_date(params['to']) if params.get('to') else None
+    except ValueError:
+        raise InvalidQueryParam('Invalid date format. Use YYYY-MM-DD')
+    return date_from, date_to, parse_limit(params.get('limit'))
+
+
+def _is_status(value):
+    return {'$cond': [{'$eq': ['$status', value]}, 1, 0]}
+
+
+def employee_history_pipeline(employee_id, date_from, date_to, limit):
+    """One $facet aggregation over the (employee_id, date) index.
+
+    Returns the latest `limit` records, status totals, a per-month breakdown
+    and present streaks. A streak is a run of Present records not broken by
+    an Absent record; unmarked days (weekends, leave) do not break it.
+    """
+    match = {'employee_id': employee_id}
+    date_range = dates.range_predicate(date_from, date_to)
+    if date_range:
+        match['date'] = date_range
+
+    return [
+        {'$match': match},
+        {'$facet': {
+            'records': [
+                {'$sort': {'date': -1}},
+                {'$limit': limit},
+                {'$project': {
+                    '_id': 0,
+                    'id': {'$toString': '$_id'},
+                    'date': 1,
+                    'status': 1,
+                    'created_at': 1
+                }},
+            ],
+            'totals': [
+                {'$group': {
+                    '_id': None,
+                    'total': {'$sum': 1},
+                    'present': {'$sum': _is_status('Present')},
+                    'absent': {'$sum': _is_status('Absent')},
+                }},
+            ],
+            'monthly': [
+                {'$group': {
+                    '_id': dates.month_expression(),
+                    'present': {'$sum': _is_status('Present')},
+                    'absent': {'$sum': _is_status('Absent')},
+                }},
+                {'$sort': {'_id': -1}},
+            ],
+            'streaks': [
+                # Absent records seen so far; Present records sharing this
+                # number belong to the same streak
+                {'$setWindowFields': {
+                    'sortBy': {'date': 1},
+                    'output': {'absents_before': {
+                        '$sum': _is_status('Absent'),
+                        'window': {'documents': ['unbounded', 'current']}
+                    }}
+                }},
+                {'$match': {'status': 'Present'}},
+                {'$group': {'_id': '$absents_before', 'length': {'$sum': 1}}},
+                {'$sort': {'_id': -1}},
+                {'$group': {
+                    '_id': None,
+                    'longest': {'$max': '$length'},
+                    'last_run': {'$first': '$_id'},
+                    'last_length': {'$first': '$length'},
+                    'first_run': {'$last': '$_id'},
+                    'first_length': {'$last': '$length'},
+                }},
+            ],
+        }},
+    ]
+
+
+def employee_history_payload(employee, facet, date_from, date_to, limit, archived=()):
+    """Build the employee attendance history response data.
+
+    ``facet`` is the $facet result over the hot collection and ``archived``
+    the period summaries of the employee's archive buckets, oldest first.
+    """
+    totals = facet['totals'][0] if facet['totals'] else {}
+    streaks = facet['streaks'][0] if facet['streaks'] else {}
+    absent_days = totals.get('absent', 0)
+
+    # Runs numbered 0 came before any Absent record; the latest run is
+    # current only if no Absent record came after it
+    hot_streak = {
+        'lead': streaks['first_length'] if streaks and streaks['first_run'] == 0 else 0,
+        'tail': streaks['last_length'] if streaks and streaks['last_run'] == absent_days else 0,
+        'longest': streaks.get('longest', 0),
+        'has_absent': absent_days > 0,
+    }
+    streak = archive.streak_summary([])
+    monthly = {}
+    for period in archived:
+        streak = archive.combine_streaks(streak, period['streak'])
+        month = monthly.setdefault(period['month'], {'present': 0, 'absent': 0})
+        month['present'] += period['present']
+        month['absent'] += period['absent']
+    streak = archive.combine_streaks(streak, hot_streak)
+    for doc in facet['monthly']:
+        month = monthly.setdefault(doc['_id'], {'present': 0, 'absent': 0})
+        month['present'] += doc['present']
+        month['absent'] += doc['absent']
+
+    archived_days = sum(period['count'] for period in archived)
+    total_days = totals.get('total', 0) + archived_days
+
+    return {
+        'employee': {
+            'id': str(employee['_id']),
+            'employee_id': employee.get('employee_id'),
+            'full_name': employee.get('full_name'),
+            'department': employee.get('department')
+        },
+        'stats': {
+            'total_days': total_days,
+            'present_days': totals.get('present', 0) + sum(period['present'] for period in archived),
+            'absent_days': absent_days + sum(period['absent'] for period in archived),
+            'longest_present_streak': streak['longest'],
+            'current_present_streak': streak['tail'],
+            'monthly': [
+                {'month': month, 'present': counts['present'], 'absent': counts['absent']}
+                for month, counts in sorted(monthly.items(), reverse=True)
+            ]
+        },
+        'range': {
+            'from': date_from,
+            'to': date_to,
+            'limit': limit,
+            'archived_days': archived_days,
+            'truncated': total_days > len(facet['records'])
+        },
+        'records': [dict(record, date=dates.iso(record['date'])) for record in facet['records']]
+    }
+
+
 class EmployeeAttendanceView(APIView):
     """View for getting attendance records for a specific employee"""
 
+    @conditional(ATTENDANCE, EMPLOYEES)
     def get(self, request, employee_id):
         """Get attendance history for an employee"""
         collection = get_attendance_collection()
-        employees_collection = get_employees_collection()
 
         # Verify employee exists
         try:
-            employee = employees_collection.find_one({'_id': ObjectId(employee_id)})
+            employee = get_employee(employee_id, versions=request.collection_versions)
         except Exception:
             return Response({
                 'success': False,
@@ -139,94 +681,145 @@ class EmployeeAttendanceView(APIView):
                 'errors': {}
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Get attendance records
-        records = list(collection.find({'employee_id': employee_id}).sort('date', -1))
-
-        for record in records:
-            record['id'] = str(record.pop('_id'))
-            record['employee_name'] = employee.get('full_name', 'Unknown')
-            record['employee_code'] = employee.get('employee_id', 'Unknown')
+        try:
+            date_from, date_to, limit = employee_history_params(request.query_params)
+        except InvalidQueryParam as e:
+            return Response({
+                'success': False,
+                'message': str(e),
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Calculate stats
-        total_records = len(records)
-        present_count = sum(1 for r in records if r.get('status') == 'Present')
-        absent_count = total_records - present_count
+        # Records, totals, monthly breakdown and streaks in one round trip
+        pipeline = employee_history_pipeline(employee_id, date_from, date_to, limit)
+        facet = next(collection.aggregate(pipeline))
+        archived = archive.summaries(employee_id, date_from, date_to)
 
         return Response({
             'success': True,
             'message': 'Employee attendance retrieved successfully',
-            'data': {
-                'employee': {
-                    'id': str(employee['_id']),
-                    'employee_id': employee.get('employee_id'),
-                    'full_name': employee.get('full_name'),
-                    'department': employee.get('department')
-                },
-                'stats': {
-                    'total_days': total_records,
-                    'present_days': present_count,
-                    'absent_days': absent_count
-                },
-                'records': records
-            }
+            'data': employee_history_payload(employee, facet, date_from, date_to, limit, archived)
         })
 
 
-class DashboardView(APIView):
-    """Dashboard API for summary statistics"""
+def _month_param(value, default):
+    if not value:
+        return default
+    if not re.fullmatch(r'\d{4}-(0[1-9]|1[0-2])', value):
+        raise InvalidQueryParam('Invalid month format. Use YYYY-MM')
+    return value
+
+
+def report_params(params):
+    """Parse report query params into (by, from_month, to_month, department).
+
+    Months default to the last 12. Raises InvalidQueryParam for a bad month,
+    or for ``by=employee`` without a department.
+    """
+    today = date.today()
+    year, month = divmod(today.year * 12 + today.month - 12, 12)
+    default_from = f'{year:04d}-{month + 1:02d}'
+
+    from_month = _month_param(params.get('from_month'), default_from)
+    to_month = _month_param(params.get('to_month'), today.strftime('%Y-%m'))
+    by = params.get('by', 'department')
+    department = params.get('department')
+    if by != 'department' and not (by == 'employee' and department):
+        raise InvalidQueryParam('by must be department, or employee together with department')
+    return by, from_month, to_month, department
+
+
+def report_payload(by, from_month, to_month, department, rows):
+    """Build the monthly report response"""
+    return {
+        'success': True,
+        'message': 'Attendance report retrieved successfully',
+        'data': {
+            'by': by,
+            'from_month': from_month,
+            'to_month': to_month,
+            'department': department,
+            'rows': rows
+        }
+    }
+
 
+class AttendanceReportView(APIView):
+    """Monthly attendance report served from the rollup collections"""
+
+    @conditional(ATTENDANCE, EMPLOYEES)
     def get(self, request):
-        """Get dashboard statistics"""
-        employees_collection = get_employees_collection()
-        attendance_collection = get_attendance_collection()
+        """Department x month matrix, or employee x month for one department.
 
-        # Total employees
-        total_employees = employees_collection.count_documents({})
+        Params: from_month, to_month (YYYY-MM, default the last 12 months),
+        department, by=department|employee.
+        """
+        try:
+            by, from_month, to_month, department = report_params(request.query_params)
+        except InvalidQueryParam as e:
+            return Response({
+                'success': False,
+                'message': str(e),
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Today's date
-        today = date.today().isoformat()
+        if by == 'department':
+            rows = rollups.department_matrix(from_month, to_month, department)
+        else:
+            rows = rollups.employee_matrix(from_month, to_month, department)
 
-        # Today's attendance
-        today_present = attendance_collection.count_documents({
-            'date': today,
-            'status': 'Present'
-        })
-        today_absent = attendance_collection.count_documents({
+        return Response(report_payload(by, from_month, to_month, department, rows))
+
+
+def dashboard_payload(total_employees, today, today_present, today_absent, employee_stats):
+    """Build the dashboard response data"""
+    return {
+        'total_employees': total_employees,
+        'today': {
             'date': today,
-            'status': 'Absent'
-        })
+            'present': today_present,
+            'absent': today_absent,
+            'not_marked': total_employees - today_present - today_absent
+        },
+        'employee_stats': employee_stats
+    }
+
+
+def compute_dashboard(today):
+    """Read the dashboard data from MongoDB"""
+    employees_collection = get_employees_collection(secondary=True)
+
+    # Total employees: collection metadata minus the few soft-deleted
+    # employees still awaiting purge (sparse deleted_at index)
+    total_employees = (
+        employees_collection.estimated_document_count()
+        - employees_collection.count_documents(DELETED_EMPLOYEES)
+    )
+
+    # Today's attendance and per-employee present counts from counters
+    today_present, today_absent = counters.get_daily_counts(today)
+    employee_stats = counters.get_employee_stats()
+    return dashboard_payload(total_employees, today, today_present, today_absent, employee_stats)
+
+
+def dashboard_cache_key(request, today):
+    """The payload depends on the date and on every employee/attendance write"""
+    return f'{today}:{versions_key(request.collection_versions)}'
 
-        # Get per-employee present counts
-        pipeline = [
-            {'$match': {'status': 'Present'}},
-            {'$group': {'_id': '$employee_id', 'present_days': {'$sum': 1}}},
-            {'$sort': {'present_days': -1}}
-        ]
-        employee_stats = list(attendance_collection.aggregate(pipeline))
-
-        # Enrich with employee details
-        employees = {str(emp['_id']): emp for emp in employees_collection.find()}
-        for stat in employee_stats:
-            emp_id = stat['_id']
-            if emp_id in employees:
-                stat['employee_name'] = employees[emp_id].get('full_name', 'Unknown')
-                stat['employee_code'] = employees[emp_id].get('employee_id', 'Unknown')
-            else:
-                stat['employee_name'] = 'Unknown'
-                stat['employee_code'] = 'Unknown'
-            stat['employee_id'] = stat.pop('_id')
+
+class DashboardView(APIView):
+    """Dashboard API for summary statistics"""
+
+    @conditional(EMPLOYEES, ATTENDANCE, extra=today_key)
+    def get(self, request):
+        """Get dashboard statistics"""
+        today = today_key()
+        data = dashboard_cache.get_or_compute(
+            dashboard_cache_key(request, today), lambda: compute_dashboard(today)
+        )
 
         return Response({
             'success': True,
             'message': 'Dashboard data retrieved successfully',
-            'data': {
-                'total_employees': total_employees,
-                'today': {
-                    'date': today,
-                    'present': today_present,
-                    'absent': today_absent,
-                    'not_marked': total_employees - today_present - today_absent
-                },
-                'employee_stats': employee_stats
-            }
+            'data': data
         })
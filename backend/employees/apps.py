@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class EmployeesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'employees'
+
+    def ready(self):
+        from hrms import warmup
+
+        # Resume purge jobs left pending or stalled by a previous process
+        if settings.EMPLOYEE_PURGE_IN_PROCESS and warmup.serving():
+            from . import purge
+            purge.start_sweeper()
+
+        warmup.warm_up(
+            'employees',
+            warmup.connect_mongo,
+            warmup.load_api_settings,
+            warmup.import_modules('employees.urls'),
+        )
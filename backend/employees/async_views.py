@@ -0,0 +1,95 @@
+"""Async (Motor) versions of the employee read endpoints, used under ASGI"""
+import asyncio
+
+from attendance.counters import aget_department_counts
+from attendance.views import today_key
+from hrms.async_api import AsyncAPIView, delegate, error_response, json_response
+from hrms.async_db import get_employees_collection
+from hrms.cache import aget_department_headcounts, aget_employee
+from hrms.pagination import InvalidQueryParam, apaginate, page_meta
+from hrms.versions import ATTENDANCE, EMPLOYEES, conditional
+from .views import (
+    SEARCH_PROJECTION, EmployeeListCreateView, EmployeeDetailView,
+    departments_payload, employee_list_query, employee_search_query, present_employees, present_search_results
+)
+
+
+class AsyncEmployeeListCreateView(AsyncAPIView):
+    """Async view for listing and creating employees"""
+
+    @conditional(EMPLOYEES)
+    async def get(self, request):
+        """List employees one keyset page at a time: newest first, or by name within a department"""
+        try:
+            query, sort, fields, limit, cursor_only = employee_list_query(request.GET)
+        except InvalidQueryParam as e:
+            return error_response(str(e))
+
+        employees, next_cursor = await apaginate(
+            get_employees_collection(secondary=True), query, sort, sort[0][0], limit, fields
+        )
+
+        return json_response({
+            'success': True,
+            'message': 'Employees retrieved successfully',
+            'data': present_employees(employees, cursor_only),
+            'pagination': page_meta(limit, next_cursor)
+        })
+
+    post = delegate(EmployeeListCreateView)
+
+
+class AsyncEmployeeSearchView(AsyncAPIView):
+    """Async typeahead search over employee name, employee ID and email"""
+
+    async def get(self, request):
+        """Return up to `limit` employees with a term starting with `q`"""
+        try:
+            query, limit = employee_search_query(request.GET)
+        except InvalidQueryParam as e:
+            return error_response(str(e))
+
+        cursor = get_employees_collection(secondary=True).find(query, SEARCH_PROJECTION).limit(limit)
+
+        return json_response({
+            'success': True,
+            'message': 'Employees retrieved successfully',
+            'data': present_search_results(await cursor.to_list(length=limit))
+        })
+
+
+class AsyncDepartmentListView(AsyncAPIView):
+    """Async view for per-department headcount and today's attendance"""
+
+    @conditional(EMPLOYEES, ATTENDANCE, extra=today_key)
+    async def get(self, request):
+        """List departments with headcount and today's present/absent/unmarked"""
+        today = today_key()
+        headcounts, counts = await asyncio.gather(aget_department_headcounts(request.collection_versions), aget_department_counts(today))
+
+        return json_response(departments_payload(today, headcounts, counts))
+
+
+class AsyncEmployeeDetailView(AsyncAPIView):
+    """Async view for retrieving and deleting a single employee"""
+
+    @conditional(EMPLOYEES)
+    async def get(self, request, pk):
+        """Get employee details"""
+        try:
+            employee = await aget_employee(pk, versions=request.collection_versions)
+        except Exception:
+            return error_response('Invalid employee ID format')
+
+        if not employee:
+            return error_response('Employee not found', status=404)
+
+        employee['id'] = str(employee.pop('_id'))
+
+        return json_response({
+            'success': True,
+            'message': 'Employee retrieved successfully',
+            'data': employee
+        })
+
+    delete = delegate(EmployeeDetailView)
@@ -0,0 +1,147 @@
+"""Streaming bulk import of employees from CSV or NDJSON.
+
+Rows are parsed one line at a time, validated with ``EmployeeSerializer`` in
+fixed-size chunks and written with unordered ``insert_many``, so memory use
+depends on the chunk size rather than on the size of the file. Shared by the
+``/api/employees/import/`` endpoint and ``manage.py import_employees``.
+"""
+import csv
+import json
+from datetime import datetime
+
+from django.conf import settings
+from pymongo.errors import BulkWriteError
+
+from hrms.db import get_employees_collection
+from .serializers import EmployeeSerializer, build_employee_document
+
+
+IMPORT_FIELDS = ('employee_id', 'full_name', 'email', 'department')
+CHUNK_SIZE = getattr(settings, 'EMPLOYEE_IMPORT_CHUNK_SIZE', 500)
+# Only the first errors are kept so a bad file cannot grow the report unbounded
+MAX_REPORTED_ERRORS = 1000
+
+DUPLICATE_MESSAGES = {
+    'employee_id': 'This employee ID already exists',
+    'email': 'This email is already registered',
+}
+
+
+def iter_csv_rows(lines):
+    """Yield (row_number, row) from CSV text lines with a header row"""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        # Data rows are numbered from 2, the header being row 1
+        yield reader.line_num, {field: row.get(field) for field in IMPORT_FIELDS}
+
+
+def iter_ndjson_rows(lines):
+    """Yield (row_number, row) from newline-delimited JSON text lines"""
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None
+            continue
+        yield line_number, {field: row.get(field) for field in IMPORT_FIELDS}
+
+
+def iter_rows(lines, file_format):
+    """Yield (row_number, row) for a 'csv' or 'ndjson' stream of text lines"""
+    if file_format == 'csv':
+        return iter_csv_rows(lines)
+    if file_format == 'ndjson':
+        return iter_ndjson_rows(lines)
+    raise ValueError(f'Unsupported import format: {file_format}')
+
+
+class ImportReport:
+    """Running totals for an import"""
+
+    def __init__(self):
+        self.total = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def _duplicate_errors(write_error):
+    """Map a duplicate key write error to field errors"""
+    key_pattern = write_error.get('keyPattern') or {}
+    message = write_error.get('errmsg', '')
+    for field, text in DUPLICATE_MESSAGES.items():
+        if field in key_pattern or field in message:
+            return {field: [text]}
+    return {'non_field_errors': ['A duplicate entry exists']}
+
+
+def _import_chunk(chunk, report):
+    """Validate and insert one chunk of (row_number, row) pairs"""
+    documents = []
+    row_numbers = []
+    now = datetime.utcnow()
+
+    for row_number, row in chunk:
+        if row is None:
+            report.add_error(row_number, {'non_field_errors': ['Row is not a JSON object']})
+            continue
+        serializer = EmployeeSerializer(data=row)
+        if not serializer.is_valid():
+            report.add_error(row_number, serializer.errors)
+            continue
+        documents.append(build_employee_document(serializer.validated_data, now))
+        row_numbers.append(row_number)
+
+    if not documents:
+        return
+
+    try:
+        result = get_employees_collection().insert_many(documents, ordered=False)
+        report.created += len(result.inserted_ids)
+    except BulkWriteError as e:
+        write_errors = e.details.get('writeErrors', [])
+        report.created += e.details.get('nInserted', 0)
+        for write_error in write_errors:
+            row_number = row_numbers[write_error['index']]
+            if write_error.get('code') == 11000:
+                report.add_error(row_number, _duplicate_errors(write_error))
+            else:
+                report.add_error(row_number, {'non_field_errors': [write_error.get('errmsg', 'Write failed')]})
+
+
+def import_employees(lines, file_format, chunk_size=CHUNK_SIZE):
+    """Import employees from an iterable of text lines.
+
+    Returns an ImportReport with per-row errors keyed by row number.
+    """
+    report = ImportReport()
+    chunk = []
+    for row_number, row in iter_rows(lines, file_format):
+        report.total += 1
+        chunk.append((row_number, row))
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, report)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, report)
+    return report
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from employees.serializers import search_terms
+from hrms.db import get_employees_collection
+
+
+class Command(BaseCommand):
+    help = 'Store normalized search terms on employees written before search was added'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute terms for every employee, not only those missing them')
+
+    def handle(self, *args, **options):
+        collection = get_employees_collection()
+        query = {} if options['all'] else {'search_terms': {'$exists': False}}
+        cursor = collection.find(query, {'employee_id': 1, 'full_name': 1, 'email': 1})
+
+        updated = 0
+        batch = []
+        for employee in cursor:
+            batch.append(UpdateOne({'_id': employee['_id']}, {'$set': {'search_terms': search_terms(employee)}}))
+            if len(batch) >= options['batch_size']:
+                updated += collection.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+
+        self.stdout.write(self.style.SUCCESS(f'Updated search terms on {updated} employees'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.importer import CHUNK_SIZE, import_employees
+from hrms.versions import EMPLOYEES, bump_version
+
+
+class Command(BaseCommand):
+    help = 'Import employees from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument(
+            '--format',
+            dest='file_format',
+            choices=['csv', 'ndjson'],
+            help='File format (default: inferred from the extension)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['file_format']
+        if file_format is None:
+            if path.endswith('.csv'):
+                file_format = 'csv'
+            elif path.endswith(('.ndjson', '.jsonl')):
+                file_format = 'ndjson'
+            else:
+                raise CommandError('Cannot infer the format, pass --format')
+
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                report = import_employees(f, file_format, options['chunk_size'])
+        except OSError as e:
+            raise CommandError(str(e))
+        if report.created:
+            bump_version(EMPLOYEES)
+
+        for error in report.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f'... {report.failed - len(report.errors)} more errors not shown')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} of {report.total} employees ({report.failed} failed)'
+        ))
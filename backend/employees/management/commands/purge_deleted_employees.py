@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from employees.purge import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Purge attendance of soft-deleted employees (runs pending and stalled jobs)"
+
+    def handle(self, *args, **options):
+        count = run_pending_jobs()
+        self.stdout.write(self.style.SUCCESS(f'Ran {count} purge job(s)'))
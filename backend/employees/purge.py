@@ -0,0 +1,248 @@
+"""Background purge of a deleted employee's attendance.
+
+Deleting an employee only marks it ``deleted_at`` and records a purge job;
+reads stop seeing the employee straight away. The job then removes the
+attendance records in bounded batches, subtracting each batch from the
+daily counters, then does the same for its archived attendance, and
+finally deletes the employee document.
+
+Jobs live in ``employee_purge_jobs`` and are claimed with a lease, so a job
+interrupted by a restart or an error is picked up again by the next runner
+once its lease expires. Runners are the in-process thread the delete view
+hands the job to, the sweep each web process runs on that thread at startup
+and every ``EMPLOYEE_PURGE_SWEEP_SECONDS``, and
+``manage.py purge_deleted_employees``. Every step is safe to repeat.
+
+Other workers may still accept attendance for the employee from their
+employee cache, so a job stays leased until one cache TTL after the delete
+and then runs a last pass before it finishes.
+
+The employee's ``employee_id`` and ``email`` are released when it is
+soft-deleted, by suffixing them with a tombstone, so the same employee can
+be created again while the purge runs without hitting the unique indexes.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from django.conf import settings
+from pymongo import ReturnDocument
+
+from attendance import archive, counters, rollups
+from hrms.cache import invalidate_employee
+from hrms.db import get_attendance_collection, get_employees_collection, get_purge_jobs_collection
+from hrms.versions import ATTENDANCE, EMPLOYEES, bump_version
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'EMPLOYEE_PURGE_BATCH_SIZE', 1000)
+LEASE_SECONDS = getattr(settings, 'EMPLOYEE_PURGE_LEASE_SECONDS', 300)
+SWEEP_SECONDS = getattr(settings, 'EMPLOYEE_PURGE_SWEEP_SECONDS', 300)
+# Other workers may accept attendance for the employee from their cache
+# until their entry expires, so a job finishes no sooner than this after
+# the delete and its last pass removes those records too
+SETTLE_SECONDS = getattr(settings, 'EMPLOYEE_CACHE_TTL', 300)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='employee-purge')
+_sweeper_started = False
+
+
+def released_keys(employee):
+    """Tombstoned employee_id and email that free the unique keys for reuse"""
+    suffix = f"~deleted~{employee['_id']}"
+    return {
+        field: employee[field] + suffix
+        for field in ('employee_id', 'email')
+        if employee.get(field) and not employee[field].endswith(suffix)
+    }
+
+
+def soft_delete_employee(employee):
+    """Mark an employee deleted and return its purge job.
+
+    Idempotent: deleting an already deleted employee returns the existing job.
+    """
+    employee_id = str(employee['_id'])
+    jobs = get_purge_jobs_collection()
+    now = datetime.utcnow()
+
+    get_employees_collection().update_one(
+        {'_id': employee['_id'], 'deleted_at': {'$exists': False}},
+        {'$set': {'deleted_at': now, 'updated_at': now, **released_keys(employee)}}
+    )
+    invalidate_employee(employee_id)
+
+    # One job per employee; upsert keeps a repeated delete from creating another
+    job = jobs.find_one_and_update(
+        {'employee_id': employee_id},
+        {'$setOnInsert': {
+            'employee_id': employee_id,
+            'status': PENDING,
+            'deleted_records': 0,
+            'created_at': now,
+            'updated_at': now,
+        }},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+    # The per-employee totals are small and can go immediately
+    counters.remove_employee(employee_id)
+    rollups.remove_employee(employee_id)
+    bump_version(EMPLOYEES, ATTENDANCE)
+    return job
+
+
+def _claim(job_id=None):
+    """Lease a pending job, or a running one whose lease expired"""
+    now = datetime.utcnow()
+    query = {'$or': [
+        {'status': PENDING},
+        {'status': RUNNING, 'lease_until': {'$lt': now}},
+    ]}
+    if job_id is not None:
+        query['_id'] = ObjectId(job_id)
+    return get_purge_jobs_collection().find_one_and_update(
+        query,
+        {'$set': {
+            'status': RUNNING,
+            'lease_until': now + timedelta(seconds=LEASE_SECONDS),
+            'updated_at': now,
+        }},
+        sort=[('created_at', 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _purge(job, batch_size=BATCH_SIZE):
+    jobs = get_purge_jobs_collection()
+    attendance_collection = get_attendance_collection()
+    employee_id = job['employee_id']
+    employee = get_employees_collection().find_one({'_id': ObjectId(employee_id)}, {'department': 1})
+    department = (employee or {}).get('department', 'Unknown')
+
+    while True:
+        batch = list(attendance_collection.find(
+            {'employee_id': employee_id},
+            {'date': 1, 'status': 1}
+        ).limit(batch_size))
+        if not batch:
+            break
+
+        result = attendance_collection.delete_many({'_id': {'$in': [r['_id'] for r in batch]}})
+        # A crash between these two steps leaves the counters slightly high
+        # for those days; manage.py rebuild_counters repairs that
+        counters.subtract_records(batch, department)
+        jobs.update_one(
+            {'_id': job['_id']},
+            {
+                '$inc': {'deleted_records': result.deleted_count},
+                '$set': {
+                    'lease_until': datetime.utcnow() + timedelta(seconds=LEASE_SECONDS),
+                    'updated_at': datetime.utcnow(),
+                }
+            }
+        )
+
+    settled_at = job['created_at'] + timedelta(seconds=SETTLE_SECONDS)
+    if datetime.utcnow() < settled_at:
+        # Leased until then, so the sweep after that runs the last pass
+        jobs.update_one(
+            {'_id': job['_id']},
+            {'$set': {'lease_until': settled_at, 'updated_at': datetime.utcnow()}}
+        )
+        return
+
+    archive.remove_employee(employee_id, department)
+    # A counter rebuild or a write that raced the delete may have added the
+    # employee's totals back since soft_delete_employee removed them
+    counters.remove_employee(employee_id)
+    rollups.remove_employee(employee_id)
+    get_employees_collection().delete_one({'_id': ObjectId(employee_id)})
+    invalidate_employee(employee_id)
+    jobs.update_one(
+        {'_id': job['_id']},
+        {'$set': {'status': DONE, 'finished_at': datetime.utcnow(), 'updated_at': datetime.utcnow()},
+         '$unset': {'lease_until': ''}}
+    )
+    bump_version(EMPLOYEES, ATTENDANCE)
+
+
+def run_job(job_id):
+    """Run one purge job if it can be claimed; returns True if it ran"""
+    job = _claim(job_id)
+    if job is None:
+        return False
+    _purge(job)
+    return True
+
+
+def run_pending_jobs():
+    """Run every claimable job; returns the number run"""
+    count = 0
+    while True:
+        job = _claim()
+        if job is None:
+            return count
+        _purge(job)
+        count += 1
+
+
+def _run_logged(job_id):
+    try:
+        run_job(job_id)
+    except Exception:
+        logger.exception('Employee purge job %s failed; a sweep retries it once its lease expires', job_id)
+
+
+def _sweep_logged():
+    try:
+        count = run_pending_jobs()
+    except Exception:
+        logger.exception('Employee purge sweep failed; the next sweep retries the job')
+        return
+    if count:
+        logger.info('Employee purge sweep ran %d job(s)', count)
+
+
+def schedule(job):
+    """Run a purge job on the in-process background thread"""
+    if getattr(settings, 'EMPLOYEE_PURGE_IN_PROCESS', True):
+        _executor.submit(_run_logged, str(job['_id']))
+
+
+def start_sweeper(interval=SWEEP_SECONDS):
+    """Sweep pending and expired-lease jobs now and every ``interval`` seconds.
+
+    The sweeps run on the same background thread as scheduled jobs; the
+    timer is a daemon, so it does not keep the process alive. Once per process.
+    """
+    global _sweeper_started
+    if _sweeper_started:
+        return
+    _sweeper_started = True
+
+    def tick():
+        _executor.submit(_sweep_logged)
+        timer = threading.Timer(interval, tick)
+        timer.daemon = True
+        timer.start()
+    tick()
+
+
+def job_status(job):
+    """Public representation of a purge job"""
+    return {
+        'id': str(job['_id']),
+        'employee_id': job['employee_id'],
+        'status': job['status'],
+        'deleted_records': job.get('deleted_records', 0),
+        'created_at': job.get('created_at'),
+        'finished_at': job.get('finished_at'),
+    }
@@ -1,7 +1,11 @@
 import re
+import unicodedata
 from rest_framework import serializers
 
 
+_TOKEN_SPLIT = re.compile(r'[\s\-\'.,]+')
+
+
 class EmployeeSerializer(serializers.Serializer):
     """Serializer for Employee model"""
     id = serializers.CharField(read_only=True)
@@ -35,6 +39,36 @@ class EmployeeSerializer(serializers.Serializer):
         return value.strip()
 
 
+def normalize_search_text(value):
+    """Lowercase, strip accents and collapse whitespace so 'José  Diaz' and
+    'jose diaz' index alike"""
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).lower().split())
+
+
+def search_terms(data):
+    """Prefix-searchable terms for an employee: name tokens, the whole name,
+    employee ID and email (whole and local part)"""
+    name = normalize_search_text(data['full_name'])
+    email = normalize_search_text(data['email'])
+    terms = {token for token in _TOKEN_SPLIT.split(name) if token}
+    terms.update((name, normalize_search_text(data['employee_id']), email, email.split('@')[0]))
+    return sorted(terms)
+
+
+def build_employee_document(data, now):
+    """Build the MongoDB document for validated employee data"""
+    return {
+        'employee_id': data['employee_id'],
+        'full_name': data['full_name'],
+        'email': data['email'],
+        'department': data['department'],
+        'search_terms': search_terms(data),
+        'created_at': now,
+        'updated_at': now
+    }
+
+
 class EmployeeCreateSerializer(EmployeeSerializer):
     """Serializer for creating an employee"""
     pass
@@ -1,3 +1,480 @@
-from django.test import TestCase
+import gzip
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from bson import ObjectId
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from hrms.compression import BROTLI, GZIP, CompressionMiddleware, choose_encoding, compress_sequence
+from hrms.renderers import ORJSONRenderer
+from hrms.pagination import InvalidQueryParam, decode_cursor, encode_cursor, keyset_filter, paginate
+from hrms.testing import MongoTestCase
+from hrms.versions import EMPLOYEES, bump_version
+from . import purge
+from .importer import _duplicate_errors, import_employees
+from .serializers import build_employee_document, normalize_search_text, search_terms
+
+
+def employee_data(n, department='Engineering'):
+    return {
+        'employee_id': f'EMP{n:04d}',
+        'full_name': f'Employee {n}',
+        'email': f'employee{n}@example.com',
+        'department': department,
+    }
+
+
+class CursorTests(SimpleTestCase):
+    """Opaque keyset cursors"""
+
+    def test_datetime_cursor_round_trips(self):
+        object_id = ObjectId()
+        value = datetime(2024, 3, 1, 9, 30, 15, 123000)
+        self.assertEqual(decode_cursor(encode_cursor(value, object_id)), (value, object_id))
+
+    def test_string_cursor_round_trips(self):
+        object_id = ObjectId()
+        self.assertEqual(decode_cursor(encode_cursor('2024-03-01', str(object_id))), ('2024-03-01', object_id))
+
+    def test_garbage_cursor_is_rejected(self):
+        for cursor in ('not-a-cursor', '', encode_cursor('x', 'not-an-object-id')):
+            with self.assertRaises(InvalidQueryParam):
+                decode_cursor(cursor)
+
+    def test_keyset_filter_breaks_ties_on_id(self):
+        object_id = ObjectId()
+        query = keyset_filter('created_at', encode_cursor('2024-03-01', object_id))
+        self.assertEqual(query, {'$or': [
+            {'created_at': {'$lt': '2024-03-01'}},
+            {'created_at': '2024-03-01', '_id': {'$lt': object_id}},
+        ]})
+        ascending = keyset_filter('full_name', encode_cursor('Ann', object_id), descending=False)
+        self.assertEqual(ascending['$or'][1], {'full_name': 'Ann', '_id': {'$gt': object_id}})
+
+
+class RendererParityTests(SimpleTestCase):
+    """ORJSONRenderer produces the same bytes as DRF's JSONRenderer"""
+
+    def test_same_output_as_drf(self):
+        payload = {
+            'naive': datetime(2024, 3, 1, 9, 30, 15, 123456),
+            'whole_second': datetime(2024, 3, 1, 9, 30, 15),
+            'utc': datetime(2024, 3, 1, 9, 30, 15, 123456, tzinfo=timezone.utc),
+            'offset': datetime(2024, 3, 1, 9, 30, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+            'date': date(2024, 3, 1),
+            'time': time(9, 30, 15, 5),
+            'duration': timedelta(hours=1, milliseconds=5),
+            'lazy': gettext_lazy('Employee not found'),
+            'decimal': Decimal('1.10'),
+            'uuid': uuid.UUID(int=1),
+            'set': {'Engineering'},
+            'tuple': (1, 'two'),
+            'name': 'José Díaz',
+            'nested': [{'present': 1, 'absent': None, 'ratio': 0.5, 'active': True}],
+        }
+        self.assertEqual(ORJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_object_ids_are_strings(self):
+        object_id = ObjectId()
+        self.assertEqual(ORJSONRenderer().render({'id': object_id}), b'{"id":"%s"}' % str(object_id).encode())
+
+    def test_unknown_types_are_an_error(self):
+        with self.assertRaises(TypeError):
+            ORJSONRenderer().render({'value': object()})
+
+
+class ChooseEncodingTests(SimpleTestCase):
+    """Accept-Encoding negotiation by q-value"""
+
+    BOTH = (BROTLI, GZIP)
+
+    def test_highest_q_value_wins(self):
+        self.assertEqual(choose_encoding('gzip;q=0.5, br;q=0.8', self.BOTH), BROTLI)
+        self.assertEqual(choose_encoding('br;q=0.5, gzip', self.BOTH), GZIP)
+        self.assertEqual(choose_encoding('GZIP ; Q=0.9, br;q=0.3', self.BOTH), GZIP)
+
+    def test_ties_go_to_server_preference(self):
+        self.assertEqual(choose_encoding('gzip, br', self.BOTH), BROTLI)
+        self.assertEqual(choose_encoding('gzip;q=0.7, br;q=0.7', (GZIP, BROTLI)), GZIP)
+
+    def test_zero_q_value_excludes_an_encoding(self):
+        self.assertEqual(choose_encoding('br;q=0, gzip', self.BOTH), GZIP)
+        self.assertEqual(choose_encoding('*;q=0.5, br;q=0', self.BOTH), GZIP)
+        self.assertIsNone(choose_encoding('gzip;q=0', (GZIP,)))
+
+    def test_wildcard_matches_unlisted_encodings(self):
+        self.assertEqual(choose_encoding('*', self.BOTH), BROTLI)
+        self.assertEqual(choose_encoding('gzip;q=0.2, *;q=0.5', self.BOTH), BROTLI)
+
+    def test_unsupported_or_malformed_entries_are_ignored(self):
+        self.assertIsNone(choose_encoding('', self.BOTH))
+        self.assertIsNone(choose_encoding('identity, deflate', self.BOTH))
+        self.assertIsNone(choose_encoding('gzip;q=abc', self.BOTH))
+        self.assertIsNone(choose_encoding('gzip;q=1.0.0', self.BOTH))
+        self.assertEqual(choose_encoding('br;level=5, gzip', self.BOTH), GZIP)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Response compression for the allowed content types"""
+
+    def process(self, response, accept_encoding='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_large_json_is_compressed_with_a_weak_etag(self):
+        body = b'{"data":[%s]}' % b','.join(b'{"present":1}' for _ in range(200))
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = '"v1"'
+        response = self.process(response)
+        self.assertEqual(response['Content-Encoding'], GZIP)
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), body)
+
+    def test_small_or_unlisted_responses_are_left_alone(self):
+        small = self.process(HttpResponse(b'{}', content_type='application/json'))
+        self.assertFalse(small.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', small['Vary'])
+        image = self.process(HttpResponse(b'x' * 4096, content_type='image/png'))
+        self.assertFalse(image.has_header('Content-Encoding'))
+
+    def test_streaming_responses_are_compressed_incrementally(self):
+        chunks = [b'employee_id,date,status\n'] + [b'EMP%04d,2024-03-01,Present\n' % n for n in range(500)]
+        response = self.process(StreamingHttpResponse(iter(chunks), content_type='text/csv'))
+        self.assertEqual(response['Content-Encoding'], GZIP)
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+    def test_compress_sequence_round_trips(self):
+        chunks = [b'a' * 10, b'', b'b' * 5000]
+        self.assertEqual(gzip.decompress(b''.join(compress_sequence(iter(chunks), GZIP))), b''.join(chunks))
+
+
+class SearchTermsTests(SimpleTestCase):
+    """Normalized prefix terms stored for the typeahead search"""
+
+    def test_normalize_strips_accents_case_and_extra_whitespace(self):
+        self.assertEqual(normalize_search_text('  José\t  DÍAZ '), 'jose diaz')
+        self.assertEqual(normalize_search_text('Ångström'), 'angstrom')
+        self.assertEqual(normalize_search_text(''), '')
+
+    def test_terms_cover_name_tokens_id_and_email(self):
+        terms = search_terms({
+            'full_name': 'Ana-María  López', 'employee_id': 'EMP-007', 'email': 'Ana.Lopez@Example.com'
+        })
+        self.assertEqual(terms, sorted(terms))
+        for term in ('ana', 'maria', 'lopez', 'ana-maria lopez', 'emp-007',
+                     'ana.lopez@example.com', 'ana.lopez'):
+            self.assertIn(term, terms)
+
+
+class EmployeeSearchTests(MongoTestCase):
+    """GET /api/employees/search/ matches normalized prefixes"""
+
+    def setUp(self):
+        super().setUp()
+        self.db.employees.insert_many([
+            build_employee_document(
+                dict(employee_data(n), full_name=name), datetime(2024, 1, 1)
+            ) for n, name in enumerate(('José Díaz', 'Josephine Diaz', 'Mary Jones'))
+        ])
+
+    def search(self, **params):
+        return Client().get('/api/employees/search/', params)
+
+    def names(self, q, **params):
+        response = self.search(q=q, **params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(employee['full_name'] for employee in response.json()['data'])
+
+    def test_prefix_matches_without_accents_or_case(self):
+        self.assertEqual(self.names('JOS'), ['Josephine Diaz', 'José Díaz'])
+        self.assertEqual(self.names('díaz'), ['Josephine Diaz', 'José Díaz'])
+        self.assertEqual(self.names('jose d'), ['José Díaz'])
+        self.assertEqual(self.names('emp0002'), ['Mary Jones'])
+
+    def test_regex_characters_are_literal(self):
+        self.assertEqual(self.names('.*'), [])
+
+    def test_deleted_employees_are_not_found(self):
+        self.db.employees.update_one({'full_name': 'Mary Jones'}, {'$set': {'deleted_at': datetime(2024, 1, 2)}})
+        self.assertEqual(self.names('mary'), [])
+
+    def test_limit_and_missing_query(self):
+        self.assertEqual(len(self.names('jos', limit=1)), 1)
+        self.assertEqual(self.search().status_code, 400)
+        self.assertEqual(self.search(q='   ').status_code, 400)
+
+
+class EmployeeListPaginationTests(MongoTestCase):
+    """GET /api/employees/ walks every employee exactly once"""
+
+    def setUp(self):
+        super().setUp()
+        # Several employees share a created_at so pages must split ties by _id
+        stamps = [datetime(2024, 1, 1), datetime(2024, 1, 1), datetime(2024, 1, 1),
+                  datetime(2024, 1, 2), datetime(2024, 1, 2), datetime(2024, 1, 3), datetime(2024, 1, 4)]
+        self.db.employees.insert_many([
+            build_employee_document(employee_data(n), stamp) for n, stamp in enumerate(stamps)
+        ])
+
+    def walk(self, **params):
+        client = Client()
+        seen, after = [], None
+        pages = 0
+        while True:
+            response = client.get('/api/employees/', dict(params, after=after) if after else params)
+            pages += 1
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            seen += body['data']
+            after = body['pagination']['next_cursor']
+            if not after:
+                self.pages = pages
+                return seen
+
+    def test_pages_cover_every_employee_once_newest_first(self):
+        seen = self.walk(limit=2)
+        expected = [
+            str(doc['_id']) for doc in self.db.employees.find().sort([('created_at', -1), ('_id', -1)])
+        ]
+        self.assertEqual([employee['id'] for employee in seen], expected)
+        self.assertEqual(self.pages, 4)
+
+    def test_department_pages_are_ordered_by_name(self):
+        seen = self.walk(limit=3, department='Engineering')
+        names = [employee['full_name'] for employee in seen]
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 7)
+
+    def test_search_terms_are_not_returned(self):
+        employee = self.walk(limit=50)[0]
+        self.assertNotIn('search_terms', employee)
+
+    def test_invalid_cursor_is_a_400(self):
+        response = Client().get('/api/employees/', {'after': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+    def test_paginate_returns_lookahead_cursor(self):
+        documents, next_cursor = paginate(
+            self.db.employees, {}, [('created_at', -1), ('_id', -1)], 'created_at', 7
+        )
+        self.assertEqual(len(documents), 7)
+        self.assertIsNone(next_cursor)
+
+
+class ConditionalGetTests(MongoTestCase):
+    """ETag / If-None-Match and Last-Modified on the employee list"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.create(1)
+
+    def create(self, n):
+        response = self.client.post('/api/employees/', employee_data(n), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_matching_etag_is_a_304(self):
+        response = self.client.get('/api/employees/')
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        for header in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            revalidated = self.client.get('/api/employees/', HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertEqual(revalidated.content, b'')
+            self.assertEqual(revalidated['ETag'], etag)
+
+    def test_write_changes_the_etag(self):
+        etag = self.client.get('/api/employees/')['ETag']
+        self.create(2)
+        response = self.client.get('/api/employees/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['data']), 2)
+
+    def test_etag_depends_on_the_query(self):
+        etag = self.client.get('/api/employees/')['ETag']
+        response = self.client.get('/api/employees/', {'limit': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        modified = self.client.get('/api/employees/')['Last-Modified']
+        self.assertEqual(self.client.get('/api/employees/', HTTP_IF_MODIFIED_SINCE=modified).status_code, 304)
+        self.assertEqual(
+            self.client.get('/api/employees/', HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT').status_code,
+            200
+        )
+
+    def test_errors_carry_no_etag(self):
+        response = self.client.get('/api/employees/', {'after': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
+
+
+@override_settings(EMPLOYEE_PURGE_IN_PROCESS=False)
+@mock.patch.object(purge, 'SETTLE_SECONDS', 0)
+class EmployeePurgeTests(MongoTestCase):
+    """Soft delete releases the unique keys; stalled purge jobs are swept up"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        response = self.client.post('/api/employees/', employee_data(1), content_type='application/json')
+        self.employee_id = response.json()['data']['id']
+        self.assertEqual(self.client.delete(f'/api/employees/{self.employee_id}/').status_code, 202)
+
+    def job(self):
+        return self.db.employee_purge_jobs.find_one({'employee_id': self.employee_id})
+
+    def test_deleted_employee_can_be_created_again_before_the_purge(self):
+        response = self.client.post('/api/employees/', employee_data(1), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+        purge.run_pending_jobs()
+        self.assertEqual(
+            [doc['employee_id'] for doc in self.db.employees.find()], [employee_data(1)['employee_id']]
+        )
+
+    def test_sweep_resumes_a_job_whose_runner_died(self):
+        self.db.employee_purge_jobs.update_one({'_id': self.job()['_id']}, {'$set': {
+            'status': purge.RUNNING, 'lease_until': datetime.utcnow() - timedelta(seconds=1),
+        }})
+        purge._sweep_logged()
+        self.assertEqual(self.job()['status'], purge.DONE)
+        self.assertIsNone(self.db.employees.find_one({'_id': ObjectId(self.employee_id)}))
+
+    def test_job_finishes_after_writes_accepted_from_a_stale_cache(self):
+        with mock.patch.object(purge, 'SETTLE_SECONDS', 60):
+            purge.run_pending_jobs()
+        self.assertEqual(self.job()['status'], purge.RUNNING)
+        # Another worker still had the employee cached
+        self.db.attendance.insert_one({'employee_id': self.employee_id, 'date': '2024-03-01', 'status': 'Present'})
+
+        self.db.employee_purge_jobs.update_one({'_id': self.job()['_id']}, {'$set': {
+            'lease_until': datetime.utcnow() - timedelta(seconds=1),
+        }})
+        purge.run_pending_jobs()
+        self.assertEqual(self.job()['status'], purge.DONE)
+        self.assertEqual(self.db.attendance.count_documents({'employee_id': self.employee_id}), 0)
+
+    def test_failed_job_is_left_for_the_sweep(self):
+        with mock.patch.object(purge, '_purge', side_effect=RuntimeError('primary stepped down')), \
+                self.assertLogs('employees.purge', 'ERROR') as logs:
+            purge._run_logged(str(self.job()['_id']))
+        self.assertIn('a sweep retries it once its lease expires', logs.output[0])
+        self.assertEqual(self.job()['status'], purge.RUNNING)
+
+    def test_sweeper_starts_once_per_process(self):
+        with mock.patch.object(purge, '_sweeper_started', False), \
+                mock.patch.object(purge, '_executor') as executor, \
+                mock.patch.object(purge.threading, 'Timer') as timer:
+            purge.start_sweeper(60)
+            purge.start_sweeper(60)
+        executor.submit.assert_called_once_with(purge._sweep_logged)
+        timer.assert_called_once_with(60, mock.ANY)
+        self.assertTrue(timer.return_value.daemon)
+
+
+class OtherWorkerWriteTests(MongoTestCase):
+    """Writes made by another worker are not hidden by this worker's caches"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        response = self.client.post('/api/employees/', employee_data(1, 'Eng'), content_type='application/json')
+        self.employee_id = response.json()['data']['id']
+
+    def other_worker_writes(self):
+        """Soft-delete E1 and add E2 the way another worker would: no local invalidation"""
+        self.db.employees.update_one({'_id': ObjectId(self.employee_id)}, {'$set': {'deleted_at': datetime(2024, 3, 1)}})
+        self.db.employees.insert_one(build_employee_document(employee_data(2, 'Sales'), datetime(2024, 3, 1)))
+        bump_version(EMPLOYEES)
+
+    def test_departments_follow_the_collection_version(self):
+        first = self.client.get('/api/employees/departments/')
+        self.assertEqual([d['department'] for d in first.json()['data']['departments']], ['Eng'])
+
+        self.other_worker_writes()
+        response = self.client.get('/api/employees/departments/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(d['department'], d['headcount']) for d in response.json()['data']['departments']], [('Sales', 1)]
+        )
+
+    def test_cached_employee_is_checked_against_the_etag_versions(self):
+        first = self.client.get(f'/api/employees/{self.employee_id}/')
+        self.assertEqual(first.status_code, 200)
+
+        self.other_worker_writes()
+        response = self.client.get(f'/api/employees/{self.employee_id}/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_cache_is_reused_while_the_version_holds(self):
+        url = f'/api/employees/{self.employee_id}/'
+        self.client.get(url)
+        self.db.employees.update_one({'_id': ObjectId(self.employee_id)}, {'$set': {'full_name': 'Renamed'}})
+        # No version bump, so nothing tells this worker to read it again
+        self.assertEqual(self.client.get(url).json()['data']['full_name'], 'Employee 1')
+
+
+class ImportDuplicateErrorTests(SimpleTestCase):
+    """Duplicate key errors from the server are reported on the right field"""
+
+    def test_key_pattern_names_the_field(self):
+        error = {'code': 11000, 'keyPattern': {'email': 1}, 'errmsg': 'E11000 duplicate key error'}
+        self.assertEqual(_duplicate_errors(error), {'email': ['This email is already registered']})
+
+    def test_index_name_in_message_names_the_field(self):
+        error = {'code': 11000, 'errmsg': 'E11000 duplicate key error collection: hrms.employees '
+                                          'index: employee_id_1 dup key: { employee_id: "E1" }'}
+        self.assertEqual(_duplicate_errors(error), {'employee_id': ['This employee ID already exists']})
+
+    def test_unknown_index_is_a_non_field_error(self):
+        self.assertEqual(_duplicate_errors({'code': 11000, 'errmsg': 'E11000'}),
+                         {'non_field_errors': ['A duplicate entry exists']})
+
+
+class EmployeeImportTests(MongoTestCase):
+    """Row numbers in the import report point at the offending lines"""
+
+    HEADER = 'employee_id,full_name,email,department'
+
+    def run_import(self, rows, chunk_size=2, file_format='csv'):
+        lines = [self.HEADER, *rows] if file_format == 'csv' else rows
+        return import_employees(iter(lines), file_format, chunk_size=chunk_size).as_dict()
+
+    def test_duplicates_map_to_their_own_rows_across_chunks(self):
+        self.db.employees.insert_one(build_employee_document(employee_data(1), datetime(2024, 1, 1)))
+        report = self.run_import([
+            'EMP0002,Employee Two,employee2@example.com,Sales',      # row 2
+            'bad id!,Employee X,x@example.com,Sales',                 # row 3: invalid
+            'EMP0001,Employee One,employee1@example.com,Sales',      # row 4: exists
+            'EMP0003,Employee Three,employee3@example.com,Sales',    # row 5
+            'EMP0003,Employee Three,employee3@example.com,Sales',    # row 6: repeated
+        ])
+        self.assertEqual((report['total'], report['created'], report['failed']), (5, 2, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [3, 4, 6])
+        self.assertIn('employee_id', report['errors'][0]['errors'])
+        self.assertEqual(self.db.employees.count_documents({}), 3)
+
+    def test_ndjson_rows_that_are_not_objects_are_reported(self):
+        report = self.run_import([
+            '{"employee_id": "EMP0002", "full_name": "Two", "email": "two@example.com", "department": "Ops"}',
+            '[1, 2]',
+            'not json',
+        ], file_format='ndjson')
+        self.assertEqual(report['created'], 1)
+        self.assertEqual([error['row'] for error in report['errors']], [2, 3])
+
+    def test_imported_employees_are_searchable(self):
+        self.run_import(['EMP0009,José Díaz,jose@example.com,Ops'])
+        self.assertIn('jose', self.db.employees.find_one()['search_terms'])
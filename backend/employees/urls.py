@@ -1,7 +1,27 @@
+from django.conf import settings
 from django.urls import path
-from .views import EmployeeListCreateView, EmployeeDetailView
+from . import views
+
+# The Motor-backed read views replace their sync counterparts under ASYNC_API;
+# imported only then, so motor is not needed otherwise
+if settings.ASYNC_API:
+    from . import async_views
+
+    EmployeeListCreateView = async_views.AsyncEmployeeListCreateView
+    EmployeeSearchView = async_views.AsyncEmployeeSearchView
+    DepartmentListView = async_views.AsyncDepartmentListView
+    EmployeeDetailView = async_views.AsyncEmployeeDetailView
+else:
+    EmployeeListCreateView = views.EmployeeListCreateView
+    EmployeeSearchView = views.EmployeeSearchView
+    DepartmentListView = views.DepartmentListView
+    EmployeeDetailView = views.EmployeeDetailView
 
 urlpatterns = [
     path('', EmployeeListCreateView.as_view(), name='employee-list-create'),
+    path('import/', views.EmployeeImportView.as_view(), name='employee-import'),
+    path('search/', EmployeeSearchView.as_view(), name='employee-search'),
+    path('departments/', DepartmentListView.as_view(), name='employee-departments'),
+    path('jobs/<str:job_id>/', views.EmployeePurgeJobView.as_view(), name='employee-purge-job'),
     path('<str:pk>/', EmployeeDetailView.as_view(), name='employee-detail'),
 ]
@@ -1,29 +1,119 @@
+import codecs
+import re
 from datetime import datetime
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from bson import ObjectId
+from django.conf import settings
 from pymongo.errors import DuplicateKeyError
 
-from hrms.db import get_employees_collection, get_attendance_collection
-from .serializers import EmployeeSerializer
+from attendance.counters import get_department_counts
+from attendance.views import today_key
+from hrms.cache import get_department_headcounts, get_employee, invalidate_employee
+from hrms.db import get_employees_collection, get_purge_jobs_collection
+from hrms.pagination import (
+    InvalidQueryParam, parse_limit, parse_fields, keyset_filter, paginate, page_meta
+)
+from hrms.versions import EMPLOYEES, ATTENDANCE, bump_version, conditional
+from . import purge
+from .serializers import EmployeeSerializer, build_employee_document, normalize_search_text
+
+
+EMPLOYEE_FIELDS = ('employee_id', 'full_name', 'email', 'department', 'created_at', 'updated_at')
+EMPLOYEE_LIST_SORT = [('created_at', -1), ('_id', -1)]
+# A department's employees are listed by name, on the (department, full_name, _id) index
+EMPLOYEE_DEPARTMENT_SORT = [('full_name', 1), ('_id', 1)]
+
+
+def employee_list_query(params):
+    """Parse list query params into (query, sort, fields, limit, cursor_only).
+
+    The keyset cursor is built from the first sort field; ``cursor_only``
+    names it when it was added to ``fields`` just for the cursor.
+    Raises InvalidQueryParam for a bad limit, cursor or field name.
+    """
+    limit = parse_limit(params.get('limit'))
+    # Listing the fields explicitly keeps internal ones (search_terms) out
+    fields = parse_fields(params.get('fields'), EMPLOYEE_FIELDS) or list(EMPLOYEE_FIELDS)
+    after = params.get('after')
+    department = params.get('department')
+    query = {'deleted_at': {'$exists': False}}
+    sort = EMPLOYEE_LIST_SORT
+    if department:
+        query['department'] = department
+        sort = EMPLOYEE_DEPARTMENT_SORT
+
+    cursor_field, direction = sort[0]
+    if after:
+        query = {'$and': [query, keyset_filter(cursor_field, after, descending=direction == -1)]}
+
+    if cursor_field not in fields:
+        return query, sort, fields + [cursor_field], limit, cursor_field
+    return query, sort, fields, limit, None
+
+
+SEARCH_FIELDS = ('employee_id', 'full_name', 'email', 'department')
+SEARCH_PROJECTION = dict.fromkeys(SEARCH_FIELDS, 1)
+SEARCH_DEFAULT_LIMIT = getattr(settings, 'EMPLOYEE_SEARCH_DEFAULT_LIMIT', 10)
+SEARCH_MAX_LIMIT = getattr(settings, 'EMPLOYEE_SEARCH_MAX_LIMIT', 50)
+
+
+def employee_search_query(params):
+    """Parse search query params into (query, limit).
+
+    ``q`` is normalized like the stored ``search_terms`` and matched as an
+    anchored prefix, which MongoDB answers with a range scan of the
+    multikey index. Raises InvalidQueryParam for a missing q or bad limit.
+    """
+    term = normalize_search_text(params.get('q') or '')
+    if not term:
+        raise InvalidQueryParam('q is required')
+    limit = parse_limit(params.get('limit'), default=SEARCH_DEFAULT_LIMIT, maximum=SEARCH_MAX_LIMIT)
+    query = {
+        'search_terms': {'$regex': '^' + re.escape(term)},
+        'deleted_at': {'$exists': False},
+    }
+    return query, limit
+
+
+def present_search_results(documents):
+    """Search hits with `_id` as a string `id`"""
+    return [dict(doc, id=str(doc.pop('_id'))) for doc in documents]
+
+
+def present_employees(employees, cursor_only):
+    """Drop the cursor field from a list page when it was only read for the cursor"""
+    if cursor_only:
+        for emp in employees:
+            emp.pop(cursor_only, None)
+    return employees
 
 
 class EmployeeListCreateView(APIView):
     """View for listing and creating employees"""
 
+    @conditional(EMPLOYEES)
     def get(self, request):
-        """List all employees"""
-        collection = get_employees_collection()
-        employees = list(collection.find().sort('created_at', -1))
+        """List employees one keyset page at a time: newest first, or by name within a department"""
+        collection = get_employees_collection(secondary=True)
 
-        for emp in employees:
-            emp['id'] = str(emp.pop('_id'))
+        try:
+            query, sort, fields, limit, cursor_only = employee_list_query(request.query_params)
+        except InvalidQueryParam as e:
+            return Response({
+                'success': False,
+                'message': str(e),
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        employees, next_cursor = paginate(collection, query, sort, sort[0][0], limit, fields)
 
         return Response({
             'success': True,
             'message': 'Employees retrieved successfully',
-            'data': employees
+            'data': present_employees(employees, cursor_only),
+            'pagination': page_meta(limit, next_cursor)
         })
 
     def post(self, request):
@@ -42,19 +132,15 @@ class EmployeeListCreateView(APIView):
 
         # Prepare document
         now = datetime.utcnow()
-        document = {
-            'employee_id': data['employee_id'],
-            'full_name': data['full_name'],
-            'email': data['email'],
-            'department': data['department'],
-            'created_at': now,
-            'updated_at': now
-        }
+        document = build_employee_document(data, now)
 
         try:
             result = collection.insert_one(document)
+            invalidate_employee(result.inserted_id)
+            bump_version(EMPLOYEES)
             document['id'] = str(result.inserted_id)
             document.pop('_id', None)
+            document.pop('search_terms', None)
 
             return Response({
                 'success': True,
@@ -84,15 +170,144 @@ class EmployeeListCreateView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
 
+class EmployeeImportView(APIView):
+    """View for bulk importing employees from a CSV or NDJSON request body"""
+
+    CONTENT_TYPES = {
+        'text/csv': 'csv',
+        'application/x-ndjson': 'ndjson',
+        'application/ndjson': 'ndjson',
+    }
+
+    def post(self, request):
+        """Stream-parse the raw body and import it in chunks"""
+        content_type = request.content_type.split(';')[0].strip().lower()
+        file_format = self.CONTENT_TYPES.get(content_type)
+        if file_format is None:
+            return Response({
+                'success': False,
+                'message': 'Content-Type must be text/csv or application/x-ndjson',
+                'errors': {}
+            }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        # Imported here: bulk imports are rare and the importer is not worth
+        # loading in every worker at startup
+        from .importer import import_employees
+
+        # Read the underlying Django request line by line instead of
+        # buffering the body through a parser
+        lines = codecs.iterdecode(request._request, 'utf-8-sig')
+        try:
+            report = import_employees(lines, file_format)
+            if report.created:
+                bump_version(EMPLOYEES)
+        except UnicodeDecodeError:
+            return Response({
+                'success': False,
+                'message': 'Request body must be UTF-8 encoded',
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'success': True,
+            'message': f'Imported {report.created} of {report.total} employees',
+            'data': report.as_dict()
+        }, status=status.HTTP_201_CREATED if report.created else status.HTTP_200_OK)
+
+
+class EmployeeSearchView(APIView):
+    """Typeahead search over employee name, employee ID and email"""
+
+    def get(self, request):
+        """Return up to `limit` employees with a term starting with `q`"""
+        try:
+            query, limit = employee_search_query(request.query_params)
+        except InvalidQueryParam as e:
+            return Response({
+                'success': False,
+                'message': str(e),
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        cursor = get_employees_collection(secondary=True).find(query, SEARCH_PROJECTION).limit(limit)
+
+        return Response({
+            'success': True,
+            'message': 'Employees retrieved successfully',
+            'data': present_search_results(list(cursor))
+        })
+
+
+def departments_payload(today, headcounts, counts):
+    """Departments by name with headcount and today's present/absent/unmarked"""
+    departments = []
+    for name in sorted(headcounts):
+        present, absent = counts.get(name, (0, 0))
+        departments.append({
+            'department': name,
+            'headcount': headcounts[name],
+            'today': {
+                'present': present,
+                'absent': absent,
+                'unmarked': max(headcounts[name] - present - absent, 0),
+            }
+        })
+    return {
+        'success': True,
+        'message': 'Departments retrieved successfully',
+        'data': {'date': today, 'departments': departments}
+    }
+
+
+class DepartmentListView(APIView):
+    """View for per-department headcount and today's attendance"""
+
+    @conditional(EMPLOYEES, ATTENDANCE, extra=today_key)
+    def get(self, request):
+        """List departments with headcount and today's present/absent/unmarked"""
+        today = today_key()
+        headcounts = get_department_headcounts(request.collection_versions)
+        counts = get_department_counts(today)
+
+        return Response(departments_payload(today, headcounts, counts))
+
+
+class EmployeePurgeJobView(APIView):
+    """View for the status of a background attendance purge job"""
+
+    def get(self, request, job_id):
+        """Get purge job status"""
+        try:
+            job = get_purge_jobs_collection().find_one({'_id': ObjectId(job_id)})
+        except Exception:
+            return Response({
+                'success': False,
+                'message': 'Invalid job ID format',
+                'errors': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not job:
+            return Response({
+                'success': False,
+                'message': 'Job not found',
+                'errors': {}
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'success': True,
+            'message': 'Job retrieved successfully',
+            'data': purge.job_status(job)
+        })
+
+
 class EmployeeDetailView(APIView):
     """View for retrieving and deleting a single employee"""
 
+    @conditional(EMPLOYEES)
     def get(self, request, pk):
         """Get employee details"""
-        collection = get_employees_collection()
-
         try:
-            employee = collection.find_one({'_id': ObjectId(pk)})
+            employee = get_employee(pk, versions=request.collection_versions)
         except Exception:
             return Response({
                 'success': False,
@@ -116,12 +331,9 @@ class EmployeeDetailView(APIView):
         })
 
     def delete(self, request, pk):
-        """Delete an employee"""
-        employees_collection = get_employees_collection()
-        attendance_collection = get_attendance_collection()
-
+        """Soft-delete an employee and queue the purge of its attendance"""
         try:
-            employee = employees_collection.find_one({'_id': ObjectId(pk)})
+            employee = get_employee(pk, include_deleted=True, fresh=True)
         except Exception:
             return Response({
                 'success': False,
@@ -136,14 +348,12 @@ class EmployeeDetailView(APIView):
                 'errors': {}
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Delete employee's attendance records first
-        attendance_collection.delete_many({'employee_id': str(pk)})
-
-        # Delete the employee
-        employees_collection.delete_one({'_id': ObjectId(pk)})
+        # Soft-delete now; attendance is purged in the background
+        job = purge.soft_delete_employee(employee)
+        purge.schedule(job)
 
         return Response({
             'success': True,
             'message': 'Employee deleted successfully',
-            'data': None
-        })
+            'data': {'job': purge.job_status(job)}
+        }, status=status.HTTP_202_ACCEPTED)
@@ -3,5 +3,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hrms.settings')
+# Serve the read endpoints with the Motor-backed async views
+os.environ.setdefault('HRMS_ASYNC_API', 'True')
 
 application = get_asgi_application()
+
+# Imported once Django is set up, as it reads the settings; answers lifespan
+# events and warms the Motor client at startup when HRMS_WARMUP is on
+from hrms.warmup import lifespan  # noqa: E402
+
+application = lifespan(application)
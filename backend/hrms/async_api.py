@@ -0,0 +1,60 @@
+"""Helpers shared by the async (ASGI) views.
+
+The async views serve the read endpoints with Motor; writes are delegated to
+the existing DRF views in a worker thread so validation and error handling
+stay in one place.
+
+Two endpoints stay on their sync views under ASGI. The export is a single
+long PyMongo cursor fed to the encoder; ``export.aiter_chunks`` already
+pulls it from a worker thread in groups, so a Motor port would only move
+the same cursor onto the loop. The employee import is a write and reads its
+body line by line from the sync request, so it runs on a worker thread like
+the other writes.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def json_response(payload, status=200):
+    """JSON response encoded the same way as the configured DRF renderer"""
+    if settings.FAST_JSON_RENDERER:
+        from hrms.renderers import dumps
+        return HttpResponse(dumps(payload), status=status, content_type='application/json')
+    return JsonResponse(payload, status=status, encoder=JSONEncoder, safe=False)
+
+
+def error_response(message, status=400, errors=None):
+    return json_response({
+        'success': False,
+        'message': message,
+        'errors': errors or {}
+    }, status=status)
+
+
+def delegate(view_class):
+    """Async handler that runs a DRF view's handler in a worker thread"""
+    sync_view = view_class.as_view()
+
+    def call(request, *args, **kwargs):
+        response = sync_view(request, *args, **kwargs)
+        # Render in the worker thread rather than on the event loop
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    async def handler(self, request, *args, **kwargs):
+        return await sync_to_async(call, thread_sensitive=False)(request, *args, **kwargs)
+
+    return handler
+
+
+class AsyncAPIView(View):
+    """Base class for the async API views (CSRF-exempt like DRF's APIView)"""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
@@ -0,0 +1,80 @@
+"""Motor (asyncio) access to MongoDB for the async views.
+
+Mirrors ``hrms/db.py``: same settings, same collections, same read
+preference for list reads. A Motor client is bound to the event loop it was
+first used on, so one client is kept per process and loop.
+"""
+import asyncio
+import os
+
+from django.conf import settings
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from hrms.db import client_options, read_preference_for_lists
+
+_client = None
+_db = None
+_owner = None
+
+
+def get_async_db():
+    """Get the Motor database for the running event loop"""
+    global _client, _db, _owner
+    owner = (os.getpid(), asyncio.get_running_loop())
+    if _db is None or _owner != owner:
+        _client = AsyncIOMotorClient(settings.MONGODB_URI, **client_options())
+        _db = _client[settings.MONGODB_NAME]
+        _owner = owner
+    return _db
+
+
+def _collection(name, secondary=False):
+    collection = get_async_db()[name]
+    if secondary:
+        collection = collection.with_options(read_preference=read_preference_for_lists())
+    return collection
+
+
+def get_employees_collection(secondary=False):
+    """Get employees collection; secondary=True applies the list read preference"""
+    return _collection('employees', secondary)
+
+
+def get_attendance_collection(secondary=False):
+    """Get attendance collection; secondary=True applies the list read preference"""
+    return _collection('attendance', secondary)
+
+
+def get_attendance_archive_collection(secondary=False):
+    """Get archived attendance buckets collection"""
+    return _collection('attendance_archive', secondary)
+
+
+def get_daily_counters_collection(secondary=False):
+    """Get per-day attendance counters collection"""
+    return _collection('attendance_daily_counters', secondary)
+
+
+def get_employee_counters_collection(secondary=False):
+    """Get per-employee attendance counters collection"""
+    return _collection('attendance_employee_counters', secondary)
+
+
+def get_department_counters_collection(secondary=False):
+    """Get per-department, per-day attendance counters collection"""
+    return _collection('attendance_department_counters', secondary)
+
+
+def get_monthly_rollups_collection(secondary=False):
+    """Get per-employee monthly attendance rollups collection"""
+    return _collection('attendance_monthly_rollups', secondary)
+
+
+def get_department_rollups_collection(secondary=False):
+    """Get per-department monthly attendance rollups collection"""
+    return _collection('attendance_department_rollups', secondary)
+
+
+def get_versions_collection(secondary=False):
+    """Get collection version stamps; secondary=True applies the list read preference"""
+    return _collection('collection_versions', secondary)
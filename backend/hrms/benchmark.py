@@ -0,0 +1,159 @@
+"""Synthetic data and request timing for ``manage.py benchmark_api``.
+
+The benchmark seeds a dedicated database with generated employees and
+attendance, then drives the API through Django's test client so the whole
+stack (middleware, views, renderer, MongoDB) is measured. Results are plain
+dicts so they can be saved as JSON and compared across commits.
+"""
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from bson import ObjectId
+
+from attendance.dates import to_storage
+from employees.serializers import search_terms
+
+DEPARTMENTS = (
+    'Engineering', 'Human Resources', 'Marketing', 'Sales',
+    'Finance', 'Operations', 'Design', 'Product',
+)
+FIRST_NAMES = ('Asha', 'Ben', 'Chen', 'Diego', 'Elena', 'Farah', 'Gopal', 'Hana', 'Ivan', 'Jia')
+LAST_NAMES = ('Khan', 'Lopez', 'Meyer', 'Nair', 'Okafor', 'Patel', 'Quinn', 'Rossi', 'Sato', 'Tran')
+INSERT_BATCH_SIZE = 10000
+# Untimed requests sent before each endpoint is measured
+WARMUP_REQUESTS = 2
+
+
+def seed(db, employees, days, present_ratio=0.9, seed_value=42):
+    """Insert `employees` employees and `days` weekdays of attendance each.
+
+    Returns the list of employee _id strings.
+    """
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    employee_docs = []
+    for i in range(employees):
+        employee = {
+            '_id': ObjectId(),
+            'employee_id': f'EMP{i:06d}',
+            'full_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i:06d}',
+            'email': f'employee{i:06d}@example.com',
+            'department': DEPARTMENTS[i % len(DEPARTMENTS)],
+            'created_at': now - timedelta(seconds=employees - i),
+            'updated_at': now,
+        }
+        employee['search_terms'] = search_terms(employee)
+        employee_docs.append(employee)
+    for start in range(0, len(employee_docs), INSERT_BATCH_SIZE):
+        db.employees.insert_many(employee_docs[start:start + INSERT_BATCH_SIZE], ordered=False)
+
+    work_days = []
+    day = date.today()
+    while len(work_days) < days:
+        if day.weekday() < 5:
+            work_days.append(day.isoformat())
+        day -= timedelta(days=1)
+
+    batch = []
+    for employee in employee_docs:
+        employee_id = str(employee['_id'])
+        for work_day in work_days:
+            batch.append({
+                'employee_id': employee_id,
+                'date': to_storage(work_day),
+                'status': 'Present' if rng.random() < present_ratio else 'Absent',
+                'created_at': now,
+            })
+            if len(batch) >= INSERT_BATCH_SIZE:
+                db.attendance.insert_many(batch, ordered=False)
+                batch = []
+    if batch:
+        db.attendance.insert_many(batch, ordered=False)
+
+    return [str(employee['_id']) for employee in employee_docs]
+
+
+def create_employees(db, count, prefix, department='Engineering'):
+    """Insert `count` employees with no attendance; returns their _id strings.
+
+    Used for the write benchmarks, which need a fresh employee per request.
+    ``prefix`` keeps the employee IDs and emails unique across runs.
+    """
+    now = datetime.utcnow()
+    docs = []
+    for i in range(count):
+        employee = {
+            'employee_id': f'{prefix}{i:06d}',
+            'full_name': f'Benchmark Employee {prefix}{i:06d}',
+            'email': f'{prefix.lower()}{i:06d}@example.com',
+            'department': department,
+            'created_at': now,
+            'updated_at': now,
+        }
+        employee['search_terms'] = search_terms(employee)
+        docs.append(employee)
+    if not docs:
+        return []
+    return [str(object_id) for object_id in db.employees.insert_many(docs).inserted_ids]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _consume(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure(client, method, path, iterations, warmup=WARMUP_REQUESTS, body_factory=None,
+            content_type='application/json'):
+    """Time `iterations` requests; returns latency percentiles and peak memory.
+
+    ``path`` is a path, or a callable returning a new path for every request
+    (for requests that use up what they target, such as DELETE). Paths and
+    bodies are built before each request is timed.
+    """
+    def send():
+        kwargs = {}
+        if body_factory is not None:
+            kwargs = {'data': body_factory(), 'content_type': content_type}
+        request_path = path() if callable(path) else path
+        started = time.perf_counter()
+        response = getattr(client, method)(request_path, **kwargs)
+        return response, _consume(response), (time.perf_counter() - started) * 1000
+
+    for _ in range(warmup):
+        send()
+
+    timings = []
+    statuses = set()
+    size = 0
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for _ in range(iterations):
+        response, size, elapsed_ms = send()
+        timings.append(elapsed_ms)
+        statuses.add(response.status_code)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'statuses': sorted(statuses),
+        'response_bytes': size,
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
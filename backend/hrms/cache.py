@@ -0,0 +1,257 @@
+"""In-process employee cache.
+
+Employee documents change rarely but are read on almost every request, so
+lookups by ``_id`` go through a bounded LRU cache with a TTL. The write paths
+in ``employees/views.py`` call ``invalidate_employee`` so a worker never serves
+an employee it has itself changed; the TTL bounds staleness across workers.
+
+That staleness is fine for rendering names, but not for accepting writes:
+another worker may have soft-deleted the employee. The attendance create and
+bulk paths and the delete view therefore pass ``fresh=True``, which reads the
+employee from the primary and refreshes this worker's entry. The PUT path
+does not, so a write stays one round trip; the purge job removes what it
+accepts for an employee deleted within the TTL.
+
+Nor is it fine under an ``ETag``: the ``conditional`` views derive it from
+collection versions, so a stale body would be pinned by 304s until the next
+write. Entries are stamped with the ``EMPLOYEES`` version they were read
+under, and those views pass ``request.collection_versions`` so an entry
+older than the versions behind the ETag is read again.
+
+Per-department headcounts are cached as a single entry stamped with the
+``EMPLOYEES`` collection version it was computed under (``hrms.versions``).
+Every employee write bumps that version, so a write made by any worker
+makes the next read recompute, instead of clearing only the writing
+worker's copy.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from bson import ObjectId
+from django.conf import settings
+
+from hrms.db import get_employees_collection
+from hrms.versions import EMPLOYEES, aget_versions, get_versions
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+employee_cache = TTLCache(
+    maxsize=getattr(settings, 'EMPLOYEE_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'EMPLOYEE_CACHE_TTL', 300),
+)
+
+# search_terms is only used by the search index, so it is not cached
+EMPLOYEE_PROJECTION = {'search_terms': 0}
+
+department_cache = TTLCache(maxsize=1, ttl=getattr(settings, 'DEPARTMENT_CACHE_TTL', 300))
+DEPARTMENT_HEADCOUNTS = 'headcounts'
+
+
+def _employees_version(versions):
+    return versions[EMPLOYEES].get('version', 0)
+
+
+def _cached_employee(key, versions):
+    """The cached employee, or None when missing or older than ``versions``"""
+    entry = employee_cache.get(key)
+    if entry is None:
+        return None
+    stamp, employee = entry
+    if versions is not None and (stamp is None or stamp < _employees_version(versions)):
+        return None
+    return employee
+
+
+def _cache_employee(key, employee, versions):
+    # The versions were read before the employee, so it is at least that new
+    employee_cache.set(key, (None if versions is None else _employees_version(versions), employee))
+
+
+def get_employee(employee_id, include_deleted=False, fresh=False, versions=None):
+    """Get an employee document by its _id string, or None if it does not exist.
+
+    Soft-deleted employees are treated as missing unless include_deleted is
+    set; fresh skips the cache, and versions (collection versions read
+    before this call) skip entries cached under an older EMPLOYEES version.
+    Raises bson.errors.InvalidId for a malformed id.
+    """
+    object_id = ObjectId(employee_id)
+    key = str(object_id)
+    employee = None if fresh else _cached_employee(key, versions)
+    if employee is None:
+        employee = get_employees_collection().find_one({'_id': object_id}, EMPLOYEE_PROJECTION)
+        if employee is None:
+            employee_cache.delete(key)
+            return None
+        _cache_employee(key, employee, versions)
+    if employee.get('deleted_at') and not include_deleted:
+        return None
+    return dict(employee)
+
+
+def _split_cached(employee_ids, fresh, versions):
+    """({id: employee} found in the cache, [ObjectId] to fetch)"""
+    found = {}
+    missing = []
+    for emp_id in set(employee_ids):
+        if not emp_id or not ObjectId.is_valid(emp_id):
+            continue
+        employee = None if fresh else _cached_employee(emp_id, versions)
+        if employee is None:
+            missing.append(ObjectId(emp_id))
+        elif not employee.get('deleted_at'):
+            found[emp_id] = dict(employee)
+    return found, missing
+
+
+def _add_fetched(found, employee, versions):
+    key = str(employee['_id'])
+    _cache_employee(key, employee, versions)
+    if not employee.get('deleted_at'):
+        found[key] = dict(employee)
+
+
+def get_employees(employee_ids, fresh=False, versions=None):
+    """Get several employees keyed by _id string, fetching misses with one $in query.
+
+    Soft-deleted employees are left out; fresh and versions as for get_employee.
+    """
+    found, missing = _split_cached(employee_ids, fresh, versions)
+    if missing:
+        for employee in get_employees_collection().find({'_id': {'$in': missing}}, EMPLOYEE_PROJECTION):
+            _add_fetched(found, employee, versions)
+    return found
+
+
+def invalidate_employee(employee_id):
+    """Drop an employee from the cache after it was written"""
+    employee_cache.delete(str(employee_id))
+
+
+DEPARTMENT_HEADCOUNTS_PIPELINE = [
+    {'$match': {'deleted_at': {'$exists': False}}},
+    {'$group': {'_id': '$department', 'headcount': {'$sum': 1}}},
+]
+
+
+def _cached_headcounts(version):
+    entry = department_cache.get(DEPARTMENT_HEADCOUNTS)
+    if entry is not None and entry[0] == version:
+        return dict(entry[1])
+    return None
+
+
+def get_department_headcounts(versions=None):
+    """Active employees per department as {department: headcount}.
+
+    ``versions`` are collection versions the caller already read (the
+    ``conditional`` views pass ``request.collection_versions``); without
+    them the EMPLOYEES version is looked up. The versions are read before
+    the aggregation, so a cached result is never older than its stamp.
+    """
+    version = _employees_version(versions or get_versions((EMPLOYEES,)))
+    headcounts = _cached_headcounts(version)
+    if headcounts is None:
+        cursor = get_employees_collection().aggregate(DEPARTMENT_HEADCOUNTS_PIPELINE)
+        headcounts = {doc['_id']: doc['headcount'] for doc in cursor}
+        department_cache.set(DEPARTMENT_HEADCOUNTS, (version, headcounts))
+    return dict(headcounts)
+
+
+async def aget_employee(employee_id, include_deleted=False, versions=None):
+    """Async counterpart of get_employee for the Motor-backed views"""
+    # Imported here so motor is only required when the async API is enabled
+    from hrms.async_db import get_employees_collection as get_async_employees_collection
+
+    object_id = ObjectId(employee_id)
+    key = str(object_id)
+    employee = _cached_employee(key, versions)
+    if employee is None:
+        employee = await get_async_employees_collection().find_one({'_id': object_id}, EMPLOYEE_PROJECTION)
+        if employee is None:
+            return None
+        _cache_employee(key, employee, versions)
+    if employee.get('deleted_at') and not include_deleted:
+        return None
+    return dict(employee)
+
+
+async def aget_employees(employee_ids, versions=None):
+    """Async counterpart of get_employees for the Motor-backed views"""
+    from hrms.async_db import get_employees_collection as get_async_employees_collection
+
+    found, missing = _split_cached(employee_ids, False, versions)
+    if missing:
+        async for employee in get_async_employees_collection().find({'_id': {'$in': missing}}, EMPLOYEE_PROJECTION):
+            _add_fetched(found, employee, versions)
+    return found
+
+
+async def aget_department_headcounts(versions=None):
+    """Async counterpart of get_department_headcounts"""
+    from hrms.async_db import get_employees_collection as get_async_employees_collection
+
+    version = _employees_version(versions or await aget_versions((EMPLOYEES,)))
+    headcounts = _cached_headcounts(version)
+    if headcounts is None:
+        cursor = get_async_employees_collection().aggregate(DEPARTMENT_HEADCOUNTS_PIPELINE)
+        headcounts = {doc['_id']: doc['headcount'] async for doc in cursor}
+        department_cache.set(DEPARTMENT_HEADCOUNTS, (version, headcounts))
+    return dict(headcounts)
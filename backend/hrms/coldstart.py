@@ -0,0 +1,28 @@
+"""Minimal WSGI server used by ``manage.py benchmark_cold_start``.
+
+Run as ``python -m hrms.coldstart`` from the backend directory. It loads the
+WSGI application exactly as a gunicorn worker does, prints the port it
+listens on once the application is loaded, and serves on one thread until
+killed. The port line lets the parent separate process startup from the
+first request.
+"""
+import os
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hrms.settings')
+    from hrms.wsgi import application
+
+    server = make_server('127.0.0.1', 0, application, handler_class=QuietHandler)
+    print(server.server_port, flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
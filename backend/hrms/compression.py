@@ -0,0 +1,176 @@
+"""Response compression.
+
+``CompressionMiddleware`` encodes responses with Brotli (when the ``brotli``
+package is installed) or gzip, whichever the client prefers in
+``Accept-Encoding``. Only content types in ``COMPRESSION_CONTENT_TYPES`` are
+compressed, and buffered responses only from ``COMPRESSION_MIN_SIZE`` bytes,
+since below about a kilobyte the headers and CPU cost outweigh the savings.
+
+Streaming responses (the attendance export) are compressed incrementally:
+chunks go through one compressor object and whatever it emits is passed on,
+so memory stays constant and the body still streams. Async iterators are
+wrapped the same way under ASGI.
+
+The ``ETag`` of a compressed response is made weak, as the bytes differ from
+the identity encoding; ``hrms.versions.conditional`` already compares
+``If-None-Match`` weakly. Static files are left alone, WhiteNoise serves
+its own precompressed copies.
+"""
+import gzip
+import importlib.util
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+MIN_SIZE = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+CONTENT_TYPES = tuple(getattr(settings, 'COMPRESSION_CONTENT_TYPES', (
+    'application/json', 'application/x-ndjson', 'text/csv', 'text/plain',
+)))
+GZIP_LEVEL = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+BROTLI_QUALITY = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4)
+
+BROTLI = 'br'
+GZIP = 'gzip'
+# Server preference when the client ranks encodings equally
+ENCODINGS = (BROTLI, GZIP) if importlib.util.find_spec('brotli') is not None else (GZIP,)
+
+_accept_re = re.compile(r'^\s*([^\s;]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def choose_encoding(accept_encoding, encodings=ENCODINGS):
+    """Supported encoding with the highest q-value in Accept-Encoding, or None"""
+    weights = {}
+    for item in accept_encoding.lower().split(','):
+        match = _accept_re.match(item)
+        if not match:
+            continue
+        try:
+            weights[match.group(1)] = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+    best, best_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body, encoding):
+    """Compress a complete body"""
+    if encoding == BROTLI:
+        import brotli
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class _GzipStream:
+    def __init__(self):
+        # wbits=31 writes the gzip header and trailer
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def process(self, chunk):
+        return self._compressor.compress(chunk)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        import brotli
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def process(self, chunk):
+        return self._compressor.process(chunk)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def _stream(encoding):
+    return _BrotliStream() if encoding == BROTLI else _GzipStream()
+
+
+def compress_sequence(chunks, encoding):
+    """Compress an iterator of byte chunks, yielding only non-empty output"""
+    stream = _stream(encoding)
+    for chunk in chunks:
+        data = stream.process(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+async def acompress_sequence(chunks, encoding):
+    """Async counterpart of compress_sequence"""
+    stream = _stream(encoding)
+    async for chunk in chunks:
+        data = stream.process(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+def _compressible(response):
+    if response.has_header('Content-Encoding') or response.status_code < 200 or response.status_code in (204, 304):
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type in CONTENT_TYPES
+
+
+def _weaken_etag(response):
+    etag = response.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response['ETag'] = 'W/' + etag
+
+
+class CompressionMiddleware:
+    """Compresses allowed content types with Brotli or gzip"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def process_response(self, request, response):
+        if not _compressible(response):
+            return response
+        # Caches must key on Accept-Encoding whether or not this one is compressed
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_sequence(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_sequence(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            if len(response.content) < MIN_SIZE:
+                return response
+            body = compress(response.content, encoding)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        _weaken_etag(response)
+        response['Content-Encoding'] = encoding
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
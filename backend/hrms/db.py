@@ -1,40 +1,145 @@
-from pymongo import MongoClient
+import os
+import threading
+
+from pymongo import MongoClient, ReadPreference
 from django.conf import settings
 
+from hrms.metrics import command_listener
+
 _client = None
 _db = None
+_pid = None
+_lock = threading.Lock()
+
+READ_PREFERENCES = {
+    'primary': ReadPreference.PRIMARY,
+    'primaryPreferred': ReadPreference.PRIMARY_PREFERRED,
+    'secondary': ReadPreference.SECONDARY,
+    'secondaryPreferred': ReadPreference.SECONDARY_PREFERRED,
+    'nearest': ReadPreference.NEAREST,
+}
+
+
+def client_options():
+    """MongoClient keyword arguments from settings"""
+    options = {
+        'maxPoolSize': settings.MONGODB_MAX_POOL_SIZE,
+        'minPoolSize': settings.MONGODB_MIN_POOL_SIZE,
+        'waitQueueTimeoutMS': settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        'connectTimeoutMS': settings.MONGODB_CONNECT_TIMEOUT_MS,
+        'socketTimeoutMS': settings.MONGODB_SOCKET_TIMEOUT_MS,
+        'retryWrites': True,
+        'retryReads': True,
+        'event_listeners': [command_listener],
+    }
+    if settings.MONGODB_COMPRESSORS:
+        options['compressors'] = settings.MONGODB_COMPRESSORS
+    return options
 
 
 def get_db():
-    """Get MongoDB database connection"""
-    global _client, _db
-    if _db is None:
-        _client = MongoClient(settings.MONGODB_URI)
-        _db = _client[settings.MONGODB_NAME]
-        _setup_indexes()
+    """Get MongoDB database connection.
+
+    The client is created lazily once per process. MongoClient is not
+    fork-safe, so a worker forked after the parent connected (gunicorn
+    --preload) gets its own client instead of sharing the parent's sockets.
+    """
+    global _client, _db, _pid
+    pid = os.getpid()
+    if _db is None or _pid != pid:
+        with _lock:
+            if _db is None or _pid != pid:
+                # The parent's client is deliberately not closed here: its
+                # sockets belong to the parent process
+                client = MongoClient(settings.MONGODB_URI, **client_options())
+                db = client[settings.MONGODB_NAME]
+                # Published only once the indexes are in place, so a failure
+                # is raised again on the next call instead of being skipped
+                _setup_indexes(db)
+                _client, _db, _pid = client, db, pid
     return _db
 
 
-def _setup_indexes():
-    """Setup database indexes"""
-    db = _db
+def read_preference_for_lists():
+    """Read preference used by the list and dashboard views"""
+    return READ_PREFERENCES[settings.MONGODB_LIST_READ_PREFERENCE]
+
+
+def _collection(name, secondary=False):
+    collection = get_db()[name]
+    if secondary:
+        collection = collection.with_options(read_preference=read_preference_for_lists())
+    return collection
+
+
+def _setup_indexes(db):
+    """Make sure the unique indexes exist; create the rest only when enabled.
+
+    The unique indexes carry the data model (one attendance record per
+    employee and day, unique employee ids and emails), so every worker
+    creates any that are missing and raises ImproperlyConfigured if one
+    cannot be created. The other indexes are only about speed and are built
+    by ``manage.py ensure_indexes`` at deploy time, or here with
+    ``MONGODB_ENSURE_INDEXES_ON_CONNECT``.
+    """
+    from hrms.indexes import ensure_indexes, ensure_unique_indexes
+
+    if settings.MONGODB_ENSURE_INDEXES_ON_CONNECT:
+        ensure_indexes(db)
+    ensure_unique_indexes(db)
+
+
+def get_employees_collection(secondary=False):
+    """Get employees collection; secondary=True applies the list read preference"""
+    return _collection('employees', secondary)
+
+
+def get_attendance_collection(secondary=False):
+    """Get attendance collection; secondary=True applies the list read preference"""
+    return _collection('attendance', secondary)
+
+
+def get_attendance_archive_collection(secondary=False):
+    """Get archived attendance buckets collection (attendance/archive.py)"""
+    return _collection('attendance_archive', secondary)
+
+
+def get_daily_counters_collection(secondary=False):
+    """Get per-day attendance counters collection"""
+    return _collection('attendance_daily_counters', secondary)
+
+
+def get_employee_counters_collection(secondary=False):
+    """Get per-employee attendance counters collection"""
+    return _collection('attendance_employee_counters', secondary)
+
+
+def get_department_counters_collection(secondary=False):
+    """Get per-department, per-day attendance counters collection"""
+    return _collection('attendance_department_counters', secondary)
+
+
+def get_monthly_rollups_collection(secondary=False):
+    """Get per-employee monthly attendance rollups collection"""
+    return _collection('attendance_monthly_rollups', secondary)
+
+
+def get_department_rollups_collection(secondary=False):
+    """Get per-department monthly attendance rollups collection"""
+    return _collection('attendance_department_rollups', secondary)
 
-    # Employee indexes
-    db.employees.create_index('employee_id', unique=True)
-    db.employees.create_index('email', unique=True)
 
-    # Attendance indexes - compound unique index
-    db.attendance.create_index(
-        [('employee_id', 1), ('date', 1)],
-        unique=True
-    )
+def get_purge_jobs_collection():
+    """Get employee attendance purge jobs collection"""
+    return _collection('employee_purge_jobs')
 
 
-def get_employees_collection():
-    """Get employees collection"""
-    return get_db().employees
+def get_migrations_collection():
+    """Get data migration checkpoints collection"""
+    return _collection('data_migrations')
 
 
-def get_attendance_collection():
-    """Get attendance collection"""
-    return get_db().attendance
+def get_versions_collection(secondary=False):
+    """Get collection version stamps; secondary=True applies the list read preference"""
+    return _collection('collection_versions', secondary)
@@ -0,0 +1,165 @@
+"""Declarative MongoDB index specification.
+
+Indexes are created by ``manage.py ensure_indexes`` at deploy time rather
+than on the first request a worker serves. The unique ones are the
+exception: correctness depends on them, so ``hrms.db.get_db`` also makes
+sure they exist when a worker connects (``ensure_unique_indexes``). Each
+entry is ``(keys, options)`` in the form accepted by
+``Collection.create_index``.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+
+INDEXES = {
+    'employees': [
+        ([('employee_id', ASCENDING)], {'unique': True}),
+        ([('email', ASCENDING)], {'unique': True}),
+        # Keyset pagination for the employee list: (created_at, _id) newest first
+        ([('created_at', DESCENDING), ('_id', DESCENDING)], {}),
+        # Soft-deleted employees awaiting purge (few, hence sparse)
+        ([('deleted_at', ASCENDING)], {'sparse': True}),
+        # Department filter on the employee list, ordered by name; _id breaks
+        # ties for the keyset cursor
+        ([('department', ASCENDING), ('full_name', ASCENDING), ('_id', ASCENDING)], {}),
+        # Typeahead search: anchored prefix regexes on the normalized terms
+        ([('search_terms', ASCENDING)], {}),
+    ],
+    'attendance': [
+        # One record per employee per day; also serves per-employee history
+        ([('employee_id', ASCENDING), ('date', ASCENDING)], {'unique': True}),
+        # Keyset pagination for the attendance list: (date, _id) newest first
+        ([('date', DESCENDING), ('_id', DESCENDING)], {}),
+        # Daily present/absent counts and status-filtered date scans
+        ([('date', ASCENDING), ('status', ASCENDING)], {}),
+        # Per-employee present/absent aggregations
+        ([('status', ASCENDING), ('employee_id', ASCENDING)], {}),
+    ],
+    'attendance_archive': [
+        # One employee's archived buckets in date order (history, purge)
+        ([('employee_id', ASCENDING), ('first_date', ASCENDING)], {}),
+        # Archive reads across employees for a date range
+        ([('first_date', ASCENDING), ('_id', ASCENDING)], {}),
+    ],
+    'attendance_employee_counters': [
+        # Dashboard employee_stats is read highest first
+        ([('present_days', DESCENDING)], {}),
+    ],
+    'attendance_department_counters': [
+        # Today's present/absent per department for the departments endpoint
+        ([('date', ASCENDING), ('department', ASCENDING)], {}),
+    ],
+    'employee_purge_jobs': [
+        ([('employee_id', ASCENDING)], {'unique': True}),
+        ([('status', ASCENDING), ('created_at', ASCENDING)], {}),
+    ],
+    'attendance_monthly_rollups': [
+        # Employee x month report for a department
+        ([('department', ASCENDING), ('month', ASCENDING)], {}),
+        # Removing a deleted employee's months
+        ([('employee_id', ASCENDING), ('month', ASCENDING)], {}),
+    ],
+    'attendance_department_rollups': [
+        # Department x month report
+        ([('month', ASCENDING), ('department', ASCENDING)], {}),
+    ],
+}
+
+# Options that make two indexes on the same keys different, with their defaults
+COMPARED_OPTIONS = {
+    'unique': False,
+    'sparse': False,
+    'partialFilterExpression': None,
+    'expireAfterSeconds': None,
+}
+
+
+def _options_match(existing, options):
+    return all(
+        existing.get(option, default) == options.get(option, default)
+        for option, default in COMPARED_OPTIONS.items()
+    )
+
+
+def _normalize_keys(keys):
+    # index_information() may report directions as floats (1.0)
+    return tuple((field, int(direction) if isinstance(direction, float) else direction)
+                 for field, direction in keys)
+
+
+def diff_indexes(db, spec=INDEXES):
+    """Compare the spec with the indexes that exist.
+
+    Returns a list of ``(collection, action, keys, options)`` where action is
+    one of ``create``, ``ok``, ``conflict`` (same keys, different options) or
+    ``extra`` (exists but is not in the spec).
+    """
+    diff = []
+    for collection_name, indexes in spec.items():
+        existing = {
+            _normalize_keys(info['key']): dict(info, name=name)
+            for name, info in db[collection_name].index_information().items()
+            if name != '_id_'
+        }
+        wanted = set()
+        for keys, options in indexes:
+            key = _normalize_keys(keys)
+            wanted.add(key)
+            info = existing.get(key)
+            if info is None:
+                diff.append((collection_name, 'create', keys, options))
+            elif _options_match(info, options):
+                diff.append((collection_name, 'ok', keys, options))
+            else:
+                diff.append((collection_name, 'conflict', keys, options))
+        for key, info in existing.items():
+            if key not in wanted:
+                diff.append((collection_name, 'extra', list(key), {'name': info.get('name')}))
+    return diff
+
+
+def ensure_indexes(db, spec=INDEXES, drop_extra=False, dry_run=False):
+    """Create missing indexes (and optionally drop extra ones); returns the diff"""
+    diff = diff_indexes(db, spec)
+    if dry_run:
+        return diff
+    for collection_name, action, keys, options in diff:
+        if action == 'create':
+            db[collection_name].create_index(keys, **options)
+        elif action == 'extra' and drop_extra and options.get('name'):
+            db[collection_name].drop_index(options['name'])
+    return diff
+
+
+def unique_indexes(spec=INDEXES):
+    """The part of the spec made of unique indexes"""
+    unique = {}
+    for collection_name, indexes in spec.items():
+        wanted = [(keys, options) for keys, options in indexes if options.get('unique')]
+        if wanted:
+            unique[collection_name] = wanted
+    return unique
+
+
+def ensure_unique_indexes(db, spec=INDEXES):
+    """Create missing unique indexes, raising ImproperlyConfigured if one cannot be.
+
+    A conflicting index on the same keys, or existing duplicates that stop
+    the build, would otherwise leave the API accepting duplicate records.
+    """
+    try:
+        diff = ensure_indexes(db, unique_indexes(spec))
+    except OperationFailure as e:
+        raise ImproperlyConfigured(
+            f'Cannot create a unique MongoDB index ({e}); remove the duplicates and '
+            'run manage.py ensure_indexes'
+        ) from e
+    conflicts = [(name, keys) for name, action, keys, _ in diff if action == 'conflict']
+    if conflicts:
+        described = ', '.join(f"{name} ({', '.join(field for field, _ in keys)})" for name, keys in conflicts)
+        raise ImproperlyConfigured(
+            f'MongoDB indexes exist without the required unique option: {described}; '
+            'drop them and run manage.py ensure_indexes'
+        )
+    return diff
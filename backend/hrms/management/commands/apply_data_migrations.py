@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from hrms.db import get_migrations_collection
+
+# One-time backfills of data the read paths depend on, in the order they run.
+# Each is recorded in data_migrations once it finished, so the release phase
+# runs it on the first deploy that ships it and skips it afterwards.
+MIGRATIONS = (
+    # The dashboard and employee stats read only the counters
+    ('counters', 'rebuild_counters'),
+    # The monthly reports read only the rollups
+    ('rollups', 'backfill_rollups'),
+    # Employees created before search have no search_terms
+    ('search_terms', 'backfill_search_terms'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the one-time backfills (counters, rollups, search terms) that have not run on '
+        'this database yet; meant for the release phase'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list', action='store_true', help='Only show which backfills are pending')
+        parser.add_argument('--rerun', nargs='+', default=(), metavar='NAME',
+                            choices=[name for name, _ in MIGRATIONS],
+                            help='Run these backfills again even if they are recorded as done')
+
+    def handle(self, *args, **options):
+        markers = get_migrations_collection()
+        done = {
+            doc['_id'] for doc in markers.find(
+                {'_id': {'$in': [self._marker(name) for name, _ in MIGRATIONS]}, 'finished_at': {'$exists': True}},
+                {'_id': 1}
+            )
+        }
+
+        for name, command in MIGRATIONS:
+            if self._marker(name) in done and name not in options['rerun']:
+                self.stdout.write(f'done     {name}')
+                continue
+            if options['list']:
+                self.stdout.write(self.style.WARNING(f'pending  {name} ({command})'))
+                continue
+
+            started_at = datetime.utcnow()
+            call_command(command, stdout=self.stdout, stderr=self.stderr)
+            # Recorded only after success, so a failed release retries it
+            markers.update_one(
+                {'_id': self._marker(name)},
+                {'$set': {'command': command, 'started_at': started_at, 'finished_at': datetime.utcnow()}},
+                upsert=True
+            )
+            self.stdout.write(self.style.SUCCESS(f'applied  {name}'))
+
+    @staticmethod
+    def _marker(name):
+        return f'backfill_{name}'
@@ -0,0 +1,279 @@
+import itertools
+import json
+import platform
+import subprocess
+from datetime import date, datetime, timedelta
+from urllib.parse import unquote
+
+from bson import ObjectId
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from attendance import dates
+from hrms import benchmark, db
+from hrms.indexes import ensure_indexes
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a benchmark database with synthetic employees and attendance, drive every '
+        'API endpoint through the Django test client and report latency percentiles '
+        'and peak memory per endpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=60,
+                            help='Weekdays of attendance per employee')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--database', default='hrms_benchmark',
+                            help='Database to seed (must be empty unless --reuse)')
+        parser.add_argument('--reuse', action='store_true',
+                            help='Benchmark an already seeded database')
+        parser.add_argument('--drop', action='store_true',
+                            help='Drop the benchmark database afterwards')
+        parser.add_argument('--mongomock', action='store_true',
+                            help='Use an in-memory mongomock client instead of MONGODB_URI '
+                                 '(endpoints using unsupported aggregation stages will error)')
+        parser.add_argument('--output', default='benchmark-results.json')
+        parser.add_argument('--compare', help='Previous results JSON to compare against')
+        parser.add_argument('--accept-encoding', default='',
+                            help="Accept-Encoding sent with every request, e.g. 'gzip' or 'br' "
+                                 '(response bytes are then the compressed sizes)')
+
+    def handle(self, *args, **options):
+        if options['database'] == settings.MONGODB_NAME and not options['mongomock']:
+            raise CommandError('Refusing to benchmark the application database; pass another --database')
+
+        self._connect(options)
+        database = db.get_db()
+        ensure_indexes(database)
+
+        if options['reuse']:
+            employee_ids = [str(e['_id']) for e in database.employees.find({}, {'_id': 1}).limit(10)]
+            if not employee_ids:
+                raise CommandError('--reuse given but the benchmark database is empty')
+        else:
+            if database.employees.estimated_document_count():
+                raise CommandError(f"Database {options['database']} is not empty; pass --reuse or --drop it")
+            self.stdout.write(f"Seeding {options['employees']} employees x {options['days']} days...")
+            employee_ids = benchmark.seed(database, options['employees'], options['days'])
+            self._rebuild_derived()
+
+        results = {
+            'commit': _git_commit(),
+            'created_at': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'date_storage': dates.STORAGE,
+            'accept_encoding': options['accept_encoding'],
+            'employees': database.employees.estimated_document_count(),
+            'attendance': database.attendance.estimated_document_count(),
+            'iterations': options['iterations'],
+            'endpoints': {},
+        }
+
+        headers = {'HTTP_ACCEPT_ENCODING': options['accept_encoding']}
+        if settings.METRICS_TOKEN:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {settings.METRICS_TOKEN}'
+        # A failing endpoint is reported with its 500 status instead of aborting the run
+        client = Client(raise_request_exception=False, **headers)
+        endpoints = self._endpoints(database, employee_ids, options['iterations'] + benchmark.WARMUP_REQUESTS)
+        for name, method, path, body_factory, content_type in endpoints:
+            result = benchmark.measure(client, method, path, options['iterations'],
+                                       body_factory=body_factory, content_type=content_type)
+            results['endpoints'][name] = dict(result, method=method.upper(), path=getattr(path, 'pattern', path))
+
+        previous = self._load(options['compare']) if options['compare'] else None
+        self._report(results, previous)
+
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['drop']:
+            db.get_db().client.drop_database(options['database'])
+
+    def _connect(self, options):
+        settings.MONGODB_NAME = options['database']
+        settings.MONGODB_ENSURE_INDEXES_ON_CONNECT = False
+        # Purge jobs queued by the DELETE benchmark would otherwise run on a
+        # background thread while the following endpoints are measured
+        settings.EMPLOYEE_PURGE_IN_PROCESS = False
+        if options['mongomock']:
+            try:
+                import mongomock
+            except ImportError:
+                raise CommandError('--mongomock needs the mongomock package (pip install -r requirements-dev.txt)')
+
+            def client_factory(uri, **kwargs):
+                return mongomock.MongoClient()
+            db.MongoClient = client_factory
+        # Force get_db() to connect with the settings above
+        db._db = None
+
+    def _rebuild_derived(self):
+        from attendance.counters import rebuild_counters
+        from attendance.rollups import rebuild_rollups
+        rebuild_counters()
+        rebuild_rollups()
+
+    def _endpoints(self, database, employee_ids, requests):
+        """(name, method, path, body_factory, content_type) per benchmarked endpoint.
+
+        ``requests`` is the number of requests each endpoint receives; the
+        write endpoints get that many fresh employees so no request is
+        rejected as a duplicate, also when the database is reused.
+        """
+        from employees import purge
+
+        today = date.today()
+        month_ago = (today - timedelta(days=30)).isoformat()
+        last_month = f'{today.year - (today.month == 1):04d}-{(today.month - 2) % 12 + 1:02d}'
+        month_from, month_to = dates.month_bounds(last_month)
+        quarter = (today.month - 1) // 3 + 1
+        quarter_from, quarter_to = dates.quarter_bounds(today.year, quarter)
+        employee_id = employee_ids[0]
+        sequence = itertools.count()
+        # Keeps the IDs of employees created by this run unique in a reused database
+        run = datetime.utcnow().strftime('%y%m%d%H%M%S')
+
+        def new_employee():
+            n = next(sequence)
+            return {
+                'employee_id': f'BENCH{run}{n:08d}',
+                'full_name': f'Benchmark Employee {n}',
+                'email': f'bench{run}{n:08d}@example.com',
+                'department': 'Engineering',
+            }
+
+        def import_csv(rows=100):
+            lines = ['employee_id,full_name,email,department']
+            for _ in range(rows):
+                employee = new_employee()
+                lines.append(','.join(employee[field] for field in
+                                      ('employee_id', 'full_name', 'email', 'department')))
+            return '\n'.join(lines) + '\n'
+
+        def each(route, ids):
+            """Path factory that targets the next id on every request"""
+            ids = iter(ids)
+
+            def next_path():
+                return reverse(route, args=[next(ids)])
+            next_path.pattern = unquote(reverse(route, args=['<id>']))
+            return next_path
+
+        # Fresh employees: one per single POST (today) and insert-mode bulk
+        # request (the ten days before), and one per DELETE
+        writers = benchmark.create_employees(database, requests, f'W{run}')
+        single_writers = iter(writers)
+        bulk_writers = iter(writers)
+        deleted = benchmark.create_employees(database, requests, f'D{run}')
+        # A purge job to poll; not run, as EMPLOYEE_PURGE_IN_PROCESS is off
+        job = purge.soft_delete_employee({'_id': ObjectId(benchmark.create_employees(database, 1, f'J{run}')[0])})
+
+        def single_record():
+            return {'employee_id': next(single_writers), 'date': today.isoformat(), 'status': 'Present'}
+
+        def bulk_insert():
+            emp_id = next(bulk_writers)
+            return {
+                'records': [
+                    {'employee_id': emp_id, 'date': (today - timedelta(days=n)).isoformat(), 'status': 'Present'}
+                    for n in range(1, 11)
+                ]
+            }
+
+        def bulk_upsert():
+            return {
+                'upsert': True,
+                'records': [
+                    {'employee_id': emp_id, 'date': today.isoformat(), 'status': 'Present'}
+                    for emp_id in employee_ids[:10]
+                ]
+            }
+
+        def mark_absent():
+            return {'status': 'Absent'}
+
+        attendance = reverse('attendance-list-create')
+        json_type = 'application/json'
+        return [
+            ('health', 'get', reverse('health-check'), None, None),
+            ('metrics', 'get', reverse('metrics'), None, None),
+            ('employees.list', 'get', reverse('employee-list-create'), None, None),
+            ('employees.list.projected', 'get',
+             reverse('employee-list-create') + '?limit=500&fields=employee_id,full_name', None, None),
+            ('employees.list.department', 'get',
+             reverse('employee-list-create') + '?department=Engineering', None, None),
+            ('employees.departments', 'get', reverse('employee-departments'), None, None),
+            ('employees.search.prefix', 'get', reverse('employee-search') + '?q=pa', None, None),
+            ('employees.search.full_name', 'get', reverse('employee-search') + '?q=elena+ro', None, None),
+            ('employees.detail', 'get', reverse('employee-detail', args=[employee_id]), None, None),
+            ('employees.create', 'post', reverse('employee-list-create'), new_employee, json_type),
+            ('employees.import.csv', 'post', reverse('employee-import'), import_csv, 'text/csv'),
+            ('employees.delete', 'delete', each('employee-detail', deleted), None, None),
+            ('employees.purge_job', 'get', reverse('employee-purge-job', args=[job['_id']]), None, None),
+            ('attendance.list', 'get', attendance, None, None),
+            ('attendance.list.today', 'get', f'{attendance}?date={today.isoformat()}', None, None),
+            ('attendance.list.month', 'get',
+             f'{attendance}?date_from={month_ago}&date_to={today.isoformat()}&limit=500', None, None),
+            ('attendance.record.put', 'put',
+             reverse('attendance-record', args=[employee_id, today.isoformat()]), mark_absent, json_type),
+            ('attendance.list.calendar_month', 'get',
+             f'{attendance}?date_from={month_from}&date_to={month_to}&limit=500', None, None),
+            ('attendance.list.quarter', 'get',
+             f'{attendance}?date_from={quarter_from}&date_to={quarter_to}&limit=500', None, None),
+            ('attendance.export.quarter', 'get',
+             reverse('attendance-export') + f'?date_from={quarter_from}&date_to={quarter_to}&export_format=ndjson',
+             None, None),
+            ('attendance.employee_history.quarter', 'get',
+             reverse('employee-attendance', args=[employee_id]) + f'?from={quarter_from}&to={quarter_to}',
+             None, None),
+            ('attendance.create', 'post', attendance, single_record, json_type),
+            ('attendance.bulk.insert', 'post', reverse('attendance-bulk'), bulk_insert, json_type),
+            ('attendance.bulk.upsert', 'post', reverse('attendance-bulk'), bulk_upsert, json_type),
+            ('attendance.export.month', 'get',
+             reverse('attendance-export') + f'?date_from={month_ago}&export_format=ndjson', None, None),
+            ('attendance.employee_history', 'get',
+             reverse('employee-attendance', args=[employee_id]), None, None),
+            ('attendance.report.monthly', 'get', reverse('attendance-monthly-report'), None, None),
+            ('attendance.dashboard', 'get', reverse('dashboard'), None, None),
+        ]
+
+    def _load(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+    def _report(self, results, previous):
+        header = f"{'endpoint':<30} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak KB':>9} {'bytes':>10}"
+        if previous:
+            header += f" {'p95 vs ' + str(previous.get('commit')):>16} {'bytes vs':>9}"
+        self.stdout.write(header)
+        for name, result in results['endpoints'].items():
+            line = (f"{name:<30} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                    f"{result['p99_ms']:>8.2f} {result['peak_memory_kb']:>9.1f} {result['response_bytes']:>10}")
+            before = (previous or {}).get('endpoints', {}).get(name)
+            if before and before['p95_ms']:
+                change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+                line += f' {change:>+15.1f}%'
+                if before['response_bytes']:
+                    ratio = (result['response_bytes'] - before['response_bytes']) / before['response_bytes'] * 100
+                    line += f' {ratio:>+8.1f}%'
+            if any(status >= 400 for status in result['statuses']):
+                line += f"  statuses={result['statuses']}"
+            self.stdout.write(line)
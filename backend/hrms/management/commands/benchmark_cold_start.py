@@ -0,0 +1,150 @@
+import http.client
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from hrms.management.commands.benchmark_api import _git_commit
+
+
+def parse_importtime(text):
+    """(module, self_us, cumulative_us, depth) rows from -X importtime output"""
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        head, cumulative_us, name = line.split('|', 2)
+        self_us = head[len('import time:'):]
+        # The name column is indented by two spaces per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Start fresh server processes and measure startup, time to first byte of the first '
+        'request and the latency of a warm request, with and without HRMS_WARMUP'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/attendance/dashboard/',
+                            help='Path requested from each fresh process')
+        parser.add_argument('--runs', type=int, default=5, help='Fresh processes per mode')
+        parser.add_argument('--warmup', choices=['off', 'on', 'both'], default='both',
+                            help='Run with HRMS_WARMUP off, on or both')
+        parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                            help='Also run one process under -X importtime and list the N slowest '
+                                 'top-level imports')
+        parser.add_argument('--output', help='Write the results as JSON')
+
+    def handle(self, *args, **options):
+        modes = ['off', 'on'] if options['warmup'] == 'both' else [options['warmup']]
+        results = {
+            'commit': _git_commit(),
+            'created_at': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'path': options['path'],
+            'runs': options['runs'],
+            'modes': {},
+        }
+
+        self.stdout.write(
+            f"{'warmup':<7} {'startup ms':>11} {'first req ms':>13} {'ttfb ms':>9} {'warm req ms':>12} statuses"
+        )
+        for mode in modes:
+            runs = [self._run(options['path'], mode == 'on') for _ in range(options['runs'])]
+            summary = {
+                key: round(statistics.median(run[key] for run in runs), 1)
+                for key in ('startup_ms', 'first_request_ms', 'ttfb_ms', 'warm_request_ms')
+            }
+            summary['statuses'] = sorted({run['status'] for run in runs})
+            results['modes'][mode] = summary
+            self.stdout.write(
+                f"{mode:<7} {summary['startup_ms']:>11.1f} {summary['first_request_ms']:>13.1f} "
+                f"{summary['ttfb_ms']:>9.1f} {summary['warm_request_ms']:>12.1f} {summary['statuses']}"
+            )
+
+        if options['importtime']:
+            imports = self._importtime(options['path'])
+            top = sorted((row for row in imports if row[3] == 0), key=lambda row: -row[2])
+            results['import_ms'] = round(sum(row[2] for row in top) / 1000, 1)
+            results['slowest_imports'] = [
+                {'module': name, 'cumulative_ms': round(cumulative / 1000, 1)}
+                for name, _, cumulative, _ in top[:options['importtime']]
+            ]
+            self.stdout.write(f"\nImports until the first response: {results['import_ms']:.1f} ms")
+            for row in results['slowest_imports']:
+                self.stdout.write(f"{row['cumulative_ms']:>9.1f} ms  {row['module']}")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _spawn(self, warmup, python_options=(), stderr=subprocess.DEVNULL):
+        env = dict(os.environ, HRMS_WARMUP=str(warmup), PYTHONUNBUFFERED='1')
+        return subprocess.Popen(
+            [sys.executable, *python_options, '-m', 'hrms.coldstart'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.PIPE, stderr=stderr, text=True,
+        )
+
+    def _get(self, port, path):
+        """(status, ms until the status line and headers arrived)"""
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        try:
+            started = time.perf_counter()
+            connection.request('GET', path)
+            response = connection.getresponse()
+            elapsed = (time.perf_counter() - started) * 1000
+            response.read()
+            return response.status, elapsed
+        finally:
+            connection.close()
+
+    def _serve(self, process, path):
+        started = time.perf_counter()
+        line = process.stdout.readline()
+        if not line.strip():
+            process.kill()
+            raise CommandError('The server process exited before listening; run python -m hrms.coldstart to see why')
+        startup_ms = (time.perf_counter() - started) * 1000
+        port = int(line)
+        status, first_request_ms = self._get(port, path)
+        ttfb_ms = (time.perf_counter() - started) * 1000
+        _, warm_request_ms = self._get(port, path)
+        return {
+            'startup_ms': startup_ms,
+            'first_request_ms': first_request_ms,
+            'ttfb_ms': ttfb_ms,
+            'warm_request_ms': warm_request_ms,
+            'status': status,
+        }
+
+    def _run(self, path, warmup):
+        process = self._spawn(warmup)
+        try:
+            return self._serve(process, path)
+        finally:
+            process.kill()
+            process.wait()
+
+    def _importtime(self, path):
+        # -X importtime writes to stderr; a file avoids blocking on a full pipe
+        with tempfile.TemporaryFile('w+') as log:
+            process = self._spawn(False, ('-X', 'importtime'), stderr=log)
+            try:
+                self._serve(process, path)
+            finally:
+                process.kill()
+                process.wait()
+            log.seek(0)
+            return parse_importtime(log.read())
@@ -0,0 +1,40 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from hrms import compression
+from hrms.management.commands.benchmark_renderers import _attendance_payload
+from hrms.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compare body size and encoding time of gzip and Brotli on list-sized JSON payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000',
+                            help='Comma-separated record counts')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        renderer = ORJSONRenderer()
+
+        self.stdout.write(
+            f"{'records':>8} {'encoding':>9} {'median ms':>10} {'p95 ms':>8} {'bytes':>10} {'ratio':>7}"
+        )
+        for size in sizes:
+            body = renderer.render(_attendance_payload(size))
+            self.stdout.write(f"{size:>8} {'identity':>9} {0:>10.2f} {0:>8.2f} {len(body):>10} {1:>7.3f}")
+            for encoding in compression.ENCODINGS:
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    compressed = compression.compress(body, encoding)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                self.stdout.write(
+                    f'{size:>8} {encoding:>9} {statistics.median(timings):>10.2f} {p95:>8.2f} '
+                    f'{len(compressed):>10} {len(compressed) / len(body):>7.3f}'
+                )
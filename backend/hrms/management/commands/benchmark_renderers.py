@@ -0,0 +1,59 @@
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from hrms.renderers import ORJSONRenderer
+
+
+def _attendance_payload(count):
+    """A synthetic attendance list response of `count` records"""
+    start = datetime(2024, 1, 1, 9, 0, 0, 123456)
+    records = [
+        {
+            'id': f'65a1b2c3d4e5f6a7b8c9{i:04x}',
+            'employee_id': f'65a1b2c3d4e5f6a7b8c0{i % 2000:04x}',
+            'date': (start + timedelta(days=i // 2000)).date().isoformat(),
+            'status': 'Present' if i % 7 else 'Absent',
+            'created_at': start + timedelta(seconds=i),
+            'employee_name': f'Employee {i % 2000}',
+            'employee_code': f'EMP{i % 2000:05d}',
+        }
+        for i in range(count)
+    ]
+    return {
+        'success': True,
+        'message': 'Attendance records retrieved successfully',
+        'data': records,
+        'pagination': {'limit': count, 'next_cursor': None, 'has_more': False}
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's JSONRenderer with the orjson renderer on list-sized payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000',
+                            help='Comma-separated record counts')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        renderers = [('drf-json', JSONRenderer()), ('orjson', ORJSONRenderer())]
+        sizes = [int(size) for size in options['sizes'].split(',')]
+
+        self.stdout.write(f"{'records':>8} {'renderer':>10} {'median ms':>10} {'p95 ms':>8} {'bytes':>10}")
+        for size in sizes:
+            payload = _attendance_payload(size)
+            for name, renderer in renderers:
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    body = renderer.render(payload)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                self.stdout.write(
+                    f'{size:>8} {name:>10} {statistics.median(timings):>10.2f} {p95:>8.2f} {len(body):>10}'
+                )
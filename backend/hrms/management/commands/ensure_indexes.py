@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hrms.db import get_db
+from hrms.indexes import ensure_indexes
+
+
+class Command(BaseCommand):
+    help = 'Create the MongoDB indexes declared in hrms/indexes.py and report differences'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report the differences')
+        parser.add_argument('--drop-extra', action='store_true',
+                            help='Drop indexes that are not in the spec')
+
+    def handle(self, *args, **options):
+        diff = ensure_indexes(get_db(), drop_extra=options['drop_extra'], dry_run=options['dry_run'])
+
+        styles = {
+            'create': self.style.SUCCESS,
+            'ok': str,
+            'conflict': self.style.ERROR,
+            'extra': self.style.WARNING,
+        }
+        for collection_name, action, keys, index_options in diff:
+            keys_text = ', '.join(f'{field}: {direction}' for field, direction in keys)
+            extra_text = f' {index_options}' if index_options else ''
+            self.stdout.write(styles[action](
+                f'{action:<8} {collection_name} ({keys_text}){extra_text}'
+            ))
+
+        conflicts = sum(1 for _, action, _, _ in diff if action == 'conflict')
+        if conflicts:
+            # Exits non-zero so a release phase running this command stops the deploy
+            raise CommandError(
+                f'{conflicts} index(es) exist with different options; drop and re-create them manually'
+            )
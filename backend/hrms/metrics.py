@@ -0,0 +1,213 @@
+"""Request and MongoDB command instrumentation.
+
+``MongoCommandListener`` is registered on the MongoClient (see
+``hrms/db.py``) and ``RequestTimingMiddleware`` wraps every request. Each
+response gets a ``Server-Timing`` header with the wall time, the number of
+Mongo commands and the Mongo time per command type, and process-wide totals
+are exposed in Prometheus text format at ``/metrics``, which needs
+``Authorization: Bearer <METRICS_TOKEN>`` (or ``DEBUG`` when no token is set).
+
+Per-request Mongo attribution relies on a context variable, which PyMongo's
+listener sees on the thread that runs the command. Motor runs commands on
+its own executor threads, so on the async path only the process totals
+include them.
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from pymongo import monitoring
+
+_request_stats = ContextVar('hrms_request_stats', default=None)
+
+# Upper bounds (seconds) of the request duration histogram
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RequestStats:
+    """Mongo activity of the current request"""
+
+    def __init__(self):
+        self.commands = 0
+        self.seconds_by_command = defaultdict(float)
+
+    @property
+    def mongo_seconds(self):
+        return sum(self.seconds_by_command.values())
+
+
+class Registry:
+    """Process-wide counters rendered by the /metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.mongo_commands = defaultdict(int)
+        self.mongo_seconds = defaultdict(float)
+        self.mongo_failures = defaultdict(int)
+        self.requests = defaultdict(int)
+        self.request_seconds = defaultdict(float)
+        self.request_buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.request_mongo_commands = defaultdict(int)
+
+    def record_command(self, name, seconds, failed=False):
+        with self._lock:
+            self.mongo_commands[name] += 1
+            self.mongo_seconds[name] += seconds
+            if failed:
+                self.mongo_failures[name] += 1
+
+    def record_request(self, route, method, status, seconds, mongo_commands):
+        with self._lock:
+            self.requests[(route, method, status)] += 1
+            self.request_seconds[(route, method)] += seconds
+            self.request_mongo_commands[(route, method)] += mongo_commands
+            buckets = self.request_buckets[(route, method)]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+
+    def render(self, counters=(), gauges=()):
+        """Prometheus text exposition format.
+
+        ``counters`` and ``gauges`` are extra ``(name, help, value)`` samples
+        kept elsewhere, such as the cache statistics; counter names end in
+        ``_total``.
+        """
+        with self._lock:
+            lines = [
+                '# HELP hrms_mongo_commands_total MongoDB commands by name',
+                '# TYPE hrms_mongo_commands_total counter',
+            ]
+            lines += [f'hrms_mongo_commands_total{{command="{name}"}} {count}'
+                      for name, count in sorted(self.mongo_commands.items())]
+            lines += [
+                '# HELP hrms_mongo_command_seconds_total Time spent in MongoDB commands by name',
+                '# TYPE hrms_mongo_command_seconds_total counter',
+            ]
+            lines += [f'hrms_mongo_command_seconds_total{{command="{name}"}} {seconds:.6f}'
+                      for name, seconds in sorted(self.mongo_seconds.items())]
+            lines += [
+                '# HELP hrms_mongo_command_failures_total Failed MongoDB commands by name',
+                '# TYPE hrms_mongo_command_failures_total counter',
+            ]
+            lines += [f'hrms_mongo_command_failures_total{{command="{name}"}} {count}'
+                      for name, count in sorted(self.mongo_failures.items())]
+            lines += [
+                '# HELP hrms_requests_total HTTP requests by route, method and status',
+                '# TYPE hrms_requests_total counter',
+            ]
+            lines += [f'hrms_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}'
+                      for (route, method, status), count in sorted(self.requests.items())]
+            lines += [
+                '# HELP hrms_request_mongo_commands_total MongoDB commands issued while serving requests',
+                '# TYPE hrms_request_mongo_commands_total counter',
+            ]
+            lines += [f'hrms_request_mongo_commands_total{{route="{route}",method="{method}"}} {count}'
+                      for (route, method), count in sorted(self.request_mongo_commands.items())]
+            lines += [
+                '# HELP hrms_request_duration_seconds HTTP request wall time',
+                '# TYPE hrms_request_duration_seconds histogram',
+            ]
+            for (route, method), buckets in sorted(self.request_buckets.items()):
+                labels = f'route="{route}",method="{method}"'
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'hrms_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                total = sum(self.requests[key] for key in self.requests if key[:2] == (route, method))
+                lines.append(f'hrms_request_duration_seconds_bucket{{{labels},le="+Inf"}} {total}')
+                lines.append(f'hrms_request_duration_seconds_sum{{{labels}}} '
+                             f'{self.request_seconds[(route, method)]:.6f}')
+                lines.append(f'hrms_request_duration_seconds_count{{{labels}}} {total}')
+
+        for kind, samples in (('counter', counters), ('gauge', gauges)):
+            for name, help_text, value in samples:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Feeds MongoDB command timings to the current request and the registry"""
+
+    def started(self, event):
+        pass
+
+    def _record(self, event, failed):
+        seconds = event.duration_micros / 1_000_000
+        registry.record_command(event.command_name, seconds, failed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.commands += 1
+            stats.seconds_by_command[event.command_name] += seconds
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+
+command_listener = MongoCommandListener()
+
+
+def _server_timing(total_seconds, stats):
+    parts = [
+        f'app;dur={total_seconds * 1000:.1f}',
+        f'mongo;dur={stats.mongo_seconds * 1000:.1f};desc="{stats.commands} commands"',
+    ]
+    for name, seconds in sorted(stats.seconds_by_command.items()):
+        token = re.sub(r'[^A-Za-z0-9_-]', '_', name)
+        parts.append(f'mongo-{token};dur={seconds * 1000:.1f}')
+    return ', '.join(parts)
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return '/' + match.route if match.route else match.view_name or 'unknown'
+
+
+class RequestTimingMiddleware:
+    """Times each request and reports Mongo activity in Server-Timing"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _finish(self, request, response, started, stats):
+        elapsed = time.perf_counter() - started
+        response['Server-Timing'] = _server_timing(elapsed, stats)
+        registry.record_request(_route(request), request.method, response.status_code,
+                                elapsed, stats.commands)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        return self._finish(request, response, started, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        return self._finish(request, response, started, stats)
@@ -0,0 +1,127 @@
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from django.conf import settings
+
+
+DEFAULT_PAGE_SIZE = getattr(settings, 'API_DEFAULT_PAGE_SIZE', 100)
+MAX_PAGE_SIZE = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+
+
+class InvalidQueryParam(ValueError):
+    """Raised when a list query param (filters, limit, after, fields) is invalid"""
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse the `limit` query param into a bounded page size"""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise InvalidQueryParam('limit must be an integer')
+    if limit < 1:
+        raise InvalidQueryParam('limit must be a positive integer')
+    return min(limit, maximum)
+
+
+def parse_fields(value, allowed):
+    """Parse the `fields` query param into a list of allowed field names"""
+    if not value:
+        return None
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise InvalidQueryParam(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def encode_cursor(sort_value, object_id):
+    """Encode a (sort key, _id) pair into an opaque cursor string"""
+    if isinstance(sort_value, datetime):
+        payload = {'t': 'dt', 'v': sort_value.isoformat()}
+    else:
+        payload = {'t': 'str', 'v': sort_value}
+    payload['id'] = str(object_id)
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor into (sort key, ObjectId)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = payload['v']
+        if payload['t'] == 'dt':
+            value = datetime.fromisoformat(value)
+        return value, ObjectId(payload['id'])
+    except Exception:
+        raise InvalidQueryParam('Invalid cursor')
+
+
+def keyset_filter(field, cursor, descending=True):
+    """Build the query that resumes a (field, _id) keyset scan after cursor"""
+    value, object_id = decode_cursor(cursor)
+    op = '$lt' if descending else '$gt'
+    return {'$or': [
+        {field: {op: value}},
+        {field: value, '_id': {op: object_id}},
+    ]}
+
+
+def page_pipeline(match, sort, limit, fields=None):
+    """Aggregation pipeline reading one page (limit + 1 lookahead).
+
+    The server converts `_id` to its string form as `id`, so documents come
+    back ready to render. `fields` restricts the returned fields.
+    """
+    pipeline = [
+        {'$match': match},
+        {'$sort': dict(sort)},
+        {'$limit': limit + 1},
+    ]
+    if fields:
+        projection = {field: 1 for field in fields}
+        projection.update({'id': {'$toString': '$_id'}, '_id': 0})
+        pipeline.append({'$project': projection})
+    else:
+        pipeline.append({'$addFields': {'id': {'$toString': '$_id'}}})
+        pipeline.append({'$project': {'_id': 0}})
+    return pipeline
+
+
+def _split_page(documents, field, limit):
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = encode_cursor(last[field], last['id'])
+    return documents, next_cursor
+
+
+def paginate(collection, match, sort, field, limit, fields=None):
+    """Read one keyset page ordered by (field, _id).
+
+    Returns (documents, next_cursor); next_cursor is None on the last page.
+    """
+    documents = list(collection.aggregate(page_pipeline(match, sort, limit, fields)))
+    return _split_page(documents, field, limit)
+
+
+async def apaginate(collection, match, sort, field, limit, fields=None):
+    """Async counterpart of paginate for Motor collections"""
+    cursor = collection.aggregate(page_pipeline(match, sort, limit, fields))
+    documents = await cursor.to_list(length=limit + 1)
+    return _split_page(documents, field, limit)
+
+
+def page_meta(limit, next_cursor):
+    """The `pagination` block of a list response"""
+    return {
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
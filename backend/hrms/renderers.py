@@ -0,0 +1,43 @@
+"""Fast JSON rendering with orjson.
+
+``ORJSONRenderer`` is a drop-in replacement for DRF's ``JSONRenderer`` at a
+fraction of the cost. orjson encodes datetimes, dates and times itself, in
+the same format as the pinned DRF ``JSONEncoder``: full ``isoformat()`` with
+microseconds, a ``Z`` suffix for UTC and no suffix for naive values (older
+DRF releases cut microseconds to milliseconds; ``employees/tests.py`` checks
+the two renderers byte for byte). ObjectIds become strings, and every other type
+orjson does not know (lazy translations, Decimals, UUIDs, sets, timedeltas)
+goes through DRF's own encoder. It is enabled through
+``REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']`` when orjson is installed and
+``FAST_JSON_RENDERER`` is on.
+"""
+import orjson
+from bson import ObjectId
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+_drf_default = JSONEncoder().default
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    return _drf_default(obj)
+
+
+def dumps(data):
+    """Encode data to JSON bytes with orjson"""
+    return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data)
@@ -0,0 +1,131 @@
+"""Single-flight response caching on Django's cache framework.
+
+``SingleFlightCache`` keeps computed payloads in the configured Django cache
+(locmem by default, or a file or shared backend via ``CACHE_BACKEND``). An
+entry is fresh for ``ttl`` seconds and then kept for ``stale_ttl`` more.
+When it goes stale, the first caller to take the lock (a ``cache.add`` key)
+recomputes it while every other caller is served the stale payload. When
+there is no entry at all, the other callers wait for the lock holder
+instead of querying MongoDB themselves.
+
+Keys should include whatever the payload depends on; the dashboard uses the
+date and the collection version stamps, so any write moves it to a new key.
+"""
+import asyncio
+import threading
+import time
+
+from django.core.cache import caches
+
+
+class SingleFlightCache:
+    """Payload cache where one caller recomputes an expired entry"""
+
+    def __init__(self, prefix, ttl=5, stale_ttl=60, lock_timeout=5, wait_interval=0.02, alias='default'):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.wait_interval = wait_interval
+        self.alias = alias
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.waits = 0
+        self.computes = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _keys(self, key):
+        full_key = f'{self.prefix}:{key}'
+        return full_key, f'{full_key}:lock'
+
+    def _entry(self, value):
+        return {'value': value, 'fresh_until': time.time() + self.ttl}
+
+    def _count(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() on a miss"""
+        cache = self.cache
+        full_key, lock_key = self._keys(key)
+        entry = cache.get(full_key)
+        if entry is not None and entry['fresh_until'] > time.time():
+            self._count('hits')
+            return entry['value']
+
+        if cache.add(lock_key, True, self.lock_timeout):
+            try:
+                value = compute()
+                cache.set(full_key, self._entry(value), self.ttl + self.stale_ttl)
+                self._count('computes')
+                return value
+            finally:
+                cache.delete(lock_key)
+
+        if entry is not None:
+            self._count('stale_hits')
+            return entry['value']
+
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.wait_interval)
+            entry = cache.get(full_key)
+            if entry is not None:
+                self._count('waits')
+                return entry['value']
+
+        # The lock holder is gone or too slow; compute without caching
+        self._count('computes')
+        return compute()
+
+    async def aget_or_compute(self, key, compute):
+        """Async counterpart of get_or_compute; compute is a coroutine function"""
+        cache = self.cache
+        full_key, lock_key = self._keys(key)
+        entry = await cache.aget(full_key)
+        if entry is not None and entry['fresh_until'] > time.time():
+            self._count('hits')
+            return entry['value']
+
+        if await cache.aadd(lock_key, True, self.lock_timeout):
+            try:
+                value = await compute()
+                await cache.aset(full_key, self._entry(value), self.ttl + self.stale_ttl)
+                self._count('computes')
+                return value
+            finally:
+                await cache.adelete(lock_key)
+
+        if entry is not None:
+            self._count('stale_hits')
+            return entry['value']
+
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.wait_interval)
+            entry = await cache.aget(full_key)
+            if entry is not None:
+                self._count('waits')
+                return entry['value']
+
+        self._count('computes')
+        return await compute()
+
+    def stats(self):
+        with self._lock:
+            served = self.hits + self.stale_hits + self.waits
+            lookups = served + self.computes
+            return {
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'waits': self.waits,
+                'computes': self.computes,
+                'hit_ratio': round(served / lookups, 4) if lookups else 0.0,
+            }
@@ -1,11 +1,16 @@
 from pathlib import Path
+import importlib.util
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from corsheaders.defaults import default_headers
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Deployments configure the environment directly; python-dotenv is only
+# imported when there is a .env file for it to read (it searches upwards)
+if any((directory / '.env').is_file() for directory in Path(__file__).resolve().parents):
+    from dotenv import load_dotenv
+    load_dotenv()
+
 SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-4b2^_zqiy86%=3t)+uuv7mx_v(3qg95fol%vyxd%u1zxk61i8!')
 
 DEBUG = os.environ.get('DEBUG', 'True').lower() == 'true'
@@ -17,17 +22,26 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'corsheaders',
     'rest_framework',
+    'hrms',
     'employees',
     'attendance',
 ]
 
 MIDDLEWARE = [
+    'hrms.metrics.RequestTimingMiddleware',
+    'hrms.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.common.CommonMiddleware',
 ]
 
+# The API renders JSON only, so static file serving is opt-in and
+# WhiteNoise is not imported otherwise
+SERVE_STATIC_FILES = os.environ.get('SERVE_STATIC_FILES', 'False').lower() == 'true'
+if SERVE_STATIC_FILES:
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                      'whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'hrms.urls'
 
 TEMPLATES = [
@@ -53,6 +67,24 @@ MONGODB_NAME = os.environ.get('MONGODB_NAME', 'hrms_lite')
 if not MONGODB_URI:
     raise ValueError("MONGODB_URI environment variable is required")
 
+# MongoClient pool, timeouts and compression (per worker process)
+MONGODB_MAX_POOL_SIZE = int(os.environ.get('MONGODB_MAX_POOL_SIZE', 50))
+MONGODB_MIN_POOL_SIZE = int(os.environ.get('MONGODB_MIN_POOL_SIZE', 0))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 5000))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGODB_CONNECT_TIMEOUT_MS', 5000))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGODB_SOCKET_TIMEOUT_MS', 30000))
+# Comma-separated; zstd and snappy need the zstandard / python-snappy packages
+MONGODB_COMPRESSORS = os.environ.get('MONGODB_COMPRESSORS', 'zlib')
+# Also create the non-unique indexes when a worker first connects (local
+# development); in production run `manage.py ensure_indexes` during deploy.
+# The unique indexes are always ensured on connect (hrms/db.py).
+MONGODB_ENSURE_INDEXES_ON_CONNECT = os.environ.get('MONGODB_ENSURE_INDEXES_ON_CONNECT', 'False').lower() == 'true'
+# Read preference for list and dashboard reads. 'primary' keeps read-your-writes
+# (the frontend refetches a list right after writing to it); secondaryPreferred
+# offloads the primary at the cost of replication lag in what lists show
+MONGODB_LIST_READ_PREFERENCE = os.environ.get('MONGODB_LIST_READ_PREFERENCE', 'primary')
+
 # No Django ORM database needed - we use PyMongo directly
 DATABASES = {}
 
@@ -67,11 +99,98 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # CORS Configuration
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# Browsers may send Idempotency-Key on attendance PUT/PATCH retries
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
+
+# Async (Motor) read views; switched on by hrms/asgi.py
+ASYNC_API = os.environ.get('HRMS_ASYNC_API', 'False').lower() == 'true'
+
+# Import the views, load the DRF settings and connect to MongoDB when the
+# worker starts instead of on its first request (hrms/warmup.py)
+HRMS_WARMUP = os.environ.get('HRMS_WARMUP', 'False').lower() == 'true'
+
+# List endpoint page sizes (keyset pagination)
+API_DEFAULT_PAGE_SIZE = int(os.environ.get('API_DEFAULT_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
+# Largest batch accepted by POST /api/attendance/bulk/
+ATTENDANCE_BULK_MAX_RECORDS = int(os.environ.get('ATTENDANCE_BULK_MAX_RECORDS', 5000))
+
+# Rows validated and inserted per insert_many by the employee importer
+EMPLOYEE_IMPORT_CHUNK_SIZE = int(os.environ.get('EMPLOYEE_IMPORT_CHUNK_SIZE', 500))
+
+# Cursor batch size for the streaming attendance export
+ATTENDANCE_EXPORT_BATCH_SIZE = int(os.environ.get('ATTENDANCE_EXPORT_BATCH_SIZE', 1000))
+# 'string' stores attendance dates as 'YYYY-MM-DD', 'date' as native BSON dates
+# (attendance/dates.py); convert existing records with migrate_attendance_dates
+ATTENDANCE_DATE_STORAGE = os.environ.get('ATTENDANCE_DATE_STORAGE', 'string').lower()
+# Whole months kept in the hot attendance collection by archive_attendance,
+# and records moved per batch (attendance/archive.py)
+ATTENDANCE_ARCHIVE_MONTHS = int(os.environ.get('ATTENDANCE_ARCHIVE_MONTHS', 12))
+ATTENDANCE_ARCHIVE_BATCH_SIZE = int(os.environ.get('ATTENDANCE_ARCHIVE_BATCH_SIZE', 5000))
+# Seconds a worker trusts its copy of the archived cutoff that writes are
+# checked against; archiving waits this long after moving the cutoff forward
+ATTENDANCE_ARCHIVE_CUTOFF_TTL = int(os.environ.get('ATTENDANCE_ARCHIVE_CUTOFF_TTL', 60))
+
+# Background purge of a deleted employee's attendance (employees/purge.py)
+EMPLOYEE_PURGE_BATCH_SIZE = int(os.environ.get('EMPLOYEE_PURGE_BATCH_SIZE', 1000))
+EMPLOYEE_PURGE_LEASE_SECONDS = int(os.environ.get('EMPLOYEE_PURGE_LEASE_SECONDS', 300))
+# Run purge jobs on a thread in the web process, which also sweeps up pending
+# and expired-lease jobs at startup and every EMPLOYEE_PURGE_SWEEP_SECONDS;
+# turn off to rely on a scheduled purge_deleted_employees command alone
+EMPLOYEE_PURGE_IN_PROCESS = os.environ.get('EMPLOYEE_PURGE_IN_PROCESS', 'True').lower() == 'true'
+EMPLOYEE_PURGE_SWEEP_SECONDS = int(os.environ.get('EMPLOYEE_PURGE_SWEEP_SECONDS', 300))
+
+# In-process employee cache (hrms/cache.py)
+EMPLOYEE_CACHE_SIZE = int(os.environ.get('EMPLOYEE_CACHE_SIZE', 4096))
+EMPLOYEE_CACHE_TTL = int(os.environ.get('EMPLOYEE_CACHE_TTL', 300))
+DEPARTMENT_CACHE_TTL = int(os.environ.get('DEPARTMENT_CACHE_TTL', 300))
+
+# Django cache backing the dashboard response cache (hrms/response_cache.py).
+# locmem is per process; point CACHE_BACKEND at FileBasedCache (with a
+# directory in CACHE_LOCATION) or a shared backend to share it across workers.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'hrms'),
+    }
+}
+DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', 5))
+DASHBOARD_CACHE_STALE_TTL = float(os.environ.get('DASHBOARD_CACHE_STALE_TTL', 60))
+DASHBOARD_CACHE_LOCK_TIMEOUT = float(os.environ.get('DASHBOARD_CACHE_LOCK_TIMEOUT', 5))
+
+# Employee typeahead search (employees/views.py)
+EMPLOYEE_SEARCH_DEFAULT_LIMIT = int(os.environ.get('EMPLOYEE_SEARCH_DEFAULT_LIMIT', 10))
+EMPLOYEE_SEARCH_MAX_LIMIT = int(os.environ.get('EMPLOYEE_SEARCH_MAX_LIMIT', 50))
+
+# Prometheus metrics (hrms/metrics.py): /metrics needs the header
+# "Authorization: Bearer <METRICS_TOKEN>"; with no token it is only served
+# when DEBUG is on
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Response compression (hrms/compression.py): Brotli when the brotli package
+# is installed, otherwise gzip. Buffered bodies below the minimum size are sent
+# as they are; streaming responses of an allowed type are always compressed.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_CONTENT_TYPES = tuple(
+    os.environ.get(
+        'COMPRESSION_CONTENT_TYPES', 'application/json,application/x-ndjson,text/csv,text/plain'
+    ).split(',')
+)
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+# orjson-based renderer (hrms/renderers.py), used when orjson is installed
+FAST_JSON_RENDERER = (
+    os.environ.get('FAST_JSON_RENDERER', 'True').lower() == 'true'
+    and importlib.util.find_spec('orjson') is not None
+)
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'hrms.renderers.ORJSONRenderer' if FAST_JSON_RENDERER else 'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -0,0 +1,69 @@
+"""Test helpers shared by the apps' tests.py modules"""
+import os
+import unittest
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from pymongo import MongoClient
+
+from attendance.archive import cutoff_cache
+from hrms import db
+from hrms.cache import department_cache, employee_cache
+from hrms.indexes import ensure_indexes
+
+try:
+    import mongomock
+except ImportError as exc:
+    # Fail the run: skipping would let CI pass without the database tests
+    raise ImportError('The tests need mongomock: pip install -r requirements-dev.txt') from exc
+
+# A mongod for the tests of features mongomock does not implement
+# ($setWindowFields, $substrCP); those tests are skipped without it
+REAL_MONGODB_URI = os.environ.get('MONGODB_TEST_URI', '')
+
+
+class MongoTestCase(SimpleTestCase):
+    """Runs each test against a fresh in-memory mongomock database.
+
+    Only the sync (PyMongo) path is covered: the Motor-backed views need a
+    real server.
+    """
+
+    database_name = 'hrms_test'
+
+    def make_client(self):
+        return mongomock.MongoClient()
+
+    def setUp(self):
+        super().setUp()
+        saved = db._client, db._db, db._pid
+        db._client = self.make_client()
+        db._db = db._client[self.database_name]
+        db._pid = os.getpid()
+        self.db = db._db
+        ensure_indexes(self.db)
+
+        def restore():
+            db._client, db._db, db._pid = saved
+        self.addCleanup(restore)
+
+        for local_cache in (employee_cache, department_cache, cutoff_cache):
+            local_cache.clear()
+            self.addCleanup(local_cache.clear)
+        cache.clear()
+
+
+@unittest.skipUnless(REAL_MONGODB_URI, 'set MONGODB_TEST_URI to run the tests that need a real mongod')
+class RealMongoTestCase(MongoTestCase):
+    """Runs each test against a throwaway database on the MONGODB_TEST_URI server"""
+
+    database_name = f'hrms_test_{os.getpid()}'
+
+    def make_client(self):
+        return MongoClient(REAL_MONGODB_URI, serverSelectionTimeoutMS=5000)
+
+    def setUp(self):
+        super().setUp()
+        client = db._client
+        self.addCleanup(client.close)
+        self.addCleanup(client.drop_database, self.database_name)
@@ -1,16 +1,68 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotFound
 from django.urls import path, include
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from attendance.views import dashboard_cache
+from hrms.cache import employee_cache
+from hrms.metrics import registry
+
 
 class HealthCheckView(APIView):
     """Health check endpoint"""
     def get(self, request):
-        return Response({'status': 'healthy', 'message': 'HRMS Lite API is running'})
+        return Response({
+            'status': 'healthy',
+            'message': 'HRMS Lite API is running',
+            'employee_cache': employee_cache.stats(),
+            'dashboard_cache': dashboard_cache.stats()
+        })
+
+
+def metrics_authorized(request):
+    """Bearer METRICS_TOKEN, or any request in DEBUG when no token is configured"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        return settings.DEBUG
+    return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+def metrics_view(request):
+    """Prometheus metrics endpoint"""
+    if not metrics_authorized(request):
+        # Not found rather than unauthorized, so the endpoint is not advertised
+        return HttpResponseNotFound()
+    cache_stats = employee_cache.stats()
+    dashboard_stats = dashboard_cache.stats()
+    body = registry.render(
+        counters=[
+            ('hrms_employee_cache_hits_total', 'Employee cache hits', cache_stats['hits']),
+            ('hrms_employee_cache_misses_total', 'Employee cache misses', cache_stats['misses']),
+            ('hrms_employee_cache_evictions_total', 'Employee cache entries evicted to stay under the size limit',
+             cache_stats['evictions']),
+            ('hrms_dashboard_cache_hits_total', 'Dashboard served from a fresh cache entry', dashboard_stats['hits']),
+            ('hrms_dashboard_cache_stale_hits_total', 'Dashboard served stale while another caller recomputed',
+             dashboard_stats['stale_hits']),
+            ('hrms_dashboard_cache_waits_total', 'Dashboard requests that waited for another caller to compute',
+             dashboard_stats['waits']),
+            ('hrms_dashboard_cache_computes_total', 'Dashboard payloads computed from MongoDB',
+             dashboard_stats['computes']),
+        ],
+        gauges=[
+            ('hrms_employee_cache_size', 'Entries in the employee cache', cache_stats['size']),
+            ('hrms_dashboard_cache_hit_ratio', 'Share of dashboard requests not computed',
+             dashboard_stats['hit_ratio']),
+        ],
+    )
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 urlpatterns = [
     path('', HealthCheckView.as_view(), name='health-check'),
+    path('metrics', metrics_view, name='metrics'),
     path('api/employees/', include('employees.urls')),
     path('api/attendance/', include('attendance.urls')),
 ]
@@ -0,0 +1,133 @@
+"""Collection version stamps for conditional GET.
+
+Every write path bumps the version of the collections it changed. Read views
+decorated with ``conditional`` derive an ``ETag`` from the request URL and the
+current versions, so a poll with a matching ``If-None-Match`` is answered
+with 304 after one small lookup instead of re-querying the data collections.
+
+The versions are read before the data and with the same read preference as
+the list reads (``MONGODB_LIST_READ_PREFERENCE``), so a body is never older
+than the ETag it goes out under; the per-process caches in ``hrms.cache``
+are checked against ``request.collection_versions`` for the same reason.
+"""
+import hashlib
+import inspect
+from datetime import timezone
+from functools import wraps
+
+from django.http import HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+from pymongo import UpdateOne
+
+from hrms.db import get_versions_collection
+
+EMPLOYEES = 'employees'
+ATTENDANCE = 'attendance'
+
+
+def bump_version(*names):
+    """Record that the named collections changed"""
+    get_versions_collection().bulk_write(
+        [
+            UpdateOne({'_id': name}, {'$inc': {'version': 1}, '$currentDate': {'updated_at': True}}, upsert=True)
+            for name in names
+        ],
+        ordered=False
+    )
+
+
+def _versions_from_docs(names, docs):
+    found = {doc['_id']: doc for doc in docs}
+    return {name: found.get(name, {}) for name in names}
+
+
+def get_versions(names, secondary=False):
+    """Current {name: {'version', 'updated_at'}} for the named collections.
+
+    secondary=True reads them with the list read preference.
+    """
+    cursor = get_versions_collection(secondary).find({'_id': {'$in': list(names)}})
+    return _versions_from_docs(names, cursor)
+
+
+async def aget_versions(names, secondary=False):
+    """Async counterpart of get_versions"""
+    from hrms.async_db import get_versions_collection as get_async_versions_collection
+
+    cursor = get_async_versions_collection(secondary).find({'_id': {'$in': list(names)}})
+    return _versions_from_docs(names, await cursor.to_list(length=None))
+
+
+def versions_key(versions):
+    """Compact 'name:version' string for building cache keys"""
+    return ','.join(f"{name}:{versions[name].get('version', 0)}" for name in sorted(versions))
+
+
+def make_etag(request, versions, extra=''):
+    parts = [request.get_full_path(), extra]
+    parts += [f"{name}:{versions[name].get('version', 0)}" for name in sorted(versions)]
+    return '"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def last_modified(versions):
+    stamps = [v['updated_at'] for v in versions.values() if v.get('updated_at')]
+    if not stamps:
+        return None
+    latest = max(stamps)
+    if latest.tzinfo is None:
+        latest = latest.replace(tzinfo=timezone.utc)
+    return int(latest.timestamp())
+
+
+def _not_modified(request, etag, modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return bool(modified and if_modified_since and modified <= if_modified_since)
+
+
+def _finish(response, etag, modified):
+    if response.status_code not in (200, 304):
+        return response
+    response['ETag'] = etag
+    if modified:
+        response['Last-Modified'] = http_date(modified)
+    # Let browsers keep the body but revalidate on every poll
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def conditional(*names, extra=None):
+    """Decorate a GET handler so it honours If-None-Match / If-Modified-Since.
+
+    ``names`` are the collections the response is built from; ``extra`` is an
+    optional callable returning anything else the payload depends on (for
+    example today's date). The versions read are left on
+    ``request.collection_versions`` for the handler, which passes them to
+    any cached lookup so it is at least as new as the ETag. Works for sync DRF
+    handlers and async handlers.
+    """
+    def decorator(handler):
+        if inspect.iscoroutinefunction(handler):
+            @wraps(handler)
+            async def async_wrapper(self, request, *args, **kwargs):
+                versions = request.collection_versions = await aget_versions(names, secondary=True)
+                etag = make_etag(request, versions, extra() if extra else '')
+                modified = last_modified(versions)
+                if _not_modified(request, etag, modified):
+                    return _finish(HttpResponseNotModified(), etag, modified)
+                return _finish(await handler(self, request, *args, **kwargs), etag, modified)
+            return async_wrapper
+
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            versions = request.collection_versions = get_versions(names, secondary=True)
+            etag = make_etag(request, versions, extra() if extra else '')
+            modified = last_modified(versions)
+            if _not_modified(request, etag, modified):
+                return _finish(HttpResponseNotModified(), etag, modified)
+            return _finish(handler(self, request, *args, **kwargs), etag, modified)
+        return wrapper
+    return decorator
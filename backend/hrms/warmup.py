@@ -0,0 +1,137 @@
+"""Optional eager warm-up of a web worker.
+
+A fresh worker otherwise pays on its first request for importing the URLconf
+(every view module, DRF and the serializers), resolving the DRF renderer and
+parser classes, and the MongoDB server selection: DNS SRV lookup, TLS
+handshake and the initial ``minPoolSize`` connections. On autoscaled
+deployments that first request is a user's.
+
+With ``HRMS_WARMUP=True`` the ``ready()`` hooks of the employees and
+attendance apps do this work at startup instead. It is skipped for management
+commands other than ``runserver``, and a failure is logged rather than
+stopping the worker: the request path connects lazily as before.
+
+With ``gunicorn --preload`` the hooks run once in the master; the imports
+are inherited by the workers, while ``get_db()`` opens a new client after the
+fork, so only the connection part is repeated per worker.
+
+Those hooks run before any event loop exists, so they cannot open the Motor
+client of the async views: it is bound to the loop it is first used on.
+Under ASGI, ``hrms.asgi`` wraps the application with ``lifespan()``, which
+connects Motor on the server's loop at ``lifespan.startup``, before the
+first request. Servers without lifespan support (Daphne) skip that step and
+Motor connects on the first async request as before.
+"""
+import importlib
+import logging
+import sys
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'HRMS_WARMUP', False)
+
+_done = set()
+
+
+def serving():
+    """False for management commands, which should not connect or import views"""
+    if not sys.argv or not sys.argv[0].endswith('manage.py'):
+        return True
+    return len(sys.argv) > 1 and sys.argv[1] == 'runserver'
+
+
+def import_modules(*names):
+    def step():
+        for name in names:
+            importlib.import_module(name)
+    step.__name__ = f"import {', '.join(names)}"
+    return step
+
+
+def load_api_settings():
+    """Import the DRF renderer, parser and exception handler classes"""
+    from rest_framework.settings import api_settings
+
+    api_settings.DEFAULT_RENDERER_CLASSES
+    api_settings.DEFAULT_PARSER_CLASSES
+    api_settings.EXCEPTION_HANDLER
+
+
+def connect_mongo():
+    """Select a server and open the pool of the sync client"""
+    from hrms.db import get_db
+
+    get_db().command('ping')
+
+
+async def aconnect_mongo():
+    """Select a server and open the pool of the Motor client for the running loop"""
+    from hrms.async_db import get_async_db
+
+    await get_async_db().command('ping')
+
+
+def _pending(steps):
+    """(name, step) for the steps not yet run in this process"""
+    for step in steps:
+        name = getattr(step, '__name__', repr(step))
+        if name not in _done:
+            _done.add(name)
+            yield name, step
+
+
+def _log(label, name, started):
+    logger.info('%s warm-up step %s took %.1f ms', label, name, (time.perf_counter() - started) * 1000)
+
+
+def warm_up(label, *steps):
+    """Run warm-up steps once per process, logging how long each took"""
+    if not ENABLED or not serving():
+        return
+    for name, step in _pending(steps):
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.warning('%s warm-up step %s failed', label, name, exc_info=True)
+            continue
+        _log(label, name, started)
+
+
+async def awarm_up(label, *steps):
+    """Async counterpart of warm_up for coroutine steps"""
+    if not ENABLED:
+        return
+    for name, step in _pending(steps):
+        started = time.perf_counter()
+        try:
+            await step()
+        except Exception:
+            logger.warning('%s warm-up step %s failed', label, name, exc_info=True)
+            continue
+        _log(label, name, started)
+
+
+def lifespan(application):
+    """Wrap an ASGI application to answer lifespan events.
+
+    Django's handler only accepts HTTP scopes; this one completes startup
+    after warming the Motor client (when the async views are served) and
+    completes shutdown straight away.
+    """
+    async def app(scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await application(scope, receive, send)
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if settings.ASYNC_API:
+                    await awarm_up('asgi', aconnect_mongo)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    return app
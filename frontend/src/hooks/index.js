@@ -1,3 +1,4 @@
 export { useAttendance, useEmployeeHistory, useMarkAttendance } from './useAttendance';
-export { useEmployees, useCreateEmployee, useDeleteEmployee } from './useEmployees';
+export { useEmployees, useEmployeeSearch, useDepartments, useCreateEmployee, useDeleteEmployee } from './useEmployees';
+export { usePagedList } from './usePagedList';
 export { useDashboard } from './useDashboard';
@@ -1,27 +1,15 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useCallback } from 'react';
 import toast from 'react-hot-toast';
 import { attendanceAPI } from '../services/api';
+import { usePagedList } from './usePagedList';
 
 export function useAttendance(filterDate = '') {
-  const [attendanceRecords, setAttendanceRecords] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  const fetchAttendance = useCallback(async () => {
-    try {
-      const response = await attendanceAPI.getAll(filterDate || null);
-      setAttendanceRecords(response.data || []);
-    } catch {
-      toast.error('Failed to fetch attendance records');
-    } finally {
-      setLoading(false);
-    }
-  }, [filterDate]);
-
-  useEffect(() => {
-    fetchAttendance();
-  }, [fetchAttendance]);
-
-  return { attendanceRecords, loading, refetch: fetchAttendance };
+  const fetchPage = useCallback(
+    (after) => attendanceAPI.getAll(filterDate || null, { after }),
+    [filterDate]
+  );
+  const { items, ...page } = usePagedList(fetchPage, 'Failed to fetch attendance records');
+  return { attendanceRecords: items, ...page };
 }
 
 export function useEmployeeHistory() {
@@ -66,11 +54,8 @@ export function useMarkAttendance(onSuccess) {
 
     setSubmitting(true);
     try {
-      await attendanceAPI.markAttendance({
-        employee_id: employeeId,
-        date,
-        status,
-      });
+      // An upsert, so a wrong mark can be corrected by marking the day again
+      await attendanceAPI.setAttendance(employeeId, date, status, crypto.randomUUID());
       toast.success(`Attendance marked as ${status}`);
       onSuccess?.();
       return true;
@@ -1,28 +1,60 @@
 import { useState, useEffect, useCallback } from 'react';
 import toast from 'react-hot-toast';
 import { employeeAPI } from '../services/api';
+import { usePagedList } from './usePagedList';
 
 export function useEmployees() {
-  const [employees, setEmployees] = useState([]);
-  const [loading, setLoading] = useState(true);
+  const fetchPage = useCallback((after) => employeeAPI.getAll({ after }), []);
+  const { items, ...page } = usePagedList(fetchPage, 'Failed to fetch employees');
+  return { employees: items, ...page };
+}
+
+// Typeahead results for `query`, requested once typing pauses for `delay` ms
+export function useEmployeeSearch(query, delay = 250) {
+  const term = query.trim();
+  const [found, setFound] = useState({ term: '', results: [] });
+
+  useEffect(() => {
+    if (!term) return undefined;
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await employeeAPI.search(term);
+        if (!cancelled) setFound({ term, results: response.data || [] });
+      } catch {
+        if (!cancelled) {
+          toast.error('Failed to search employees');
+          setFound({ term, results: [] });
+        }
+      }
+    }, delay);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [term, delay]);
 
-  const fetchEmployees = useCallback(async () => {
-    setLoading(true);
+  const ready = Boolean(term) && found.term === term;
+  return { results: ready ? found.results : [], searching: Boolean(term) && !ready };
+}
+
+export function useDepartments() {
+  const [departments, setDepartments] = useState([]);
+
+  const fetchDepartments = useCallback(async () => {
     try {
-      const response = await employeeAPI.getAll();
-      setEmployees(response.data || []);
+      const response = await employeeAPI.getDepartments();
+      setDepartments(response.data?.departments || []);
     } catch {
-      toast.error('Failed to fetch employees');
-    } finally {
-      setLoading(false);
+      toast.error('Failed to fetch departments');
     }
   }, []);
 
   useEffect(() => {
-    fetchEmployees();
-  }, [fetchEmployees]);
+    fetchDepartments();
+  }, [fetchDepartments]);
 
-  return { employees, loading, refetch: fetchEmployees };
+  return { departments, refetch: fetchDepartments };
 }
 
 export function useCreateEmployee(onSuccess) {
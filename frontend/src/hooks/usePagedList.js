@@ -0,0 +1,44 @@
+import { useState, useEffect, useCallback } from 'react';
+import toast from 'react-hot-toast';
+
+// Loads the first keyset page of a list and appends further pages on demand.
+// fetchPage(after) must return the API response for the page after `after`.
+export function usePagedList(fetchPage, errorMessage) {
+  const [items, setItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const refetch = useCallback(async () => {
+    setLoading(true);
+    try {
+      const response = await fetchPage(null);
+      setItems(response.data || []);
+      setNextCursor(response.pagination?.next_cursor || null);
+    } catch {
+      toast.error(errorMessage);
+    } finally {
+      setLoading(false);
+    }
+  }, [fetchPage, errorMessage]);
+
+  const loadMore = useCallback(async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await fetchPage(nextCursor);
+      setItems((previous) => [...previous, ...(response.data || [])]);
+      setNextCursor(response.pagination?.next_cursor || null);
+    } catch {
+      toast.error(errorMessage);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [fetchPage, nextCursor, errorMessage]);
+
+  useEffect(() => {
+    refetch();
+  }, [refetch]);
+
+  return { items, loading, loadingMore, hasMore: Boolean(nextCursor), loadMore, refetch };
+}
@@ -1,26 +1,38 @@
 import { useState } from 'react';
-import { HiCheck, HiX, HiCalendar, HiRefresh, HiClipboardList, HiUserGroup, HiClock } from 'react-icons/hi';
+import { HiCheck, HiX, HiCalendar, HiRefresh, HiClipboardList, HiUserGroup, HiClock, HiSearch } from 'react-icons/hi';
 import { Button, Table, Modal, Card } from '../components';
-import { useEmployees } from '../hooks/useEmployees';
+import { useEmployees, useEmployeeSearch } from '../hooks/useEmployees';
 import { useAttendance, useEmployeeHistory, useMarkAttendance } from '../hooks/useAttendance';
 
 export default function Attendance() {
-  const [selectedEmployee, setSelectedEmployee] = useState('');
+  const [selectedEmployee, setSelectedEmployee] = useState(null);
+  const [employeeQuery, setEmployeeQuery] = useState('');
   const [selectedDate, setSelectedDate] = useState(new Date().toISOString().split('T')[0]);
   const [filterDate, setFilterDate] = useState('');
 
-  const { employees, loading: employeesLoading } = useEmployees();
-  const { attendanceRecords, loading: attendanceLoading, refetch: refetchAttendance } = useAttendance(filterDate);
+  const {
+    employees, loading: employeesLoading, hasMore: hasMoreEmployees,
+    loadMore: loadMoreEmployees, loadingMore: loadingMoreEmployees,
+  } = useEmployees();
+  // The picker searches the whole directory, not just the loaded pages
+  const { results: employeeMatches, searching: searchingEmployees } = useEmployeeSearch(
+    selectedEmployee ? '' : employeeQuery
+  );
+  const {
+    attendanceRecords, loading: attendanceLoading, refetch: refetchAttendance,
+    hasMore: hasMoreAttendance, loadMore: loadMoreAttendance, loadingMore: loadingMoreAttendance,
+  } = useAttendance(filterDate);
   const { employeeHistory, historyLoading, isOpen: isHistoryModalOpen, fetchHistory, closeHistory } = useEmployeeHistory();
   const { markAttendance: submitAttendance, submitting } = useMarkAttendance(() => {
-    setSelectedEmployee('');
+    setSelectedEmployee(null);
+    setEmployeeQuery('');
     refetchAttendance();
   });
 
   const loading = employeesLoading || attendanceLoading;
 
   const handleMarkAttendance = (status) => {
-    submitAttendance(selectedEmployee, selectedDate, status);
+    submitAttendance(selectedEmployee?.id, selectedDate, status);
   };
 
   const getStatusBadge = (status) => {
@@ -127,7 +139,15 @@ export default function Attendance() {
     },
   ];
 
-  const selectedEmp = employees.find(e => e.id === selectedEmployee);
+  const selectEmployee = (emp) => {
+    setSelectedEmployee(emp);
+    setEmployeeQuery(`${emp.employee_id} - ${emp.full_name}`);
+  };
+
+  const handleEmployeeQueryChange = (value) => {
+    setSelectedEmployee(null);
+    setEmployeeQuery(value);
+  };
 
   return (
     <div className="space-y-8">
@@ -151,27 +171,48 @@ export default function Attendance() {
               <label className="block text-sm font-semibold text-slate-700 mb-2">
                 Select Employee <span className="text-rose-500">*</span>
               </label>
-              <select
-                value={selectedEmployee}
-                onChange={(e) => setSelectedEmployee(e.target.value)}
-                className="w-full px-4 py-3 bg-white/50 backdrop-blur-sm border-2 border-slate-200/50 rounded-xl focus:outline-none focus:bg-white focus:border-teal-500 focus:ring-4 focus:ring-teal-500/10 transition-all text-slate-700 font-medium"
-              >
-                <option value="">Choose an employee...</option>
-                {employees.map((emp) => (
-                  <option key={emp.id} value={emp.id}>
-                    {emp.employee_id} - {emp.full_name}
-                  </option>
-                ))}
-              </select>
-              {selectedEmp && (
+              <div className="relative">
+                <HiSearch className="absolute left-4 top-1/2 -translate-y-1/2 w-5 h-5 text-slate-400" />
+                <input
+                  type="text"
+                  value={employeeQuery}
+                  onChange={(e) => handleEmployeeQueryChange(e.target.value)}
+                  placeholder="Search by name, ID or email..."
+                  className="w-full pl-12 pr-4 py-3 bg-white/50 backdrop-blur-sm border-2 border-slate-200/50 rounded-xl focus:outline-none focus:bg-white focus:border-teal-500 focus:ring-4 focus:ring-teal-500/10 transition-all text-slate-700 font-medium"
+                />
+                {!selectedEmployee && employeeQuery.trim() && (
+                  <ul className="absolute z-10 mt-2 w-full max-h-64 overflow-y-auto bg-white rounded-xl border border-slate-200 shadow-lg">
+                    {employeeMatches.map((emp) => (
+                      <li key={emp.id}>
+                        <button
+                          type="button"
+                          onClick={() => selectEmployee(emp)}
+                          className="w-full px-4 py-2.5 text-left hover:bg-teal-50 transition-colors"
+                        >
+                          <span className="font-mono text-xs bg-slate-100 px-2 py-0.5 rounded text-slate-600 mr-2">
+                            {emp.employee_id}
+                          </span>
+                          <span className="font-medium text-slate-800">{emp.full_name}</span>
+                        </button>
+                      </li>
+                    ))}
+                    {employeeMatches.length === 0 && (
+                      <li className="px-4 py-2.5 text-sm text-slate-500">
+                        {searchingEmployees ? 'Searching...' : 'No employees found'}
+                      </li>
+                    )}
+                  </ul>
+                )}
+              </div>
+              {selectedEmployee && (
                 <div className="mt-3 p-4 bg-gradient-to-r from-teal-50 to-cyan-50 rounded-xl border border-teal-100">
                   <div className="flex items-center gap-3">
                     <div className="w-10 h-10 bg-gradient-to-br from-teal-500 to-cyan-500 rounded-xl flex items-center justify-center text-white font-semibold shadow-lg shadow-teal-500/25">
-                      {selectedEmp.full_name?.charAt(0)}
+                      {selectedEmployee.full_name?.charAt(0)}
                     </div>
                     <div>
-                      <p className="font-semibold text-slate-800">{selectedEmp.full_name}</p>
-                      <p className="text-sm text-slate-500">{selectedEmp.department}</p>
+                      <p className="font-semibold text-slate-800">{selectedEmployee.full_name}</p>
+                      <p className="text-sm text-slate-500">{selectedEmployee.department}</p>
                     </div>
                   </div>
                 </div>
@@ -262,6 +303,13 @@ export default function Attendance() {
           loading={loading}
           emptyMessage="No attendance records found. Start by marking attendance above."
         />
+        {hasMoreAttendance && (
+          <div className="flex justify-center mt-4">
+            <Button variant="secondary" onClick={loadMoreAttendance} loading={loadingMoreAttendance}>
+              Load more
+            </Button>
+          </div>
+        )}
       </div>
 
       {/* Employee Attendance History Section */}
@@ -281,6 +329,13 @@ export default function Attendance() {
           loading={loading}
           emptyMessage="No employees found. Add employees first to track attendance."
         />
+        {hasMoreEmployees && (
+          <div className="flex justify-center mt-4">
+            <Button variant="secondary" onClick={loadMoreEmployees} loading={loadingMoreEmployees}>
+              Load more
+            </Button>
+          </div>
+        )}
       </div>
 
       {/* Employee History Modal */}
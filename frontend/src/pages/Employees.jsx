@@ -1,7 +1,7 @@
 import { useState } from 'react';
 import { HiPlus, HiTrash, HiEye, HiUserAdd, HiMail, HiOfficeBuilding, HiIdentification, HiUser, HiCalendar, HiExclamationCircle } from 'react-icons/hi';
 import { Button, Table, Modal, Input, ConfirmDialog } from '../components';
-import { useEmployees, useCreateEmployee, useDeleteEmployee } from '../hooks/useEmployees';
+import { useEmployees, useDepartments, useCreateEmployee, useDeleteEmployee } from '../hooks/useEmployees';
 
 const departments = [
   'Engineering',
@@ -27,7 +27,12 @@ export default function Employees() {
   });
   const [localErrors, setLocalErrors] = useState({});
 
-  const { employees, loading, refetch } = useEmployees();
+  const { employees, loading, loadingMore, hasMore, loadMore, refetch: refetchEmployees } = useEmployees();
+  const { departments: departmentCounts, refetch: refetchDepartments } = useDepartments();
+  const refetch = () => {
+    refetchEmployees();
+    refetchDepartments();
+  };
   const { createEmployee, submitting: createSubmitting, errors: apiErrors, setErrors: setApiErrors, clearErrors } = useCreateEmployee(() => {
     setIsModalOpen(false);
     setFormData({ employee_id: '', full_name: '', email: '', department: '' });
@@ -204,7 +209,9 @@ export default function Employees() {
               <HiUser className="w-6 h-6 text-teal-600" />
             </div>
             <div>
-              <p className="text-2xl font-bold text-slate-800">{employees.length}</p>
+              <p className="text-2xl font-bold text-slate-800">
+                {departmentCounts.reduce((total, d) => total + d.headcount, 0)}
+              </p>
               <p className="text-sm text-slate-500">Total Employees</p>
             </div>
           </div>
@@ -215,7 +222,7 @@ export default function Employees() {
             </div>
             <div>
               <p className="text-2xl font-bold text-slate-800">
-                {new Set(employees.map(e => e.department)).size}
+                {departmentCounts.length}
               </p>
               <p className="text-sm text-slate-500">Departments</p>
             </div>
@@ -230,6 +237,13 @@ export default function Employees() {
         loading={loading}
         emptyMessage="No employees found. Click 'Add Employee' to add your first team member."
       />
+      {hasMore && (
+        <div className="flex justify-center mt-4">
+          <Button variant="secondary" onClick={loadMore} loading={loadingMore}>
+            Load more
+          </Button>
+        </div>
+      )}
 
       {/* Add Employee Modal */}
       <Modal
@@ -22,19 +22,32 @@ api.interceptors.response.use(
   }
 );
 
+// Rows per keyset page; later pages are requested with the previous
+// response's pagination.next_cursor as `after`
+export const PAGE_SIZE = 50;
+
+const pageParams = ({ limit = PAGE_SIZE, after } = {}) => (after ? { limit, after } : { limit });
+
 export const employeeAPI = {
-  getAll: () => api.get('/api/employees/'),
+  getAll: (page) => api.get('/api/employees/', { params: pageParams(page) }),
+  search: (q, limit = 10) => api.get('/api/employees/search/', { params: { q, limit } }),
+  getDepartments: () => api.get('/api/employees/departments/'),
   getById: (id) => api.get(`/api/employees/${id}/`),
   create: (data) => api.post('/api/employees/', data),
   delete: (id) => api.delete(`/api/employees/${id}/`),
 };
 
 export const attendanceAPI = {
-  getAll: (date = null) => {
-    const params = date ? { date } : {};
-    return api.get('/api/attendance/', { params });
+  getAll: (date = null, page) => {
+    const params = pageParams(page);
+    return api.get('/api/attendance/', { params: date ? { ...params, date } : params });
   },
-  markAttendance: (data) => api.post('/api/attendance/', data),
+  // Retries of the same call reuse idempotencyKey and never create duplicates
+  setAttendance: (employeeId, date, status, idempotencyKey) => api.put(
+    `/api/attendance/employee/${employeeId}/${date}/`,
+    { status },
+    idempotencyKey ? { headers: { 'Idempotency-Key': idempotencyKey } } : undefined,
+  ),
   getByEmployee: (employeeId) => api.get(`/api/attendance/employee/${employeeId}/`),
 };
 